@@ -0,0 +1,187 @@
+import hashlib
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import candle_store
+
+# === CONFIG ===
+# TwelveData free plan: 8 credits per minute, 800 per day, per key
+CREDITS_PER_MINUTE = int(os.environ.get('TWELVEDATA_CREDITS_PER_MINUTE', '8'))
+CREDITS_PER_DAY = int(os.environ.get('TWELVEDATA_CREDITS_PER_DAY', '800'))
+ACQUIRE_TIMEOUT = 70
+# Bucket state lives in the candle DB, so every process using it (dashboard, a separate
+# precompute worker) spends from the same per-key credits; 0 keeps buckets per process
+SHARED = os.environ.get('API_CREDITS_SHARED', '1') != '0'
+
+_cond = threading.Condition()
+_buckets = {}
+_sequence = itertools.count()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+class TokenBucket:
+    def __init__(self, key, per_minute=CREDITS_PER_MINUTE, per_day=CREDITS_PER_DAY):
+        self.key = key
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.tokens = float(per_minute)
+        self.used_today = 0
+        self.day = _today()
+        self.blocked_until = 0.0
+        # Wall-clock seconds, comparable across processes
+        self.updated = time.time()
+
+    def refill(self, now):
+        self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+        if self.day != _today():
+            self.day = _today()
+            self.used_today = 0
+
+    def available(self, now, credits=1):
+        self.refill(now)
+        return now >= self.blocked_until and self.tokens >= credits and self.used_today + credits <= self.per_day
+
+    def wait_time(self, now, credits=1):
+        if self.used_today + credits > self.per_day or credits > self.per_minute:
+            return None
+        return max(self.blocked_until - now, (credits - self.tokens) * 60.0 / self.per_minute, 0.0)
+
+    def take(self, credits=1):
+        self.tokens -= credits
+        self.used_today += credits
+
+    def state(self):
+        return (_key_hash(self.key), self.tokens, self.updated, self.day.isoformat(), self.used_today, self.blocked_until)
+
+    def load(self, tokens, updated, day, used_today, blocked_until):
+        self.tokens, self.updated, self.used_today, self.blocked_until = tokens, updated, used_today, blocked_until
+        self.day = datetime.fromisoformat(day).date()
+
+
+def _key_hash(key):
+    # The DB only ever sees a digest of the key
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _connect(db_path=None):
+    path = db_path or candle_store.DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    with _init_lock:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS api_credits (
+                    key_hash TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL, updated REAL NOT NULL, day TEXT NOT NULL,
+                    used_today INTEGER NOT NULL, blocked_until REAL NOT NULL
+                )
+            """)
+            _initialized.add(path)
+    return conn
+
+
+@contextmanager
+def _shared(buckets):
+    # Loads the buckets from the candle DB and writes them back in one write transaction, so
+    # a check-and-take cannot interleave with another process's; a no-op with SHARED off
+    if not SHARED:
+        yield
+        return
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        hashes = [_key_hash(b.key) for b in buckets]
+        rows = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT * FROM api_credits WHERE key_hash IN ({', '.join('?' * len(hashes))})", hashes)}
+        for bucket, key_hash in zip(buckets, hashes):
+            if key_hash in rows:
+                bucket.load(*rows[key_hash])
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.executemany("INSERT OR REPLACE INTO api_credits VALUES (?, ?, ?, ?, ?, ?)",
+                         [b.state() for b in buckets])
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def get_bucket(key, per_minute=CREDITS_PER_MINUTE, per_day=CREDITS_PER_DAY):
+    with _cond:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(key, per_minute, per_day)
+        return _buckets[key]
+
+
+class ApiKeyScheduler:
+    def __init__(self, keys, per_minute=CREDITS_PER_MINUTE, per_day=CREDITS_PER_DAY):
+        # Buckets are shared per key across engines, so duplicate keys count once
+        self.keys = list(dict.fromkeys(keys))
+        self.buckets = [get_bucket(k, per_minute, per_day) for k in self.keys]
+        self._waiters = []
+
+    def acquire(self, priority=0, timeout=ACQUIRE_TIMEOUT, exclude=(), credits=1):
+        # A batch request costs one credit per symbol, all taken from the same key
+        ticket = (-priority, next(_sequence))
+        deadline = time.monotonic() + timeout
+        with _cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    if self._waiters[0] == ticket:
+                        with _shared(self.buckets):
+                            bucket = self._best_bucket(now, exclude, credits) or self._best_bucket(now, (), credits)
+                            if bucket is not None:
+                                bucket.take(credits)
+                        if bucket is not None:
+                            return bucket.key
+                    waits = [w for w in (b.wait_time(now, credits) for b in self.buckets) if w is not None]
+                    if not waits or time.monotonic() >= deadline:
+                        return None
+                    _cond.wait(min(max(min(waits), 0.05), deadline - time.monotonic()))
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                _cond.notify_all()
+
+    def _best_bucket(self, now, exclude=(), credits=1):
+        ready = [b for b in self.buckets if b.key not in exclude and b.available(now, credits)]
+        return max(ready, key=lambda b: (b.tokens, -b.used_today), default=None)
+
+    def report_rate_limited(self, key, cooldown=60.0):
+        with _cond:
+            bucket = _buckets[key]
+            with _shared([bucket]):
+                bucket.tokens = 0.0
+                bucket.blocked_until = time.time() + cooldown
+            _cond.notify_all()
+
+    def capacity(self):
+        # Most credits a single request can ever be paid with
+        return max(b.per_minute for b in self.buckets)
+
+    def remaining(self):
+        now = time.time()
+        with _cond, _shared(self.buckets):
+            for b in self.buckets:
+                b.refill(now)
+            return {f"...{b.key[-4:]}": {'minute': int(b.tokens), 'day': b.per_day - b.used_today}
+                    for b in self.buckets}
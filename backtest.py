@@ -0,0 +1,163 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import candle_store
+import engine
+import execution
+
+# === CONFIG ===
+# Bars between full retrains; each retrain sees the tier's HISTORY_SIZE bars before it
+RETRAIN_EVERY = int(os.environ.get('BACKTEST_RETRAIN_EVERY', '120'))
+# Bars a TP/SL plan may stay open before it is closed at market
+MAX_HOLD = int(os.environ.get('BACKTEST_MAX_HOLD', '24'))
+TRAIN_FUNCTIONS = {'pro_max': 'train_ensemble_model'}
+FEATURES = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
+TIMEOUT, TAKE_PROFIT, STOP_LOSS = 0, 1, 2
+
+
+def walk_forward(module, df, retrain_every=RETRAIN_EVERY):
+    # Returns (bars, proba BUY) for every bar whose model passed the tier's accuracy gate,
+    # plus (retrains, gated) counts. Bar i is predicted by a model fitted on bars before i.
+    train_fn = getattr(module, TRAIN_FUNCTIONS.get(module.TIER, 'train_model'))
+    window = module.HISTORY_SIZE
+    X = df[FEATURES].to_numpy()
+    bars, probas, retrains, gated = [], [], 0, 0
+    for start in range(window, len(df) - 1, retrain_every):
+        stop = min(start + retrain_every, len(df) - 1)
+        result = tuple(train_fn(df.iloc[start - window:start].reset_index(drop=True)))
+        model, acc, scaler = (result + (None,))[:3]
+        retrains += 1
+        if model is None or not module.accuracy_gate(acc):
+            gated += 1
+            continue
+        segment = X[start:stop] if scaler is None else scaler.transform(X[start:stop])
+        bars.append(np.arange(start, stop))
+        probas.append(model.predict_proba(segment)[:, 1])
+    if not bars:
+        return np.empty(0, dtype=int), np.empty(0), retrains, gated
+    return np.concatenate(bars), np.concatenate(probas), retrains, gated
+
+
+def first_hit(hit, max_hold):
+    # Column of the first True per row, or max_hold when the row has none
+    first = hit.argmax(axis=1)
+    return np.where(hit[np.arange(len(hit)), first], first, max_hold)
+
+
+def resolve_trades(high, low, close, entries, direction, tp, sl, max_hold=MAX_HOLD):
+    # Each trade enters at close[entry] and watches the next max_hold bars at once:
+    # returns (pnl in price units, bars held, outcome code)
+    n = len(close)
+    pad = np.full(max_hold, np.nan)
+    # Row i is bars i+1 .. i+max_hold; the NaN padding past the end never reaches a level
+    ahead_high = sliding_window_view(np.concatenate([high[1:], pad]), max_hold)
+    ahead_low = sliding_window_view(np.concatenate([low[1:], pad]), max_hold)
+    entry = close[entries]
+    first_tp = np.full(len(entries), max_hold)
+    first_sl = np.full(len(entries), max_hold)
+    for side, buy in ((direction > 0, True), (direction <= 0, False)):
+        rows, price = entries[side], entry[side][:, None]
+        highs, lows = ahead_high[rows], ahead_low[rows]
+        if buy:
+            first_tp[side] = first_hit(highs - price >= tp, max_hold)
+            first_sl[side] = first_hit(price - lows >= sl, max_hold)
+        else:
+            first_tp[side] = first_hit(price - lows >= tp, max_hold)
+            first_sl[side] = first_hit(highs - price >= sl, max_hold)
+    held_to_close = np.minimum(entries + max_hold, n - 1) - entries
+
+    # Both levels inside one bar cannot be ordered from OHLC, so the stop counts first
+    outcome = np.where(first_sl < max_hold, STOP_LOSS, TIMEOUT)
+    outcome = np.where((first_tp < first_sl) & (first_tp < max_hold), TAKE_PROFIT, outcome)
+    pnl = np.where(outcome == TAKE_PROFIT, tp,
+                   np.where(outcome == STOP_LOSS, -sl, direction * (close[entries + held_to_close] - entry)))
+    held = np.where(outcome == TAKE_PROFIT, first_tp + 1,
+                    np.where(outcome == STOP_LOSS, first_sl + 1, held_to_close))
+    return pnl, held, outcome
+
+
+def backtest_symbol(symbol, tier, limit=None, retrain_every=RETRAIN_EVERY, max_hold=MAX_HOLD):
+    # Module-level so the 'processes' backend can run it; reads its own history from the store
+    profile = engine.load_profile(tier)
+    module = profile.module
+    df = candle_store.load_candles(symbol, profile.interval, limit)
+    if len(df) <= module.HISTORY_SIZE + 1:
+        return {'tier': tier, 'symbol': symbol, 'bars': len(df), 'trades': 0, 'retrains': 0, 'gated': 0}
+    df = module.add_features(df).reset_index(drop=True)
+
+    start = time.perf_counter()
+    bars, proba, retrains, gated = walk_forward(module, df, retrain_every)
+    fit_seconds = time.perf_counter() - start
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    direction = np.where(proba > 0.5, 1.0, -1.0)
+    if hasattr(module, 'TP_OFFSET'):
+        pnl, held, outcome = resolve_trades(high, low, close, bars, direction,
+                                            module.TP_OFFSET, module.SL_OFFSET, max_hold)
+    else:
+        # Tiers without a plan are scored on the next-bar direction they are trained on
+        pnl, held, outcome = resolve_trades(high, low, close, bars, direction, np.inf, np.inf, 1)
+    bps = pnl / close[bars] * 1e4
+    return {
+        'tier': tier, 'symbol': symbol, 'bars': len(df), 'trades': len(bars), 'retrains': retrains,
+        'gated': gated, 'wins': int((pnl > 0).sum()), 'tp': int((outcome == TAKE_PROFIT).sum()),
+        'sl': int((outcome == STOP_LOSS).sum()), 'timeout': int((outcome == TIMEOUT).sum()),
+        'bps': float(bps.sum()), 'held': int(held.sum()), 'fit_s': fit_seconds,
+    }
+
+
+def summarize(rows, by='tier'):
+    df = pd.DataFrame(rows).fillna(0)
+    totals = df.groupby(by, sort=False)[['bars', 'trades', 'retrains', 'gated', 'wins', 'tp', 'sl', 'timeout',
+                                         'bps', 'held', 'fit_s']].sum()
+    trades = totals['trades'].where(totals['trades'] > 0)
+    return pd.DataFrame({
+        'Trades': totals['trades'].astype(int),
+        'Retrains': totals['retrains'].astype(int),
+        'Gated %': (100 * totals['gated'] / totals['retrains'].where(totals['retrains'] > 0)).round(1),
+        'Win %': (100 * totals['wins'] / trades).round(1),
+        'TP %': (100 * totals['tp'] / trades).round(1),
+        'SL %': (100 * totals['sl'] / trades).round(1),
+        'Timeout %': (100 * totals['timeout'] / trades).round(1),
+        'Avg bps': (totals['bps'] / trades).round(2),
+        'Total bps': totals['bps'].round(1),
+        'Avg bars held': (totals['held'] / trades).round(2),
+        'Fit s': totals['fit_s'].round(1),
+    })
+
+
+def run_backtest(tiers=None, symbols=None, limit=None, retrain_every=RETRAIN_EVERY, max_hold=MAX_HOLD,
+                 backend=None, workers=None):
+    jobs = []
+    for tier in (tiers or engine.TIER_MODULES):
+        profile = engine.load_profile(tier)
+        jobs += [(symbol, tier, limit, retrain_every, max_hold)
+                 for symbol in profile.symbols if symbols is None or symbol in symbols]
+    rows = execution.run_per_symbol(backtest_symbol, jobs, backend or execution.DEFAULT_BACKEND or 'processes',
+                                    workers, key='backtest')
+    return [row for row in rows if row]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the tier signals and TP/SL plans")
+    parser.add_argument('--tiers', nargs='*', default=None)
+    parser.add_argument('--symbols', nargs='*', default=None)
+    parser.add_argument('--limit', type=int, default=None, help="most recent stored candles to replay")
+    parser.add_argument('--retrain-every', type=int, default=RETRAIN_EVERY)
+    parser.add_argument('--max-hold', type=int, default=MAX_HOLD)
+    parser.add_argument('--backend', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = run_backtest(args.tiers, args.symbols, args.limit, args.retrain_every, args.max_hold,
+                        args.backend, args.workers)
+    print(f"Walk-forward backtest: retrain every {args.retrain_every} bars, max hold {args.max_hold} bars, "
+          f"{len(rows)} symbol x tier runs in {time.perf_counter() - start:.1f}s")
+    print(summarize(rows).to_string())
+    print()
+    print(summarize(rows, ['tier', 'symbol']).to_string())
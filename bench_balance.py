@@ -0,0 +1,79 @@
+import json
+import subprocess
+import sys
+
+CANDLES = [300, 20000, 200000]
+
+CHILD = """
+import json, resource, sys, time, tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils import resample
+import training
+from features import FEATURES, add_indicators
+from stub_twelvedata import synthetic_series
+method, candles = sys.argv[1], int(sys.argv[2])
+df = pd.DataFrame(synthetic_series('EUR/USD', candles)).astype({'open': float, 'high': float, 'low': float, 'close': float})
+df = add_indicators(df)
+df['target'] = np.where(df['close'].shift(-1) > df['close'], 1, 0)
+df = df.dropna()
+
+
+def pandas_prep(df, scale):
+    df_1 = df[df['target'] == 1]
+    df_0 = df[df['target'] == 0]
+    min_len = min(len(df_1), len(df_0))
+    df_bal = pd.concat([
+        resample(df_1, replace=True, n_samples=min_len, random_state=42),
+        resample(df_0, replace=True, n_samples=min_len, random_state=42)
+    ]).sample(frac=1, random_state=42).reset_index(drop=True)
+    X, y = df_bal[FEATURES], df_bal['target']
+    if scale:
+        X = pd.DataFrame(StandardScaler().fit_transform(X), columns=FEATURES)
+    return X, y
+
+
+def numpy_prep(df, scale):
+    idx = training.balanced_indices(df['target'].to_numpy())
+    X = training.feature_matrix(df, FEATURES, np.float64 if scale else np.float32)[idx]
+    y = df['target'].to_numpy()[idx]
+    if scale:
+        X = StandardScaler(copy=False).fit_transform(X)
+    return X, y
+
+
+prep = pandas_prep if method == 'pandas' else numpy_prep
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+prep(df, True)
+result = {'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024}
+prep(df, False)
+for scale in (False, True):
+    tracemalloc.start()
+    start = time.perf_counter()
+    X, y = prep(df, scale)
+    elapsed = time.perf_counter() - start
+    blocks = len(tracemalloc.take_snapshot().traces)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del X, y
+    result['scaled' if scale else 'plain'] = {'s': elapsed, 'peak_mb': peak / 2**20, 'live_blocks': blocks}
+print(json.dumps(result))
+"""
+
+
+def run(method, candles):
+    out = subprocess.run([sys.executable, '-c', CHILD, method, str(candles)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    for candles in CANDLES:
+        for method in ('pandas', 'numpy'):
+            r = run(method, candles)
+            for mode in ('plain', 'scaled'):
+                m = r[mode]
+                print(f"{candles:>7} candles {method:<6} {mode:<6}: {m['s'] * 1000:8.2f} ms, "
+                      f"traced peak {m['peak_mb']:7.2f} MB, {m['live_blocks']:>5} live blocks")
+            print(f"{'':>15} {method:<6} peak RSS growth on first scaled prep: {r['rss_growth_mb']:.1f} MB")
@@ -0,0 +1,102 @@
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SYMBOLS = ['EUR/USD', 'USD/JPY', 'GBP/USD', 'XAU/USD', 'BTC/USD']
+REPEATS = 200
+
+PEAK_RSS = """
+def peak_rss_mb():
+    # VmHWM starts over at exec, unlike ru_maxrss which keeps the forking parent's peak
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+"""
+
+# A serving process: load every exported model and score one row, without the training stack
+CHILD = PEAK_RSS + """
+import json, sys, time
+start = time.perf_counter()
+import joblib
+import numpy as np
+import compiled_model
+models = [joblib.load(path) for path in sys.argv[1:]]
+loaded = time.perf_counter() - start
+for model in models:
+    model.predict_proba(np.zeros((1, 10)))
+heavy = [m for m in ('xgboost', 'lightgbm', 'catboost', 'sklearn') if m in sys.modules]
+print(json.dumps({'s': loaded, 'rss_mb': peak_rss_mb(), 'heavy': heavy}))
+"""
+
+LIBRARY = PEAK_RSS + """
+import json, sys, time
+start = time.perf_counter()
+import joblib
+import numpy as np
+import training
+entries = [joblib.load(path) for path in sys.argv[1:]]
+loaded = time.perf_counter() - start
+for entry in entries:
+    X = np.zeros((1, 10))
+    entry['model'].predict_proba(X if entry['scaler'] is None else entry['scaler'].transform(X))
+print(json.dumps({'s': loaded, 'rss_mb': peak_rss_mb()}))
+"""
+
+
+def per_call(fn, repeats=REPEATS):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def child(code, paths):
+    out = subprocess.run([sys.executable, '-c', code] + paths, capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    registry = os.environ['MODEL_REGISTRY_DIR'] = tempfile.mkdtemp()
+    import data_feed
+    import model_registry
+    import one_hour
+    import one_hour_pro_max_ai as pro_max
+    from features import FEATURES, add_indicators
+    from stub_twelvedata import synthetic_series
+
+    print(f"{'tier':>9} {'library':>12} {'compiled':>12} {'batch library':>14} {'batch compiled':>15}")
+    for module, train_fn in ((one_hour, one_hour.train_model), (pro_max, pro_max.train_ensemble_model)):
+        single, fast, batch, fast_batch = [], [], [], []
+        for symbol in SYMBOLS:
+            df = data_feed.parse_values(synthetic_series(symbol, module.HISTORY_SIZE)).reset_index(drop=True)
+            df = module.add_target(add_indicators(df, module.EMA_ADJUST))
+            model, acc, scaler = (tuple(model_registry.get_model(module.TIER, symbol, df, train_fn)) + (None,))[:3]
+            compiled = model_registry.serving_model(module.TIER, symbol, model, scaler)
+            X = df[FEATURES].to_numpy()
+            scale = (lambda A: A) if scaler is None else (lambda A: scaler.transform(A.copy()))
+
+            # Per-signal call as the tiers make it: raw row in, scaler (if any) applied first
+            single.append(per_call(lambda: model.predict_proba(scale(X[-1:]))))
+            fast.append(per_call(lambda: compiled.predict_proba(X[-1:])))
+            batch.append(per_call(lambda: model.predict_proba(scale(X)), 20))
+            fast_batch.append(per_call(lambda: compiled.predict_proba(X), 20))
+        print(f"{module.TIER:>9} {np.mean(single) * 1000:>9.2f} ms {np.mean(fast) * 1000:>9.2f} ms "
+              f"{np.mean(batch) * 1000:>11.1f} ms {np.mean(fast_batch) * 1000:>12.1f} ms")
+    print(f"(batch = all {len(X)} rows of one symbol; tests/test_compiled_model.py checks the probabilities match)")
+
+    compiled_paths = sorted(glob.glob(os.path.join(registry, '*', '*', '*.compiled')))
+    entry_paths = sorted(glob.glob(os.path.join(registry, '*', '*', '*.joblib')))
+    size = sum(map(os.path.getsize, compiled_paths)) / len(compiled_paths) / 1024
+    entry_size = sum(map(os.path.getsize, entry_paths)) / len(entry_paths) / 1024
+    light, heavy = child(CHILD, compiled_paths), child(LIBRARY, entry_paths)
+    print(f"Serving process, {len(compiled_paths)} models: compiled load {light['s']:.2f}s, "
+          f"peak RSS {light['rss_mb']:.0f} MB, {size:.0f} KB/model, boosting libraries imported: {light['heavy'] or 'none'}")
+    print(f"                             library load  {heavy['s']:.2f}s, "
+          f"peak RSS {heavy['rss_mb']:.0f} MB, {entry_size:.0f} KB/model")
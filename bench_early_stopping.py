@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+
+import data_feed
+import one_hour
+import one_hour_pro_max_ai as pro_max
+import training
+from stub_twelvedata import synthetic_series
+
+SYMBOLS = ['EUR/USD', 'USD/JPY', 'GBP/USD', 'USD/CHF', 'AUD/USD', 'USD/CAD']
+TIERS = [(one_hour, 'train_model'), (pro_max, 'train_ensemble_model')]
+
+
+def frames(module):
+    return {s: module.add_features(data_feed.parse_values(synthetic_series(s, 300)).reset_index(drop=True))
+            for s in SYMBOLS}
+
+
+def run(module, fn, data, rounds):
+    training.EARLY_STOPPING_ROUNDS = rounds
+    np.random.seed(0)
+    start = time.perf_counter()
+    fitted = [getattr(module, fn)(df) for df in data.values()]
+    elapsed = time.perf_counter() - start
+    accs = [f[1] for f in fitted]
+    used = [training.boosting_rounds(f[0]) for f in fitted]
+    return elapsed, float(np.mean(accs)), used
+
+
+if __name__ == "__main__":
+    for module, fn in TIERS:
+        data = frames(module)
+        for rounds in (0, 20):
+            elapsed, acc, used = run(module, fn, data, rounds)
+            label = f"early stop {rounds}" if rounds else "full rounds  "
+            print(f"{module.TIER:<8} {label}: {elapsed:6.2f}s for {len(data)} symbols, mean fold acc {acc:.3f}")
+            print(f"{'':>8} rounds used: {used}")
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SYMBOLS = ['EUR/USD', 'USD/JPY', 'GBP/USD', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP', 'XAU/USD', 'BTC/USD']
+
+
+def shap_import_seconds():
+    out = subprocess.run([sys.executable, '-c', 'import time; t = time.perf_counter(); import shap; '
+                          'print(time.perf_counter() - t)'], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    os.environ['MODEL_REGISTRY_DIR'] = tempfile.mkdtemp()
+    import data_feed
+    import explain
+    import model_registry
+    import one_hour_pro_max_ai as pro_max
+    from features import FEATURES, add_indicators
+    from stub_twelvedata import synthetic_series
+
+    cold, cached, reference, diffs = [], [], [], []
+    for symbol in SYMBOLS:
+        df = data_feed.parse_values(synthetic_series(symbol, pro_max.HISTORY_SIZE)).reset_index(drop=True)
+        df = pro_max.add_target(add_indicators(df, pro_max.EMA_ADJUST))
+        model, acc, scaler = model_registry.get_model(pro_max.TIER, symbol, df, pro_max.train_ensemble_model)
+        X = scaler.transform(df[FEATURES].to_numpy()[[-2]])
+        key = [str(df['datetime'].iloc[-2])]
+
+        start = time.perf_counter()
+        values = explain.explain(pro_max.TIER, symbol, model, X, key)
+        cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        explain.explain(pro_max.TIER, symbol, model, X, key)
+        cached.append(time.perf_counter() - start)
+
+        import shap
+        inner = getattr(model, 'model', model)
+        codes = model.edges.transform(X) if inner is not model else X
+        start = time.perf_counter()
+        members = []
+        for est in inner.named_estimators_.values():
+            member = shap.TreeExplainer(est).shap_values(codes)
+            members.append(member[1] if isinstance(member, list) else member)
+        reference.append(time.perf_counter() - start)
+        diffs.append(float(np.abs(values - np.mean(members, axis=0)).max()))
+
+    print(f"Pro Max, {len(SYMBOLS)} symbols, one signal row each (all three ensemble members):")
+    print(f"  native TreeSHAP, first call : {np.mean(cold) * 1000:6.1f} ms/symbol")
+    print(f"  cached next to the model    : {np.mean(cached) * 1000:6.1f} ms/symbol")
+    print(f"  shap.TreeExplainer          : {np.mean(reference) * 1000:6.1f} ms/symbol "
+          f"(+ {shap_import_seconds():.1f}s one-off import)")
+    print(f"  max |difference| vs shap    : {max(diffs):.2e}")
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import features
+from stub_twelvedata import synthetic_series
+
+
+# Reference implementation, as previously copied into each engine module
+def compute_rsi(series, period=14):
+    delta = series.diff()
+    gain = np.where(delta > 0, delta, 0)
+    loss = np.where(delta < 0, -delta, 0)
+    avg_gain = pd.Series(gain).rolling(period).mean()
+    avg_loss = pd.Series(loss).rolling(period).mean()
+    rs = avg_gain / (avg_loss + 1e-6)
+    return 100 - (100 / (1 + rs))
+
+def compute_macd(df, adjust):
+    ema12 = df['close'].ewm(span=12, adjust=adjust).mean()
+    ema26 = df['close'].ewm(span=26, adjust=adjust).mean()
+    macd = ema12 - ema26
+    signal = macd.ewm(span=9, adjust=adjust).mean()
+    return macd - signal
+
+def compute_adx(df, period=14):
+    high, low, close = df['high'], df['low'], df['close']
+    plus_dm = np.where((high.diff() > low.diff()) & (high.diff() > 0), high.diff(), 0)
+    minus_dm = np.where((low.diff() > high.diff()) & (low.diff() > 0), low.diff(), 0)
+    tr = np.maximum.reduce([high - low, abs(high - close.shift()), abs(low - close.shift())])
+    atr = pd.Series(tr).rolling(window=period).mean()
+    plus_di = 100 * pd.Series(plus_dm).rolling(window=period).mean() / (atr + 1e-6)
+    minus_di = 100 * pd.Series(minus_dm).rolling(window=period).mean() / (atr + 1e-6)
+    dx = (abs(plus_di - minus_di) / (plus_di + minus_di + 1e-6)) * 100
+    return pd.Series(dx).rolling(window=period).mean()
+
+def reference_features(df, adjust):
+    df['ma5'] = df['close'].rolling(5).mean()
+    df['ma10'] = df['close'].rolling(10).mean()
+    df['ema10'] = df['close'].ewm(span=10, adjust=adjust).mean()
+    df['rsi14'] = compute_rsi(df['close'])
+    df['momentum'] = df['close'] - df['close'].shift(4)
+    df['macd'] = compute_macd(df, adjust)
+    df['adx'] = compute_adx(df)
+    df['bb_upper'] = df['close'].rolling(20).mean() + 2 * df['close'].rolling(20).std()
+    df['bb_lower'] = df['close'].rolling(20).mean() - 2 * df['close'].rolling(20).std()
+    df['volatility'] = df['high'] - df['low']
+    return df
+
+
+def make_frames(n_symbols, n_candles):
+    frames = {}
+    for i in range(n_symbols):
+        df = pd.DataFrame(synthetic_series(f"SYM{i}/USD", n_candles, seed=i))
+        frames[f"SYM{i}/USD"] = df.astype({c: float for c in features.OHLC})
+    return frames
+
+
+def check_parity(frames):
+    for adjust in (False, True):
+        fast = features.add_indicators_many({s: df.copy() for s, df in frames.items()}, adjust)
+        for symbol, df in frames.items():
+            ref = reference_features(df.copy(), adjust)
+            pd.testing.assert_frame_equal(fast[symbol][features.FEATURES], ref[features.FEATURES],
+                                          check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+def bench(n_symbols, n_candles, adjust=False):
+    frames = make_frames(n_symbols, n_candles)
+    start = time.perf_counter()
+    for df in frames.values():
+        reference_features(df.copy(), adjust)
+    t_ref = time.perf_counter() - start
+    start = time.perf_counter()
+    features.add_indicators_many({s: df.copy() for s, df in frames.items()}, adjust)
+    t_fast = time.perf_counter() - start
+    stacked = np.stack([df[features.OHLC].to_numpy() for df in frames.values()])
+    start = time.perf_counter()
+    features.compute_features(stacked, adjust)
+    t_array = time.perf_counter() - start
+    print(f"{n_symbols:>4} symbols x {n_candles} candles: per-symbol pandas {t_ref:.3f}s, "
+          f"stacked {t_fast:.3f}s ({t_ref / t_fast:.1f}x), array-only {t_array:.3f}s ({t_ref / t_array:.1f}x)")
+
+
+if __name__ == "__main__":
+    check_parity(make_frames(10, 5000))
+    print("parity OK (adjust=False and adjust=True)")
+    bench(10, 5000)
+    bench(500, 5000)
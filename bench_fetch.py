@@ -0,0 +1,49 @@
+import os
+import time
+import tempfile
+
+import candle_store
+from api_scheduler import ApiKeyScheduler
+from fetch_client import FetchClient
+from stub_twelvedata import StubTwelveData
+
+SYMBOLS = ['EUR/USD', 'USD/JPY', 'GBP/USD', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP', 'XAU/USD', 'BTC/USD']
+LATENCY = 0.2
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    with StubTwelveData(latency=LATENCY) as stub:
+        params = {'interval': '1h', 'outputsize': 300, 'apikey': 'demo'}
+        serial = FetchClient(stub.url, max_concurrency=1)
+        pooled = FetchClient(stub.url, max_concurrency=len(SYMBOLS))
+        batch = [(s, params) for s in SYMBOLS]
+        t_serial = timed(lambda: serial.fetch_many(batch, batch_size=1))
+        t_pooled = timed(lambda: pooled.fetch_many(batch, batch_size=1))
+        print(f"{len(SYMBOLS)} symbols, {LATENCY * 1000:.0f} ms injected latency")
+        print(f"  serial : {t_serial:.2f}s")
+        print(f"  pooled : {t_pooled:.2f}s ({t_serial / t_pooled:.1f}x)")
+
+        import data_feed
+        from fetch_client import set_client
+        candle_store.DB_PATH = os.path.join(tempfile.mkdtemp(), 'candles.db')
+        set_client(pooled)
+        before = stub.bytes_sent
+        scheduler = ApiKeyScheduler(['demo-1', 'demo-2'], per_minute=100)
+        t_cold = timed(lambda: data_feed.fetch_many(SYMBOLS, scheduler))
+        cold_bytes = stub.bytes_sent - before
+        before = stub.bytes_sent
+        t_warm = timed(lambda: data_feed.fetch_many(SYMBOLS, scheduler))
+        warm_bytes = stub.bytes_sent - before
+        print(f"  store cold : {t_cold:.2f}s, {cold_bytes / 1024:.0f} KiB")
+        print(f"  store warm : {t_warm:.2f}s, {warm_bytes / 1024:.0f} KiB")
+        print(f"  credits left: {scheduler.remaining()}")
+
+
+if __name__ == "__main__":
+    main()
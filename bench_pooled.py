@@ -0,0 +1,46 @@
+import time
+
+import data_feed
+import one_hour_pro_max_ai as pro_max
+import pooled_model
+from features import add_indicators
+from stub_twelvedata import synthetic_series
+
+SYMBOL_COUNTS = [10, 30, 100]
+HISTORY = 300
+
+
+def make_frames(count):
+    symbols = [f"SYM{i:03d}/USD" for i in range(count)]
+    frames = {}
+    for symbol in symbols:
+        df = data_feed.parse_values(synthetic_series(symbol, HISTORY)).reset_index(drop=True)
+        frames[symbol] = pro_max.add_target(add_indicators(df, pro_max.EMA_ADJUST))
+    return symbols, frames
+
+
+def per_symbol(frames):
+    start = time.perf_counter()
+    accs = {symbol: pro_max.train_ensemble_model(df)[1] for symbol, df in frames.items()}
+    return time.perf_counter() - start, accs
+
+
+def pooled(symbols, frames):
+    start = time.perf_counter()
+    df = pooled_model.stack(frames, symbols)
+    feature_types = ['q'] * pooled_model.SYMBOL_INDEX + ['c']
+    model, accs, scaler = pooled_model.train(df, lambda: pro_max.make_ensemble(feature_types), scale=True)
+    fit = time.perf_counter() - start
+    start = time.perf_counter()
+    pooled_model.predict_proba(model, scaler, frames, symbols, row=-2)
+    return fit, time.perf_counter() - start, {symbols[int(code)]: acc for code, acc in accs.items()}
+
+
+if __name__ == "__main__":
+    print(f"{'symbols':>7} {'per-symbol fit':>15} {'pooled fit':>11} {'batched predict':>16} {'gate agreement':>15}")
+    for count in SYMBOL_COUNTS:
+        symbols, frames = make_frames(count)
+        separate, separate_accs = per_symbol(frames)
+        fit, predict, pooled_accs = pooled(symbols, frames)
+        agree = sum((separate_accs[s] > 0.7) == (pooled_accs.get(s, 0) > 0.7) for s in symbols)
+        print(f"{count:>7} {separate:>14.2f}s {fit:>10.2f}s {predict * 1000:>14.1f}ms {agree:>10}/{count}")
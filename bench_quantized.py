@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+
+CANDLES = [300, 20000]
+TIERS = [('one_hour', 'train_model'), ('one_hour_pro_max_ai', 'train_ensemble_model')]
+
+CHILD = """
+import json, resource, sys, time
+import pandas as pd
+import training
+from stub_twelvedata import synthetic_series
+module_name, fn_name, candles, quantize = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4] == '1'
+module = __import__(module_name)
+df = pd.DataFrame(synthetic_series('EUR/USD', candles)).astype({'open': float, 'high': float, 'low': float, 'close': float})
+df = module.add_features(df)
+training.QUANTIZE = quantize
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+result = getattr(module, fn_name)(df)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'fit_s': elapsed, 'peak_rss_mb': peak / 1024, 'rss_growth_mb': (peak - before) / 1024,
+                  'acc': float(result[1])}))
+"""
+
+
+def run(module, fn, candles, quantize):
+    out = subprocess.run([sys.executable, '-c', CHILD, module, fn, str(candles), '1' if quantize else '0'],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    for module, fn in TIERS:
+        for candles in CANDLES:
+            for quantize in (False, True):
+                r = run(module, fn, candles, quantize)
+                label = 'quantized' if quantize else 'float    '
+                print(f"{module:<20} {candles:>6} candles {label}: fit {r['fit_s']:6.2f}s, "
+                      f"peak RSS {r['peak_rss_mb']:7.1f} MB (+{r['rss_growth_mb']:6.1f} MB during fit), acc {r['acc']:.3f}")
@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import signal_history
+from bench_universe import make_universe
+
+TIERS = ['standard', 'pro', 'pro_plus', 'pro_max']
+HOUR = 3600
+
+
+def hour_rows(symbols, candle, rng):
+    # One refresh worth of rows: every tier for every symbol, about one in five skipped
+    rows = []
+    for tier in TIERS:
+        for symbol in symbols:
+            if rng.random() < 0.2:
+                rows.append((symbol, candle, tier, candle + 600.0, 'SKIP', None, None, None, None,
+                             f"Low accuracy ({rng.uniform(0.5, 0.7):.2f})"))
+                continue
+            prob = rng.random()
+            price = rng.uniform(0.5, 200)
+            detail = f"{price:.4f} / TP: {price + 0.002:.4f} / SL: {price - 0.0015:.4f}" if tier in ('pro_plus', 'pro_max') else None
+            rows.append((symbol, candle, tier, candle + 600.0, 'BUY' if prob > 0.5 else 'SELL', round(prob, 2),
+                         rng.choice(['Strong', 'Weak']), round(rng.uniform(20, 80), 1), round(price * 100, 2), detail))
+    return rows
+
+
+def per_call(fn, calls):
+    times = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, max(times) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Signal history store: batched hourly writes and range queries")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--hours', type=int, default=24 * 365)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'signals.db')
+    symbols = make_universe(args.symbols)
+    rng = random.Random(42)
+    end = int(time.time()) // HOUR * HOUR
+    start_candle = end - args.hours * HOUR
+
+    # Fill a day per transaction, then time single refresh-sized writes as the engine makes them
+    start = time.perf_counter()
+    held_back = end - 5 * HOUR
+    for day in range(start_candle, held_back, 24 * HOUR):
+        batch = []
+        for candle in range(day, min(day + 24 * HOUR, held_back), HOUR):
+            batch += hour_rows(symbols, candle, rng)
+        signal_history.record(batch, path)
+    fill = time.perf_counter() - start
+    writes = [(hour_rows(symbols, candle, rng), path) for candle in range(held_back, end, HOUR)]
+    write_ms, write_max = per_call(signal_history.record, writes)
+
+    size = sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+    rows = args.symbols * len(TIERS) * args.hours
+    print(f"{args.symbols} symbols x {len(TIERS)} tiers x {args.hours} hours = {rows:,} rows in {fill:.0f}s, "
+          f"{size / 2 ** 20:.0f} MB ({size / rows:.0f} bytes/row)")
+    print(f"  batched refresh write ({args.symbols * len(TIERS)} rows): {write_ms:6.1f} ms median, {write_max:6.1f} ms max")
+
+    picks = [rng.choice(symbols) for _ in range(args.queries)]
+    hours = [start_candle + rng.randrange(args.hours) * HOUR for _ in range(args.queries)]
+    for label, fn, calls in (
+            ("last 50 signals, one tier", signal_history.last_signals, [(s, 50, 'pro_max', path) for s in picks]),
+            ("last 50 signals, all tiers", signal_history.last_signals, [(s, 50, None, path) for s in picks]),
+            ("all tiers at hour T", signal_history.at_hour, [(h, None, path) for h in hours]),
+            ("one tier at hour T", signal_history.at_hour, [(h, 'pro', path) for h in hours])):
+        median, worst = per_call(fn, calls)
+        print(f"  {label:<28} {median:6.2f} ms median, {worst:6.2f} ms max")
@@ -0,0 +1,59 @@
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import features
+import streaming_indicators
+from bench_features import make_frames
+
+
+def check_parity(n_candles=3000):
+    df = make_frames(1, n_candles)['SYM0/USD']
+    ohlc = df[features.OHLC].to_numpy()
+    for adjust in (False, True):
+        batch = features.add_indicators(df.copy(), adjust)[features.FEATURES].to_numpy()
+        state = streaming_indicators.warm_states(ohlc[np.newaxis, :n_candles // 2], adjust)[0]
+        rows = [state.update(*candle[1:]) for candle in ohlc[n_candles // 2:]]
+        np.testing.assert_array_equal(rows, batch[n_candles // 2:])
+
+
+def per_candle_latency(n_candles, updates=200):
+    ohlc = make_frames(1, n_candles + updates)['SYM0/USD'][features.OHLC].to_numpy()
+    state = streaming_indicators.warm_states(ohlc[np.newaxis, :n_candles])[0]
+    start = time.perf_counter()
+    for candle in ohlc[n_candles:]:
+        state.update(*candle[1:])
+    return (time.perf_counter() - start) / updates
+
+
+def refresh(n_symbols, n_candles, refreshes=5):
+    # One new candle per refresh, as the hourly precompute sees it
+    frames = make_frames(n_symbols, n_candles + refreshes)
+    for df in frames.values():
+        # Parsed timestamps, as candle_store.load_candles returns them
+        df['datetime'] = pd.to_datetime(df['datetime'])
+    streaming_indicators.STATE_DIR = tempfile.mkdtemp()
+    streaming_indicators._streams.clear()
+    streaming_indicators.stream_indicators_many({s: df.iloc[:n_candles].copy() for s, df in frames.items()})
+    t_stream = t_batch = 0.0
+    for k in range(1, refreshes + 1):
+        window = {s: df.iloc[k:n_candles + k] for s, df in frames.items()}
+        start = time.perf_counter()
+        streaming_indicators.stream_indicators_many({s: df.copy() for s, df in window.items()})
+        t_stream += time.perf_counter() - start
+        start = time.perf_counter()
+        features.add_indicators_many({s: df.copy() for s, df in window.items()})
+        t_batch += time.perf_counter() - start
+    return t_stream / refreshes, t_batch / refreshes
+
+
+if __name__ == "__main__":
+    check_parity()
+    print("parity OK (warm-up then streamed == add_indicators, adjust=False and adjust=True)")
+    for n in (300, 5000, 50000):
+        print(f"history {n:>6}: {per_candle_latency(n) * 1e6:6.1f} us per streamed candle")
+    for n in (300, 3000, 20000):
+        stream, batch = refresh(200, n)
+        print(f"200 symbols x {n:>5} candles, one new candle: streamed {stream:.3f}s, batch {batch:.3f}s")
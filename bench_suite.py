@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+from bench_universe import make_universe
+
+TIERS = ['standard', 'pro', 'pro_plus', 'pro_max']
+PACKAGES = ['numpy', 'pandas', 'scikit-learn', 'xgboost', 'lightgbm', 'catboost']
+
+
+def sample(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summary(times):
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'samples': len(times)}
+
+
+def environment():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'packages': versions}
+
+
+def train_fn(module):
+    return getattr(module, 'train_ensemble_model', None) or module.train_model
+
+
+def predict_call(module, symbol, df, model, scaler):
+    # The tier's own predict step, fed the way its process_symbol feeds it
+    import model_registry
+    if module.TIER == 'pro_max':
+        return lambda: module.predict(df, model, scaler, symbol)
+    served = model_registry.serving_model(module.TIER, symbol, model) or model
+    if hasattr(module, 'predict_signal'):
+        return lambda: module.predict_signal(symbol, df, served)
+    return lambda: module.predict(df, served, symbol)
+
+
+def bench_stages(modules, symbols, args):
+    import data_feed
+    import model_registry
+    from stub_twelvedata import synthetic_series
+
+    raw = {symbol: data_feed.parse_values(synthetic_series(symbol, args.history, args.seed,
+                                                           regime_switch=args.regime_switch)).reset_index(drop=True)
+           for symbol in symbols}
+    results = {}
+    for module in modules:
+        features, train, predict = [], [], []
+        for symbol in symbols:
+            features += sample(lambda: module.add_features(raw[symbol].copy()), args.repeats)
+            df = module.add_features(raw[symbol].copy())
+            start = time.perf_counter()
+            result = tuple(train_fn(module)(df))
+            train.append(time.perf_counter() - start)
+            model, acc, scaler = (result + (None,))[:3]
+            if model is None:
+                continue
+            # Registered so predict serves it as the tier would (compiled twin, SHAP cache)
+            model_registry.get_model(module.TIER, symbol, df, lambda _: result, ema_adjust=module.EMA_ADJUST)
+            call = predict_call(module, symbol, df, model, scaler)
+            call()
+            predict += sample(call, args.repeats * 10)
+        results[f"stage.{module.TIER}.add_features"] = summary(features)
+        results[f"stage.{module.TIER}.{train_fn(module).__name__}"] = summary(train)
+        if predict:
+            results[f"stage.{module.TIER}.predict"] = summary(predict)
+    return results
+
+
+def bench_end_to_end(modules, args, tmp):
+    import candle_store
+    import profiling
+
+    results, breakdowns = {}, {}
+    for module in modules:
+        # Own candle store per tier, so every tier's cold run fetches the full history
+        candle_store.DB_PATH = os.path.join(tmp, f"{module.TIER}.db")
+        results[f"end_to_end.{module.TIER}.cold"] = summary(sample(module.run_signal_engine, 1))
+        results[f"end_to_end.{module.TIER}.warm"] = summary(sample(module.run_signal_engine, args.repeats))
+        latest, _ = profiling.breakdown(profiling.spans(), module.TIER, last_runs=1)
+        breakdowns[module.TIER] = latest.to_dict('index')
+    return results, breakdowns
+
+
+def run(args):
+    tmp = tempfile.mkdtemp()
+    symbols = make_universe(args.symbols)
+    os.environ['SYMBOL_UNIVERSE_FILE'] = os.path.join(tmp, 'universe.json')
+    with open(os.environ['SYMBOL_UNIVERSE_FILE'], 'w') as f:
+        json.dump({'groups': {'bench': symbols}, 'tiers': {tier: ['bench'] for tier in args.tiers}}, f)
+    os.environ['CANDLE_DB_PATH'] = os.path.join(tmp, 'candles.db')
+    os.environ['MODEL_REGISTRY_DIR'] = os.path.join(tmp, 'models')
+    os.environ['CPU_CALIBRATION_PATH'] = os.path.join(tmp, 'cpu_budget.json')
+    # Budget for the tier keys to fetch the universe every run without waiting out the minute
+    os.environ['TWELVEDATA_CREDITS_PER_MINUTE'] = str(1000 * args.symbols)
+    os.environ['TWELVEDATA_CREDITS_PER_DAY'] = str(100000 * args.symbols)
+
+    import engine
+    import model_registry
+    import stub_twelvedata
+    from fetch_client import FetchClient, set_client
+
+    modules = [engine.load_profile(tier).module for tier in args.tiers]
+    for module in modules:
+        module.HISTORY_SIZE = args.history
+    report = {'config': {k: getattr(args, k) for k in ('symbols', 'history', 'latency', 'regime_switch', 'seed',
+                                                       'repeats', 'tiers')},
+              'environment': environment(), 'started_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': {}}
+
+    if not args.no_stages:
+        model_registry.REGISTRY_DIR = os.path.join(tmp, 'stage_models')
+        report['results'].update(bench_stages(modules, symbols, args))
+    if not args.no_end_to_end:
+        model_registry.REGISTRY_DIR = os.environ['MODEL_REGISTRY_DIR']
+        history = max(stub_twelvedata.HISTORY, args.history)
+        with stub_twelvedata.StubTwelveData(history=history, latency=args.latency, seed=args.seed,
+                                            regime_switch=args.regime_switch) as stub:
+            set_client(FetchClient(stub.url))
+            results, report['breakdown'] = bench_end_to_end(modules, args, tmp)
+            report['results'].update(results)
+            report['requests'] = stub.request_count
+    return report
+
+
+def compare(base_path, new_path, threshold, min_delta):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if base.get('config') != new.get('config'):
+        print(f"[WARN] Configs differ: {base.get('config')} vs {new.get('config')}")
+    regressions = 0
+    print(f"{'benchmark':<42} {'base':>10} {'new':>10} {'change':>8}")
+    for name in sorted(set(base['results']) & set(new['results'])):
+        old_s, new_s = base['results'][name]['median_s'], new['results'][name]['median_s']
+        change = new_s / old_s - 1 if old_s else 0.0
+        flag = ''
+        if change > threshold and new_s - old_s > min_delta:
+            flag, regressions = 'REGRESSION', regressions + 1
+        elif change < -threshold and old_s - new_s > min_delta:
+            flag = 'faster'
+        print(f"{name:<42} {old_s * 1000:>8.1f}ms {new_s * 1000:>8.1f}ms {change:>+7.1%} {flag}")
+    for name in sorted(set(base['results']) ^ set(new['results'])):
+        print(f"{name:<42} only in {'base' if name in base['results'] else 'new'}")
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end and per-stage benchmarks against the stub TwelveData server")
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--history', type=int, default=300, help="candles fetched per symbol")
+    parser.add_argument('--latency', type=float, default=0.05, help="injected stub latency per request, seconds")
+    parser.add_argument('--regime-switch', type=float, default=0.02, help="per-candle regime switch probability")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--tiers', nargs='*', default=TIERS, choices=TIERS)
+    parser.add_argument('--no-stages', action='store_true')
+    parser.add_argument('--no-end-to-end', action='store_true')
+    parser.add_argument('--out', default=os.path.join('data', 'bench', f"{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two result files instead")
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative slowdown flagged as a regression")
+    parser.add_argument('--min-delta', type=float, default=0.001, help="ignore changes smaller than this, seconds")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold, args.min_delta))
+    report = run(args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n{'benchmark':<42} {'median':>10} {'min':>10} {'samples':>8}")
+    for name, r in report['results'].items():
+        print(f"{name:<42} {r['median_s'] * 1000:>8.1f}ms {r['min_s'] * 1000:>8.1f}ms {r['samples']:>8}")
+    print(f"Results written to {args.out}")
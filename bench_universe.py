@@ -0,0 +1,66 @@
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+CURRENCIES = ['USD', 'EUR', 'JPY', 'GBP', 'AUD', 'CAD', 'CHF', 'NZD', 'SEK', 'NOK', 'DKK', 'PLN', 'CZK',
+              'HUF', 'TRY', 'ZAR', 'MXN', 'SGD', 'HKD', 'CNH', 'INR', 'XAU', 'XAG', 'BTC', 'ETH']
+
+
+def make_universe(count):
+    return [f"{a}/{b}" for a, b in itertools.permutations(CURRENCIES, 2)][:count]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched fetching and sharding for a large symbol universe")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.1, help="injected stub latency per request, seconds")
+    parser.add_argument('--shards', type=int, nargs='*', default=[0, 100, 50])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    # A paid-plan sized key budget, so the tier keys can fetch the whole universe in one minute
+    os.environ['TWELVEDATA_CREDITS_PER_MINUTE'] = str(10 * args.symbols)
+    os.environ['TWELVEDATA_CREDITS_PER_DAY'] = str(1000 * args.symbols)
+    symbols = make_universe(args.symbols)
+    os.environ['SYMBOL_UNIVERSE_FILE'] = os.path.join(tmp, 'universe.json')
+    with open(os.environ['SYMBOL_UNIVERSE_FILE'], 'w') as f:
+        json.dump({'groups': {'all': symbols}, 'tiers': {'standard': ['all']}}, f)
+    import candle_store
+    import data_feed
+    import engine
+    from api_scheduler import ApiKeyScheduler
+    from fetch_client import FetchClient, set_client
+    from stub_twelvedata import StubTwelveData
+
+    with StubTwelveData(history=400, latency=args.latency) as stub:
+        set_client(FetchClient(stub.url))
+        print(f"{len(symbols)} symbols, {args.latency * 1000:.0f} ms per request")
+        for label, batch_size in (('per-symbol', 1), ('batched', None)):
+            candle_store.DB_PATH = os.path.join(tmp, f"{label}.db")
+            scheduler = ApiKeyScheduler([f"bench-{label}"])
+            for run in ('cold', 'warm'):
+                requests = stub.request_count
+                start = time.perf_counter()
+                frames = data_feed.fetch_many(symbols, scheduler, history=300, batch_size=batch_size)
+                wall = time.perf_counter() - start
+                missing = sum(df.empty for df in frames.values())
+                print(f"  {label:>10} {run}: {stub.request_count - requests:>4} requests, {wall:6.2f}s"
+                      + (f", {missing} symbols missing" if missing else ""))
+
+        # Shard memory: featurize the stored universe shard by shard (warm fetches)
+        profiles = [engine.load_profile('standard')]
+        for size in args.shards:
+            tracemalloc.start()
+            start = time.perf_counter()
+            for shard in engine.shard_symbols(profiles, size):
+                variants = engine.fetch_and_featurize(profiles, shard)
+                del variants
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  shard size {size or len(symbols):>4}: fetch + featurize {wall:6.2f}s, "
+                  f"peak traced memory {peak / 2 ** 20:6.1f} MB")
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+# === CONFIG ===
+DB_PATH = os.environ.get('CANDLE_DB_PATH', os.path.join('data', 'candles.db'))
+OHLC = ['open', 'high', 'low', 'close']
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect(db_path=None):
+    path = db_path or DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    with _init_lock:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    datetime TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL,
+                    PRIMARY KEY (symbol, interval, datetime)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            _initialized.add(path)
+    return conn
+
+
+def last_timestamp(symbol, interval, db_path=None):
+    conn = _connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT MAX(datetime) FROM candles WHERE symbol = ? AND interval = ?",
+            (symbol, interval)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def count_candles(symbol, interval, db_path=None):
+    conn = _connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM candles WHERE symbol = ? AND interval = ?",
+            (symbol, interval)).fetchone()
+    finally:
+        conn.close()
+    return row[0]
+
+
+def append_candles(symbol, interval, df, db_path=None):
+    if df.empty:
+        return 0
+    stamps = pd.to_datetime(df['datetime']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    rows = list(zip([symbol] * len(df), [interval] * len(df), stamps,
+                    *(df[col].astype(float) for col in OHLC)))
+    conn = _connect(db_path)
+    try:
+        # The newest stored candle may still have been forming, so replace on conflict
+        conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def load_candles(symbol, interval, limit=None, db_path=None):
+    conn = _connect(db_path)
+    try:
+        query = ("SELECT datetime, open, high, low, close FROM candles "
+                 "WHERE symbol = ? AND interval = ? ORDER BY datetime DESC")
+        params = [symbol, interval]
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    df = pd.DataFrame(rows[::-1], columns=['datetime'] + OHLC)
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    return df
@@ -0,0 +1,244 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# Only numpy is imported here, so a serving process can joblib.load these objects without
+# xgboost, lightgbm, catboost or scikit-learn; exporting still needs the fitted library models.
+
+# === CONFIG ===
+# Serve per-symbol models through the NumPy trees below instead of the boosting libraries
+ENABLED = os.environ.get('COMPILED_INFERENCE', '1') != '0'
+
+
+def sigmoid(margin):
+    return 1.0 / (1.0 + np.exp(-margin))
+
+
+class Forest:
+    # Binary trees flattened into shared node arrays. Leaves point at themselves, so every
+    # (row, tree) pair walks `depth` steps in lockstep and ends on its leaf. XGBoost sends
+    # x < threshold left, LightGBM x <= threshold; NaN follows default_left.
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, depth,
+                 inclusive, dtype, bias=0.0, scale=1.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.inclusive = inclusive
+        self.dtype = dtype
+        self.bias = bias
+        self.scale = scale
+
+    def margin(self, X):
+        X = np.asarray(X, dtype=self.dtype)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x <= threshold if self.inclusive else x < threshold
+            go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1) + self.bias
+
+    def proba(self, X):
+        return sigmoid(self.scale * self.margin(X))
+
+
+class ObliviousForest:
+    # CatBoost symmetric trees: one (feature, border) per level, x > border sets that level's
+    # bit of the leaf index. Shallower trees are padded with never-true +inf borders.
+    def __init__(self, feature, border, value, scale=1.0, bias=0.0):
+        self.feature = feature
+        self.border = border
+        self.value = value
+        self.scale = scale
+        self.bias = bias
+
+    def margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        bits = X[:, self.feature] > self.border
+        leaf = (bits << np.arange(self.feature.shape[1])).sum(axis=2)
+        return self.scale * self.value[np.arange(len(self.value)), leaf].sum(axis=1) + self.bias
+
+    def proba(self, X):
+        return sigmoid(self.margin(X))
+
+
+class Binned:
+    # training.BinEdges codes in front of a forest fitted on them
+    def __init__(self, edges, model):
+        self.edges = edges
+        self.model = model
+
+    def proba(self, X):
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.edges):
+            codes[:, j] = np.searchsorted(edges, X[:, j], side='right')
+        return self.model.proba(codes)
+
+
+class Average:
+    # Soft vote over ensemble members, or the fold average of FINAL_FIT='average'
+    def __init__(self, models, weights=None):
+        self.models = models
+        self.weights = weights
+
+    def proba(self, X):
+        return np.average([m.proba(X) for m in self.models], axis=0, weights=self.weights)
+
+
+class CompiledModel:
+    # predict_proba / predict over raw feature rows, standardizing first when the tier scales
+    def __init__(self, model, classes, mean=None, scale=None):
+        self.model = model
+        self.classes_ = classes
+        self.mean = mean
+        self.scale = scale
+
+    def predict_proba(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        p = self.model.proba(X)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def flatten(trees, inclusive, dtype, bias=0.0, scale=1.0):
+    # trees: [(feature, threshold, left, right, default_left, value)] per tree with local
+    # node ids, children -1 on leaves and root 0; returns one Forest over all of them
+    parts, roots, offset, depth = [], [], 0, 0
+    for feature, threshold, left, right, default_left, value in trees:
+        left, right = np.asarray(left), np.asarray(right)
+        leaf = left < 0
+        ids = np.arange(len(left))
+        parts.append((np.where(leaf, 0, feature), np.where(leaf, 0, threshold),
+                      np.where(leaf, ids, left) + offset, np.where(leaf, ids, right) + offset,
+                      np.asarray(default_left, dtype=bool), np.where(leaf, value, 0)))
+        roots.append(offset)
+        offset += len(left)
+        levels = {0: 0}
+        for node in range(len(left)):
+            for child in (left[node], right[node]):
+                if child >= 0:
+                    levels[child] = levels[node] + 1
+        depth = max(depth, max(levels.values()))
+    columns = [np.concatenate(c) for c in zip(*parts)]
+    return Forest(columns[0].astype(np.intp), columns[1].astype(dtype), columns[2].astype(np.intp),
+                  columns[3].astype(np.intp), columns[4], columns[5].astype(np.float64),
+                  np.array(roots, dtype=np.intp), depth, inclusive, dtype, bias, scale)
+
+
+def export_xgboost(model, rounds):
+    learner = json.loads(model.get_booster().save_raw(raw_format='json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic' or learner['gradient_booster']['name'] != 'gbtree':
+        raise NotImplementedError(f"cannot compile XGBoost {learner['objective']['name']}")
+    booster = learner['gradient_booster']['model']
+    trees = booster['trees'][:booster['iteration_indptr'][rounds]]
+    if any(any(t['split_type']) for t in trees):
+        raise NotImplementedError("cannot compile XGBoost categorical splits")
+    # base_score is stored as a probability; the margin starts from its log-odds
+    base = float(learner['learner_model_param']['base_score'].strip('[]'))
+    return flatten([(t['split_indices'], t['split_conditions'], t['left_children'], t['right_children'],
+                     t['default_left'], t['split_conditions']) for t in trees],
+                   inclusive=False, dtype=np.float32, bias=np.log(base / (1 - base)))
+
+
+def export_lightgbm(model, rounds):
+    dump = model.booster_.dump_model()
+    objective = dump['objective'].split()
+    if objective[0] != 'binary' or dump['num_tree_per_iteration'] != 1:
+        raise NotImplementedError(f"cannot compile LightGBM {dump['objective']}")
+    trees = []
+    for info in dump['tree_info'][:rounds]:
+        nodes = []
+        stack = [(info['tree_structure'], None, None)]
+        while stack:
+            node, parent, side = stack.pop()
+            index = len(nodes)
+            if parent is not None:
+                nodes[parent][side] = index
+            if 'leaf_value' in node:
+                nodes.append([0, 0.0, -1, -1, False, node['leaf_value']])
+                continue
+            if node['decision_type'] != '<=' or node['missing_type'] == 'Zero':
+                raise NotImplementedError("cannot compile LightGBM categorical or zero-as-missing splits")
+            # Without a NaN bin LightGBM predicts NaN as 0.0
+            default_left = node['default_left'] if node['missing_type'] == 'NaN' else 0.0 <= node['threshold']
+            nodes.append([node['split_feature'], node['threshold'], -1, -1, default_left, 0.0])
+            stack += [(node['right_child'], index, 3), (node['left_child'], index, 2)]
+        trees.append(tuple(zip(*nodes)))
+    sigmoid_scale = float(objective[1].split(':')[1]) if len(objective) > 1 else 1.0
+    return flatten(trees, inclusive=True, dtype=np.float64, scale=sigmoid_scale)
+
+
+def export_catboost(model):
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        model.save_model(path, format='json')
+        with open(path) as f:
+            dump = json.load(f)
+    finally:
+        os.remove(path)
+    if dump['features_info'].get('categorical_features') or 'oblivious_trees' not in dump:
+        raise NotImplementedError("cannot compile CatBoost categorical or non-symmetric trees")
+    columns = {f['feature_index']: f['flat_feature_index'] for f in dump['features_info']['float_features']}
+    trees = dump['oblivious_trees']
+    depth = max(len(t['splits']) for t in trees)
+    feature = np.zeros((len(trees), depth), dtype=np.intp)
+    border = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    value = np.zeros((len(trees), 2 ** depth))
+    for i, tree in enumerate(trees):
+        if len(tree['leaf_values']) != 2 ** len(tree['splits']):
+            raise NotImplementedError("cannot compile multi-dimensional CatBoost leaves")
+        for level, split in enumerate(tree['splits']):
+            feature[i, level] = columns[split['float_feature_index']]
+            border[i, level] = split['border']
+        value[i, :len(tree['leaf_values'])] = tree['leaf_values']
+    scale, bias = dump['scale_and_bias']
+    return ObliviousForest(feature, border, value, scale, bias[0])
+
+
+def export(model):
+    import training
+    name = type(model).__name__
+    if name == 'QuantizedModel':
+        return Binned(model.edges.edges, export(model.model))
+    if name == 'FoldAverage':
+        return Average([export(m) for m in model.models])
+    if name == 'VotingClassifier':
+        if model.voting != 'soft' or any(est == 'drop' for _, est in model.estimators):
+            raise NotImplementedError("cannot compile a hard or partial VotingClassifier")
+        return Average([export(m) for m in model.estimators_], model.weights)
+    if name == 'XGBClassifier':
+        return export_xgboost(model, training.boosting_rounds(model))
+    if name == 'LGBMClassifier':
+        return export_lightgbm(model, training.boosting_rounds(model))
+    if name == 'CatBoostClassifier':
+        return export_catboost(model)
+    raise NotImplementedError(f"cannot compile a {name}")
+
+
+def compile_model(model, scaler=None):
+    # CompiledModel for a binary tier model and its optional StandardScaler; raises
+    # NotImplementedError for anything these arrays cannot reproduce
+    if len(model.classes_) != 2:
+        raise NotImplementedError("only binary classifiers compile")
+    mean = scale = None
+    if scaler is not None:
+        if type(scaler).__name__ != 'StandardScaler':
+            raise NotImplementedError(f"cannot compile a {type(scaler).__name__}")
+        mean, scale = scaler.mean_, scaler.scale_
+    return CompiledModel(export(model), np.asarray(model.classes_), mean, scale)
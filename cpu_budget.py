@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+# === CONFIG ===
+CORE_BUDGET = int(os.environ.get('CPU_BUDGET', 0)) or os.cpu_count() or 1
+CALIBRATION_PATH = os.environ.get('CPU_CALIBRATION_PATH', os.path.join('data', 'cpu_budget.json'))
+
+_local = threading.local()
+_usage = {}
+
+
+def model_threads():
+    # n_jobs / nthread / thread_count for a booster fitted in the current worker
+    return getattr(_local, 'threads', None) or CORE_BUDGET
+
+
+def load_calibration():
+    try:
+        with open(CALIBRATION_PATH) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def plan(n_jobs, backend='serial', workers=None, key=None):
+    if backend == 'serial' or n_jobs <= 1:
+        return 1, CORE_BUDGET
+    if workers is None:
+        workers = load_calibration().get(f"{key}:{backend}") if key else None
+    workers = max(1, min(workers or CORE_BUDGET, n_jobs, CORE_BUDGET))
+    return workers, max(1, CORE_BUDGET // workers)
+
+
+@contextmanager
+def limit_threads(threads, native=True):
+    # Caps the booster thread count (and, with native=True, OpenMP/BLAS pools) for one job.
+    # threadpoolctl changes process-wide state, so nested per-thread limits pass native=False
+    previous = getattr(_local, 'threads', None)
+    _local.threads = threads
+    try:
+        if native:
+            with threadpool_limits(limits=threads):
+                yield
+        else:
+            yield
+    finally:
+        _local.threads = previous
+
+
+def record_usage(key, backend, workers, threads, wall, cpu):
+    _usage[key] = {
+        'backend': backend,
+        'workers': workers,
+        'threads_per_model': threads,
+        'core_budget': CORE_BUDGET,
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'effective_cores': round(cpu / wall, 2) if wall else 0.0,
+        'utilization': round(cpu / (wall * CORE_BUDGET), 2) if wall else 0.0,
+    }
+    return _usage[key]
+
+
+def last_usage(key=None):
+    return _usage.get(key) if key else dict(_usage)
+
+
+def _train_job(symbol, train_fn, df):
+    train_fn(df)
+    return symbol
+
+
+def calibrate(key, train_fn, frames, backend='processes', candidates=None):
+    import execution
+    jobs = [(symbol, train_fn, df) for symbol, df in frames.items()]
+    candidates = candidates or sorted({w for w in (1, 2, 4, 8, 16, CORE_BUDGET) if w <= min(CORE_BUDGET, len(jobs))})
+    timings = {}
+    for workers in candidates:
+        start = time.perf_counter()
+        execution.run_per_symbol(_train_job, jobs, backend, workers)
+        timings[workers] = time.perf_counter() - start
+    best = min(timings, key=timings.get)
+    calibration = load_calibration()
+    calibration[f"{key}:{backend}"] = best
+    directory = os.path.dirname(CALIBRATION_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(CALIBRATION_PATH, 'w') as fh:
+        json.dump(calibration, fh, indent=2)
+    return best, timings
+
+
+if __name__ == "__main__":
+    import argparse
+    import importlib
+    import pandas as pd
+    from stub_twelvedata import synthetic_series
+
+    parser = argparse.ArgumentParser(description="Calibrate symbol workers vs booster threads")
+    parser.add_argument('modules', nargs='*', default=['one_hour', 'one_hour_pro', 'one_hour_pro_plus', 'one_hour_pro_max_ai'])
+    parser.add_argument('--backend', default='processes', choices=['threads', 'processes'])
+    args = parser.parse_args()
+    for name in args.modules:
+        module = importlib.import_module(name)
+        train_fn = getattr(module, 'train_ensemble_model', None) or module.train_model
+        frames = {}
+        for symbol in module.SYMBOLS:
+            df = pd.DataFrame(synthetic_series(symbol, module.HISTORY_SIZE)).astype(
+                {'open': float, 'high': float, 'low': float, 'close': float})
+            frames[symbol] = module.add_features(df)
+        best, timings = calibrate(module.TIER, train_fn, frames, args.backend)
+        summary = ', '.join(f"{w} workers: {t:.2f}s" for w, t in timings.items())
+        print(f"{module.TIER}: best {best} workers x {max(1, CORE_BUDGET // best)} threads ({summary})")
@@ -1,20 +1,32 @@
+import importlib
+import os
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import streamlit.components.v1 as components
 
-# === IMPORTS ===
-from one_hour import run_signal_engine as run_one_hour
-from one_hour_pro import run_signal_engine as run_one_hour_pro
-from one_hour_pro_plus import run_signal_engine as run_one_hour_pro_plus
-from one_hour_pro_max_ai import run_signal_engine as run_one_hour_pro_max
+import cpu_budget
+import profiling
+import signal_history
+from signal_cache import CACHE, candle_window
+from precompute_worker import TIERS as ENGINE_TIERS, get_status, load_published, start_in_process, timings
+
+# === ENGINES ===
+# Imported on first refresh only: each engine pulls in xgboost/lightgbm/catboost/sklearn.
+# importlib caches them in sys.modules, so later reruns and sessions reuse the loaded module
+def run_engine(module_name):
+    return importlib.import_module(module_name).run_signal_engine()
 
 # === CONFIG ===
 st.set_page_config(page_title="Forex Signal Dashboard", layout="wide")
+# The scheduler shares the web process, and with it the published signals; its first run
+# waits PRECOMPUTE_START_DELAY seconds so startup does not import the ML stack
+if os.environ.get('PRECOMPUTE_IN_PROCESS', '1') == '1':
+    start_in_process()
 
 # === JavaScript Countdown Timer ===
 now = datetime.utcnow()
-next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+candle_hour, next_hour = candle_window(now)
 diff = (next_hour - now).total_seconds()
 
 html_code = f"""
@@ -46,58 +58,58 @@ st.caption("✅ Fully optimized for Desktop and Mobile screens.")
 # === TABS ===
 tab1, tab2, tab3, tab4 = st.tabs(["📘 1 Hour", "📗 Pro", "📙 Pro+", "🚀 Pro Max with AI"])
 
-with tab1:
-    st.subheader("📘 1 Hour Model (Standard)")
-    if st.button("🔄 Refresh 1H Model"):
-        with st.spinner("🔄 Running 1 Hour model..."):
-            st.session_state['df1'] = run_one_hour()
-            st.session_state['last_refreshed_1'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    df1 = st.session_state.get('df1', pd.DataFrame())
-    if not df1.empty:
-        st.success(f"✅ {len(df1)} signals generated.")
-        st.dataframe(df1, use_container_width=True)
-    else:
-        st.warning("⚠️ No signals generated or model skipped.")
-    st.markdown(f"🕒 **Last Refreshed (1H):** `{st.session_state.get('last_refreshed_1', 'Not yet refreshed')}`")
-
-with tab2:
-    st.subheader("📗 1 Hour Model (Pro)")
-    if st.button("🔄 Refresh Pro Model"):
-        with st.spinner("🔄 Running 1 Hour Pro model..."):
-            st.session_state['df2'] = run_one_hour_pro()
-            st.session_state['last_refreshed_2'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    df2 = st.session_state.get('df2', pd.DataFrame())
-    if not df2.empty:
-        st.success(f"✅ {len(df2)} signals generated.")
-        st.dataframe(df2, use_container_width=True)
-    else:
-        st.warning("⚠️ No signals generated or model skipped.")
-    st.markdown(f"🕒 **Last Refreshed (Pro):** `{st.session_state.get('last_refreshed_2', 'Not yet refreshed')}`")
+TIERS = [
+    (tab1, "📘 1 Hour Model (Standard)", "🔄 Refresh 1H Model", "🔄 Running 1 Hour model...", "1H", 'one_hour'),
+    (tab2, "📗 1 Hour Model (Pro)", "🔄 Refresh Pro Model", "🔄 Running 1 Hour Pro model...", "Pro", 'one_hour_pro'),
+    (tab3, "📙 1 Hour Model (Pro+)", "🔄 Refresh Pro+ Model", "🔄 Running 1 Hour Pro+ model...", "Pro+", 'one_hour_pro_plus'),
+    (tab4, "🚀 1 Hour Model (Pro Max Ensemble Voting)", "🔄 Refresh Pro Max AI", "🔄 Running 1 Hour Pro Max model...", "Pro Max", 'one_hour_pro_max_ai'),
+]
 
-with tab3:
-    st.subheader("📙 1 Hour Model (Pro+)")
-    if st.button("🔄 Refresh Pro+ Model"):
-        with st.spinner("🔄 Running 1 Hour Pro+ model..."):
-            st.session_state['df3'] = run_one_hour_pro_plus()
-            st.session_state['last_refreshed_3'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    df3 = st.session_state.get('df3', pd.DataFrame())
-    if not df3.empty:
-        st.success(f"✅ {len(df3)} signals generated.")
-        st.dataframe(df3, use_container_width=True)
-    else:
-        st.warning("⚠️ No signals generated or model skipped.")
-    st.markdown(f"🕒 **Last Refreshed (Pro+):** `{st.session_state.get('last_refreshed_3', 'Not yet refreshed')}`")
+def published_or_run(name, module_name):
+    published = load_published(name, candle_hour)
+    return published['value'] if published else run_engine(module_name)
 
-with tab4:
-    st.subheader("🚀 1 Hour Model (Pro Max Ensemble Voting)")
-    if st.button("🔄 Refresh Pro Max AI"):
-        with st.spinner("🔄 Running 1 Hour Pro Max model..."):
-            st.session_state['df4'] = run_one_hour_pro_max()
-            st.session_state['last_refreshed_4'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    df4 = st.session_state.get('df4', pd.DataFrame())
-    if not df4.empty:
-        st.success(f"✅ {len(df4)} signals generated.")
-        st.dataframe(df4, use_container_width=True)
-    else:
-        st.warning("⚠️ No signals generated or model skipped.")
-    st.markdown(f"🕒 **Last Refreshed (Pro Max):** `{st.session_state.get('last_refreshed_4', 'Not yet refreshed')}`")
+status = get_status()
+for tab, title, button, spinner, name, module_name in TIERS:
+    with tab:
+        st.subheader(title)
+        # Results are shared by every session until the current candle closes
+        key = (name, candle_hour)
+        if st.button(button):
+            with st.spinner(spinner):
+                CACHE.get_or_compute(key, lambda: published_or_run(name, module_name), expires_at=next_hour)
+        entry = CACHE.peek(key) or load_published(name, candle_hour)
+        df = entry['value'] if entry else pd.DataFrame()
+        if not df.empty:
+            st.success(f"✅ {len(df)} signals generated.")
+            st.dataframe(df, use_container_width=True)
+            if 'Top Features' in df:
+                st.caption("Top Features: the three largest SHAP drivers of each signal; ▲ pushes towards BUY, ▼ towards SELL.")
+        else:
+            st.warning("⚠️ No signals generated or model skipped.")
+        last_refreshed = entry['computed_at'].strftime('%Y-%m-%d %H:%M:%S') if entry else 'Not yet refreshed'
+        st.markdown(f"🕒 **Last Refreshed ({name}):** `{last_refreshed}`")
+        if name in status:
+            st.caption(f"Background refresh: {status[name].get('state')} (attempt {status[name].get('attempt')})")
+        with st.expander("⏱️ Performance", expanded=False):
+            # This process's last run of the tier, else the one the precompute worker reported
+            usage = cpu_budget.last_usage(ENGINE_TIERS[name]) or status.get(name, {}).get('cpu')
+            if usage:
+                st.caption(f"Core use: {usage['effective_cores']} effective of {usage['core_budget']} cores "
+                           f"({usage['utilization']:.0%}), {usage['workers']} {usage['backend']} worker(s) x "
+                           f"{usage['threads_per_model']} thread(s) per model")
+            latest, spread = profiling.breakdown(timings(), ENGINE_TIERS[name])
+            if latest.empty:
+                st.info("No stage timings recorded yet.")
+            else:
+                st.markdown("**Latest refresh** (seconds summed over symbols; nested stages overlap)")
+                st.dataframe(latest, use_container_width=True)
+                st.markdown(f"**Wall time per refresh over the last {int(spread['runs'].max())} runs**")
+                st.dataframe(spread, use_container_width=True)
+        with st.expander("📜 Signal history", expanded=False):
+            if df.empty:
+                st.info("Refresh the model to pick a symbol.")
+            else:
+                symbol = st.selectbox("Symbol", list(df['Symbol']), key=f"history_{name}")
+                st.markdown(f"**Last 24 {name} signals for {symbol}**")
+                st.dataframe(signal_history.last_signals(symbol, 24, ENGINE_TIERS[name]), use_container_width=True)
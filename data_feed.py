@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import candle_store
+from fetch_client import get_client
+
+# === CONFIG ===
+HISTORY_SIZE = 300
+MAX_OUTPUTSIZE = 5000
+
+
+def parse_values(values):
+    # Called once per symbol per refresh, so the string columns are converted in one C pass
+    # each and the timestamp format is not re-guessed for every frame
+    df = pd.DataFrame(values)
+    for col in ('open', 'high', 'low', 'close'):
+        df[col] = np.array(df[col].tolist(), dtype=float)
+    df['datetime'] = pd.to_datetime(df['datetime'], format='ISO8601')
+    return df.sort_values('datetime')
+
+
+def build_params(symbol, interval, last, history=HISTORY_SIZE):
+    params = {'interval': interval}
+    if last is None or candle_store.count_candles(symbol, interval) < history:
+        params['outputsize'] = min(max(history, HISTORY_SIZE), MAX_OUTPUTSIZE)
+    else:
+        # Re-request the last stored candle too, it may have been incomplete
+        params['start_date'] = last
+        params['outputsize'] = MAX_OUTPUTSIZE
+    return params
+
+
+def store_result(result, interval, history=HISTORY_SIZE):
+    if not result.ok:
+        print(f"[ERROR fetching {result.symbol}] - {result.error}")
+        return pd.DataFrame()
+    try:
+        candle_store.append_candles(result.symbol, interval, parse_values(result.values))
+        return candle_store.load_candles(result.symbol, interval, limit=history)
+    except Exception as e:
+        print(f"[ERROR fetching {result.symbol}] - {e}")
+        return pd.DataFrame()
+
+
+def fetch_priority(last):
+    # Symbols with a freshly closed candle (or no history at all) go first
+    if last is None:
+        return 2
+    age = datetime.utcnow() - pd.Timestamp(last).to_pydatetime()
+    return 1 if age.total_seconds() >= 3600 else 0
+
+
+def fetch_many(symbols, scheduler, interval='1h', history=HISTORY_SIZE, batch_size=None):
+    last = {symbol: candle_store.last_timestamp(symbol, interval) for symbol in symbols}
+    batch = [(symbol, build_params(symbol, interval, last[symbol], history)) for symbol in symbols]
+    priorities = {symbol: fetch_priority(last[symbol]) for symbol in symbols}
+    results = get_client().fetch_many(batch, scheduler, priorities, batch_size)
+    return {result.symbol: store_result(result, interval, history) for result in results}
+
+
+def fetch_data(symbol, scheduler, interval='1h', history=HISTORY_SIZE):
+    return fetch_many([symbol], scheduler, interval, history)[symbol]
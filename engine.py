@@ -0,0 +1,166 @@
+import importlib
+import os
+import time
+from dataclasses import dataclass
+
+import data_feed
+import execution
+import model_registry
+import pooled_model
+import profiling
+import signal_history
+import streaming_indicators
+from api_scheduler import ApiKeyScheduler
+from features import ADJUST_COLUMNS, FEATURES, add_indicators_many
+
+# === CONFIG ===
+TIER_MODULES = {
+    'standard': 'one_hour',
+    'pro': 'one_hour_pro',
+    'pro_plus': 'one_hour_pro_plus',
+    'pro_max': 'one_hour_pro_max_ai',
+}
+# Wall-clock seconds one refresh may spend retraining; symbols reached after that serve
+# their last cached model. 0 disables the refresh-wide limit.
+REFRESH_BUDGET = float(os.environ.get('REFRESH_BUDGET_SECONDS', '120'))
+# Symbols fetched, featurized and run through the tiers together; a shard's frames are
+# released before the next shard is fetched. 0 runs the whole universe as one shard.
+SHARD_SIZE = int(os.environ.get('SHARD_SYMBOLS', '100'))
+
+
+@dataclass(frozen=True)
+class TierProfile:
+    tier: str
+    module: object
+    symbols: tuple
+    api_keys: tuple
+    interval: str
+    history_size: int
+    ema_adjust: bool
+    backend: str
+
+
+def load_profile(tier):
+    module = importlib.import_module(TIER_MODULES[tier])
+    return TierProfile(tier=tier, module=module, symbols=tuple(module.SYMBOLS), api_keys=tuple(module.API_KEYS),
+                       interval=module.INTERVAL, history_size=module.HISTORY_SIZE,
+                       ema_adjust=module.EMA_ADJUST, backend=module.EXECUTION_BACKEND)
+
+
+def pooled_profile(profile):
+    return pooled_model.is_pooled(profile.tier) and hasattr(profile.module, 'process_pooled')
+
+
+def shard_symbols(profiles, size=None):
+    # Chunks of the tiers' symbol union; a pooled model needs all of its symbols' rows at
+    # once, so the pooled tiers' symbols stay together in the first shard
+    size = SHARD_SIZE if size is None else size
+    symbols = list(dict.fromkeys(s for p in profiles for s in p.symbols))
+    if not size or len(symbols) <= size:
+        return [symbols]
+    pooled = list(dict.fromkeys(s for p in profiles if pooled_profile(p) for s in p.symbols))
+    rest = [s for s in symbols if s not in pooled]
+    return ([pooled] if pooled else []) + [rest[i:i + size] for i in range(0, len(rest), size)]
+
+
+def featurize(frames, adjust, interval, columns=FEATURES):
+    # Only each symbol's new candles go through its persisted indicator state; a symbol seen
+    # for the first time, or whose stored candles changed, is warmed up with the batch pass
+    if streaming_indicators.ENABLED:
+        return streaming_indicators.stream_indicators_many(frames, adjust, columns, interval)
+    return add_indicators_many(frames, adjust, columns)
+
+
+def fetch_and_featurize(profiles, symbols=None):
+    # One fetch per symbol across all tiers, one indicator pass, and only the
+    # adjust-dependent columns recomputed for tiers that use the other EMA mode
+    if symbols is None:
+        symbols = list(dict.fromkeys(s for p in profiles for s in p.symbols))
+    keys = list(dict.fromkeys(k for p in profiles for k in p.api_keys))
+    interval = profiles[0].interval
+    history = max(p.history_size for p in profiles)
+    shown = ', '.join(symbols) if len(symbols) <= 10 else f"{len(symbols)} symbols"
+    print(f"🔄 Fetching data for {shown}...")
+    with profiling.span('fetch') as span:
+        raw = data_feed.fetch_many(symbols, ApiKeyScheduler(keys), interval, history)
+        span['rows'] = sum(len(df) for df in raw.values())
+    base_adjust = profiles[0].ema_adjust
+    with profiling.span('features', rows=span.get('rows')):
+        base = featurize(raw, base_adjust, interval)
+
+    variants = {base_adjust: base}
+    for adjust in {p.ema_adjust for p in profiles} - {base_adjust}:
+        needed = {s for p in profiles if p.ema_adjust == adjust for s in p.symbols}
+        frames = {s: base[s][['datetime', 'open', 'high', 'low', 'close'] + FEATURES].copy()
+                  for s in symbols if s in needed}
+        with profiling.span('features', rows=sum(len(df) for df in frames.values())):
+            variants[adjust] = featurize(frames, adjust, interval, ADJUST_COLUMNS)
+    return variants
+
+
+def profile_rows(profile, frames, backend=None, workers=None, deadline=None):
+    # Output rows for the profile's symbols present in frames (one shard)
+    jobs = [(symbol, frames[symbol].tail(profile.history_size).reset_index(drop=True).copy())
+            for symbol in profile.symbols if symbol in frames]
+    if not jobs:
+        return []
+    if pooled_profile(profile):
+        try:
+            process_pooled = model_registry.Budgeted(profile.module.process_pooled, deadline)
+            return process_pooled(dict(jobs))
+        except Exception as e:
+            print(f"[WARN] Pooled {profile.tier} model failed, training per symbol - {e}")
+    error_row = getattr(profile.module, 'error_row', None)
+    process_symbol = model_registry.Budgeted(profile.module.process_symbol, deadline)
+    return execution.run_per_symbol(process_symbol, jobs, backend or profile.backend, workers,
+                                    key=profile.tier, on_error=error_row)
+
+
+def run_profile(profile, frames, backend=None, workers=None, deadline=None):
+    return profile.module.build_output(profile_rows(profile, frames, backend, workers, deadline))
+
+
+def run_tiers(tiers=None, backend=None, workers=None, symbols=None):
+    # symbols limits the refresh to those of the tiers' symbols (a retry of late candles)
+    profiles = [load_profile(tier) for tier in (tiers or TIER_MODULES)]
+    intervals = {p.interval for p in profiles}
+    if len(intervals) != 1:
+        raise ValueError(f"tiers use different intervals: {sorted(intervals)}")
+    deadline = time.time() + REFRESH_BUDGET if REFRESH_BUDGET else None
+    rows = {p.tier: [] for p in profiles}
+    candles = {}
+    with profiling.context(run=profiling.new_run()):
+        for shard in shard_symbols(profiles):
+            if symbols is not None:
+                shard = [s for s in shard if s in symbols]
+                if not shard:
+                    continue
+            variants = fetch_and_featurize(profiles, shard)
+            for p in profiles:
+                with profiling.context(tier=p.tier):
+                    rows[p.tier] += profile_rows(p, variants[p.ema_adjust], backend, workers, deadline)
+            frames = variants[profiles[0].ema_adjust]
+            candles.update({symbol: df['datetime'].iloc[-1] for symbol, df in frames.items() if len(df)})
+            del variants
+        outputs = {p.tier: p.module.build_output(rows[p.tier]) for p in profiles}
+        record_history(outputs, rows, candles)
+    return outputs
+
+
+def record_history(outputs, rows, candles):
+    # Every tier's rows of this refresh in one write; a failing history never fails the refresh
+    if not signal_history.ENABLED:
+        return
+    try:
+        with profiling.span('history') as span:
+            history = []
+            for tier, output in outputs.items():
+                skipped = [res for res in rows[tier] if isinstance(res, signal_history.Skipped)]
+                history += signal_history.rows(tier, output, skipped, candles)
+            span['rows'] = signal_history.record(history)
+    except Exception as e:
+        print(f"[WARN] Could not record signal history - {e}")
+
+
+def run_tier(tier, backend=None, workers=None):
+    return run_tiers([tier], backend, workers)[tier]
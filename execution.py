@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cpu_budget
+import profiling
+
+# === CONFIG ===
+BACKENDS = ('serial', 'threads', 'processes')
+DEFAULT_BACKEND = os.environ.get('SIGNAL_BACKEND')
+DEFAULT_WORKERS = int(os.environ.get('SIGNAL_WORKERS', 0)) or None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _call(fn, args, threads=None, context=None, native=True):
+    # Spans recorded by the job come back with its result, so process workers report them too.
+    # native=False for jobs sharing a process: threadpoolctl's OpenMP/BLAS limits are process-wide
+    cpu = time.process_time()
+    with profiling.context(**dict(context or {}, symbol=args[0])), profiling.capture() as spans:
+        try:
+            with cpu_budget.limit_threads(threads, native), profiling.span('symbol'):
+                return True, fn(*args), time.process_time() - cpu, spans
+        except Exception as e:
+            return False, f"{type(e).__name__}: {e}\n{traceback.format_exc()}", time.process_time() - cpu, spans
+
+
+def _process_pool(workers):
+    # Worker processes are kept between refreshes so the ML imports are paid once
+    with _pools_lock:
+        if workers not in _pools:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        return _pools[workers]
+
+
+def _reset_pool(workers):
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_per_symbol(fn, jobs, backend='serial', workers=None, on_error=None, key=None):
+    # jobs: list of (symbol, *args); fn(symbol, *args) must be a module-level function for 'processes'
+    backend = backend or 'serial'
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    workers, threads = cpu_budget.plan(len(jobs), backend, workers or DEFAULT_WORKERS, key)
+    context = profiling.current()
+    wall, cpu = time.perf_counter(), time.process_time()
+
+    if backend == 'serial' or workers == 1:
+        outcomes = [_call(fn, job, threads, context) for job in jobs]
+    elif backend == 'threads':
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(lambda job: _call(fn, job, threads, context, native=False), jobs))
+    else:
+        pool = _process_pool(workers)
+        futures = [pool.submit(_call, fn, job, threads, context) for job in jobs]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append((False, f"{type(e).__name__}: {e}", 0.0, None))
+        if any(not ok and 'BrokenProcessPool' in err for ok, err, _, _ in outcomes):
+            _reset_pool(workers)
+
+    wall = time.perf_counter() - wall
+    if backend == 'processes' and workers > 1:
+        cpu = sum(job_cpu for _, _, job_cpu, _ in outcomes)
+    else:
+        cpu = time.process_time() - cpu
+    usage = cpu_budget.record_usage(key or fn.__module__, backend, workers, threads, wall, cpu)
+    print(f"[INFO] {key or fn.__module__}: {len(jobs)} jobs on {workers} {backend} worker(s) x {threads} thread(s), "
+          f"{usage['effective_cores']:.1f} of {usage['core_budget']} cores in use")
+
+    results = []
+    for job, (ok, value, _, spans) in zip(jobs, outcomes):
+        profiling.record(spans)
+        if ok:
+            results.append(value)
+            continue
+        symbol = job[0]
+        print(f"[ERROR processing {symbol}] - {value.splitlines()[0]}")
+        results.append(on_error(symbol, value) if on_error else None)
+    return results
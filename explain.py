@@ -0,0 +1,54 @@
+import numpy as np
+
+import model_registry
+import profiling
+import training
+
+# === CONFIG ===
+TOP_DRIVERS = 3
+SIDECAR = 'shap'
+
+
+def contributions(model, X):
+    # Per-row TreeSHAP values in margin (log-odds) space, without the bias column; the soft
+    # vote and fold averages are explained as the mean of their members. None if unsupported.
+    name = type(model).__name__
+    if name == 'QuantizedModel':
+        return contributions(model.model, model.edges.transform(X))
+    if name in ('FoldAverage', 'VotingClassifier'):
+        members = model.models if name == 'FoldAverage' else list(model.named_estimators_.values())
+        parts = [contributions(m, X) for m in members]
+        return None if any(p is None for p in parts) else np.mean(parts, axis=0)
+    if name == 'XGBClassifier':
+        from xgboost import DMatrix
+        booster = model.get_booster()
+        data = DMatrix(X, feature_types=booster.feature_types, enable_categorical=True)
+        return booster.predict(data, pred_contribs=True,
+                               iteration_range=(0, training.boosting_rounds(model)))[:, :-1]
+    if name == 'LGBMClassifier':
+        return model.predict(X, pred_contrib=True)[:, :-1]
+    if name == 'CatBoostClassifier':
+        from catboost import Pool
+        return model.get_feature_importance(Pool(X), type='ShapValues')[:, :-1]
+    return None
+
+
+def explain(tier, symbol, model, X, keys):
+    # SHAP rows for X, cached next to the registry entry get_model last served for
+    # (tier, symbol) and keyed by keys (e.g. candle time), so a model explains a row once
+    cache = model_registry.load_sidecar(tier, symbol, SIDECAR) or {}
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    if missing:
+        with profiling.span('explain', rows=len(missing)):
+            values = contributions(model, np.asarray(X)[missing])
+        if values is None:
+            return None
+        cache.update({keys[i]: row for i, row in zip(missing, values)})
+        model_registry.save_sidecar(tier, symbol, SIDECAR, cache)
+    return np.array([cache[key] for key in keys])
+
+
+def top_drivers(values, features, k=TOP_DRIVERS):
+    # "rsi14 ▲, macd ▼, adx ▲": largest |SHAP| first, ▲ pushes towards BUY
+    order = np.argsort(-np.abs(values))[:k]
+    return ', '.join(f"{features[j]} {'▲' if values[j] > 0 else '▼'}" for j in order)
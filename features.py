@@ -0,0 +1,140 @@
+import numpy as np
+
+FEATURES = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
+OHLC = ['open', 'high', 'low', 'close']
+# Only these columns change with the EMA adjust flag
+ADJUST_COLUMNS = ['ema10', 'macd']
+EPS = 1e-6
+
+
+def _windows(x, window):
+    # Yields the window offsets as contiguous slices, so each step is one vector op over all symbols
+    n = x.shape[-1] - window + 1
+    for k in range(window):
+        yield x[..., k:k + n]
+
+
+def rolling_mean(x, window):
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        total = np.zeros(x.shape[:-1] + (x.shape[-1] - window + 1,))
+        for part in _windows(x, window):
+            total += part
+        out[..., window - 1:] = total / window
+    return out
+
+
+def rolling_std(x, window, mean=None):
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        mean = (rolling_mean(x, window) if mean is None else mean)[..., window - 1:]
+        total = np.zeros(mean.shape)
+        for part in _windows(x, window):
+            total += (part - mean) ** 2
+        out[..., window - 1:] = np.sqrt(total / (window - 1))
+    return out
+
+
+def ema(x, span, adjust=False):
+    # Same recursions as pandas ewm(span=...).mean(), run along the time axis for every symbol at once
+    from scipy.signal import lfilter  # deferred: scipy.signal dominates import time
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    if adjust:
+        num = lfilter([1.0], [1.0, -decay], x, axis=-1)
+        den = lfilter([1.0], [1.0, -decay], np.ones(x.shape[-1]))
+        return num / den
+    zi = (decay * x[..., :1])
+    return lfilter([alpha], [1.0, -decay], x, axis=-1, zi=zi)[0]
+
+
+def shift(x, periods):
+    out = np.full(x.shape, np.nan)
+    if periods > 0:
+        out[..., periods:] = x[..., :-periods]
+    else:
+        out[..., :periods] = x[..., -periods:]
+    return out
+
+
+def rsi_terms(close):
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    return np.where(delta > 0, delta, 0), np.where(delta < 0, -delta, 0)
+
+
+def rsi(close, period=14):
+    gain, loss = rsi_terms(close)
+    rs = rolling_mean(gain, period) / (rolling_mean(loss, period) + EPS)
+    return 100 - (100 / (1 + rs))
+
+
+def macd(close, adjust=False):
+    line = ema(close, 12, adjust) - ema(close, 26, adjust)
+    return line - ema(line, 9, adjust)
+
+
+def adx_terms(high, low, close, period=14):
+    # Directional movement, true range and DX, the series adx averages
+    high_diff = np.diff(high, axis=-1, prepend=np.nan)
+    low_diff = np.diff(low, axis=-1, prepend=np.nan)
+    plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
+    minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
+    prev_close = shift(close, 1)
+    tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    atr = rolling_mean(tr, period) + EPS
+    plus_di = 100 * rolling_mean(plus_dm, period) / atr
+    minus_di = 100 * rolling_mean(minus_dm, period) / atr
+    dx = (np.abs(plus_di - minus_di) / (plus_di + minus_di + EPS)) * 100
+    return plus_dm, minus_dm, tr, dx
+
+
+def adx(high, low, close, period=14):
+    return rolling_mean(adx_terms(high, low, close, period)[3], period)
+
+
+def compute_features(ohlc, adjust=False, columns=FEATURES):
+    # ohlc: (symbols, time, 4) array -> (symbols, time, len(columns)) array
+    ohlc = np.asarray(ohlc, dtype=float)
+    high, low, close = (np.ascontiguousarray(ohlc[..., i]) for i in (1, 2, 3))
+    out = {}
+    if 'bb_upper' in columns or 'bb_lower' in columns:
+        ma20 = rolling_mean(close, 20)
+        band = 2 * rolling_std(close, 20, mean=ma20)
+        out['bb_upper'], out['bb_lower'] = ma20 + band, ma20 - band
+    builders = {
+        'ma5': lambda: rolling_mean(close, 5),
+        'ma10': lambda: rolling_mean(close, 10),
+        'ema10': lambda: ema(close, 10, adjust),
+        'rsi14': lambda: rsi(close),
+        'momentum': lambda: close - shift(close, 4),
+        'macd': lambda: macd(close, adjust),
+        'adx': lambda: adx(high, low, close),
+        'volatility': lambda: high - low,
+    }
+    return np.stack([out[name] if name in out else builders[name]() for name in columns], axis=-1)
+
+
+def add_indicators(df, adjust=False):
+    values = compute_features(df[OHLC].to_numpy()[np.newaxis], adjust)[0]
+    for i, name in enumerate(FEATURES):
+        df[name] = values[:, i]
+    return df
+
+
+def add_indicators_many(frames, adjust=False, columns=FEATURES):
+    # Frames of equal length are stacked and computed in a single pass
+    by_length = {}
+    for symbol, df in frames.items():
+        by_length.setdefault(len(df), []).append(symbol)
+    out = {}
+    for length, symbols in by_length.items():
+        if length == 0:
+            out.update({s: frames[s] for s in symbols})
+            continue
+        values = compute_features(np.stack([frames[s][OHLC].to_numpy() for s in symbols]), adjust, columns)
+        for symbol, block in zip(symbols, values):
+            df = frames[symbol]
+            for i, name in enumerate(columns):
+                df[name] = block[:, i]
+            out[symbol] = df
+    return {s: out[s] for s in frames}
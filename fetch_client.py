@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# === CONFIG ===
+BASE_URL = os.environ.get('TWELVEDATA_BASE_URL', "https://api.twelvedata.com")
+MAX_CONCURRENCY = int(os.environ.get('FETCH_MAX_CONCURRENCY', 8))
+TIMEOUT = 10
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+# Symbols per time_series request (TwelveData accepts up to 120 comma separated); capped
+# further by the per-minute credits of a key, since each symbol costs one
+BATCH_SYMBOLS = int(os.environ.get('FETCH_BATCH_SYMBOLS', '120'))
+
+
+@dataclass
+class FetchResult:
+    symbol: str
+    values: list = field(default_factory=list)
+    error: str = None
+    status: int = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class FetchClient:
+    def __init__(self, base_url=BASE_URL, max_concurrency=MAX_CONCURRENCY, timeout=TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fetch')
+
+    def get_json(self, path, params):
+        start = time.perf_counter()
+        try:
+            r = self.session.get(f"{self.base_url}/{path}", params=params, timeout=self.timeout)
+            return r.status_code, r.json(), None, time.perf_counter() - start
+        except Exception as e:
+            return None, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+    def fetch_batch(self, symbols, params, scheduler=None, priority=0):
+        # One request for symbols sharing params. TwelveData bills a credit per symbol and
+        # answers {symbol: single-symbol response} when more than one symbol is asked for.
+        tried = set()
+        for attempt in range(MAX_RETRIES + 1):
+            if scheduler is not None:
+                key = scheduler.acquire(priority, exclude=tried, credits=len(symbols))
+                if key is None:
+                    return [FetchResult(symbol, error="no API credits available") for symbol in symbols]
+                params = dict(params, apikey=key)
+                tried.add(key)
+            status, data, error, elapsed = self.get_json('time_series', dict(params, symbol=','.join(symbols)))
+            if error is None and not isinstance(data, dict):
+                error = 'bad response'
+            elif error is None and (data.get('status') == 'error' or len(symbols) == 1 and "values" not in data):
+                error = data.get('message', 'response has no values')
+                if is_rate_limited(status, data) and scheduler is not None and attempt < MAX_RETRIES:
+                    scheduler.report_rate_limited(params['apikey'])
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    continue
+            if error is not None:
+                code = data.get('code') if isinstance(data, dict) else None
+                return [FetchResult(symbol, error=error, status=code or status, elapsed=elapsed) for symbol in symbols]
+            if len(symbols) == 1:
+                data = {symbols[0]: data}
+            return [series_result(symbol, data.get(symbol), status, elapsed) for symbol in symbols]
+
+    def fetch_time_series(self, symbol, params, scheduler=None, priority=0):
+        return self.fetch_batch([symbol], params, scheduler, priority)[0]
+
+    def fetch_many(self, requests_by_symbol, scheduler=None, priorities=None, batch_size=None):
+        # Symbols asking for identical params share requests of up to batch_size symbols,
+        # highest priority first; results come back in request order
+        priorities = priorities or {}
+        batch_size = batch_size or BATCH_SYMBOLS
+        if scheduler is not None:
+            batch_size = min(batch_size, scheduler.capacity())
+        groups = {}
+        for symbol, params in requests_by_symbol:
+            groups.setdefault(tuple(sorted(params.items())), []).append(symbol)
+        futures = []
+        for params, symbols in groups.items():
+            symbols = sorted(symbols, key=lambda s: -priorities.get(s, 0))
+            for i in range(0, len(symbols), batch_size):
+                chunk = symbols[i:i + batch_size]
+                futures.append(self._executor.submit(self.fetch_batch, chunk, dict(params), scheduler,
+                                                     max(priorities.get(s, 0) for s in chunk)))
+        results = {result.symbol: result for f in futures for result in f.result()}
+        return [results[symbol] for symbol, _ in requests_by_symbol]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+def series_result(symbol, data, status, elapsed):
+    if not isinstance(data, dict):
+        return FetchResult(symbol, error='missing from batch response', status=status, elapsed=elapsed)
+    if "values" not in data:
+        return FetchResult(symbol, error=data.get('message', 'response has no values'),
+                           status=data.get('code') or status, elapsed=elapsed)
+    return FetchResult(symbol, data["values"], None, status, elapsed)
+
+
+def is_rate_limited(status, data):
+    return status == 429 or data.get('code') == 429
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = FetchClient()
+        return _client
+
+
+def set_client(client):
+    global _client
+    with _client_lock:
+        _client = client
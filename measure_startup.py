@@ -0,0 +1,46 @@
+import ast
+import subprocess
+import sys
+
+# The dashboard whose imports are timed before its first render, and what each engine adds on first refresh
+DASHBOARD = 'dashboard_app.py'
+ENGINES = ['one_hour', 'one_hour_pro', 'one_hour_pro_plus', 'one_hour_pro_max_ai']
+HEAVY = ['xgboost', 'lightgbm', 'catboost', 'sklearn.ensemble', 'shap']
+REPEATS = 3
+
+
+def dashboard_imports(path=DASHBOARD):
+    # Read from the dashboard's own module-level imports so the measured list cannot drift
+    modules = []
+    for node in ast.parse(open(path).read()).body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_time(modules, preload=()):
+    # Fresh interpreter per sample so nothing is already in sys.modules
+    code = (f"import time\nfor m in {list(preload)!r}: __import__(m)\n"
+            f"t = time.perf_counter()\nfor m in {list(modules)!r}: __import__(m)\n"
+            f"print(time.perf_counter() - t)")
+    samples = []
+    for _ in range(REPEATS):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(samples)
+
+
+if __name__ == "__main__":
+    imports = dashboard_imports()
+    base = import_time(imports)
+    print(f"dashboard imports before first render : {base:6.2f}s ({', '.join(imports)})")
+    print(f"  previous eager imports (all engines) : {import_time(imports + ENGINES):6.2f}s")
+    for engine in ENGINES:
+        print(f"  + {engine:<22} on first refresh : {import_time([engine], imports):6.2f}s")
+    for lib in HEAVY:
+        try:
+            print(f"    {lib:<24} alone            : {import_time([lib]):6.2f}s")
+        except subprocess.CalledProcessError:
+            print(f"    {lib:<24} not installed")
@@ -0,0 +1,320 @@
+import copy
+import glob
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import balanced_accuracy_score
+from sklearn.utils import Bunch
+
+import compiled_model
+import profiling
+import retrain_policy
+from cpu_budget import limit_threads, model_threads
+import training
+from features import FEATURES
+
+# === CONFIG ===
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', os.path.join('data', 'models'))
+WARM_START_ROUNDS = 10
+MAX_WARM_STARTS = 24
+# Newest known-outcome candles held out to re-score a warm-started model, which boosts on
+# the candles since the last fit before them; no such candle (or a single class among the
+# held-out ones) means a full refit instead
+MIN_HOLDOUT_CANDLES = 12
+KEEP_ENTRIES = 3
+# Wall-clock seconds one symbol may spend in a full retrain before the last cached model
+# is served instead (training carries on in the background); 0 waits indefinitely
+SYMBOL_BUDGET = float(os.environ.get('TRAIN_BUDGET_SECONDS', '30'))
+
+_lock = threading.Lock()
+_inflight_lock = threading.Lock()
+_inflight = {}
+_deadline = threading.local()
+# (tier, symbol) -> (schema, window) of the entry get_model last returned in this process
+_served = {}
+# (tier, symbol) -> (sidecar path, CompiledModel or None) of the last serving_model call
+_compiled = {}
+COMPILED = 'compiled'
+
+
+class Budgeted:
+    # Runs fn with a refresh-wide deadline (epoch seconds) visible to get_model in this worker;
+    # picklable as long as fn is a module-level function
+    def __init__(self, fn, deadline):
+        self.fn = fn
+        self.deadline = deadline
+
+    def __call__(self, *args):
+        _deadline.value = self.deadline
+        try:
+            return self.fn(*args)
+        finally:
+            _deadline.value = None
+
+
+def remaining_budget():
+    budget = SYMBOL_BUDGET or None
+    deadline = getattr(_deadline, 'value', None)
+    if deadline is not None:
+        left = deadline - time.time()
+        budget = left if budget is None else min(budget, left)
+    return budget
+
+
+def schema_hash(features=FEATURES, **config):
+    text = repr((list(features), sorted(config.items())))
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def window_hash(df, features=FEATURES):
+    hashed = pd.util.hash_pandas_object(df[list(features) + ['target']], index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()[:16]
+
+
+def _entry_dir(tier, symbol):
+    return os.path.join(REGISTRY_DIR, tier, symbol.replace('/', '_'))
+
+
+def _entry_path(tier, symbol, schema, window):
+    return os.path.join(_entry_dir(tier, symbol), f"{schema}-{window}.joblib")
+
+
+def save(tier, symbol, schema, window, entry):
+    path = _entry_path(tier, symbol, schema, window)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    joblib.dump(dict(entry, saved_at=time.time(), window=window), tmp)
+    os.replace(tmp, path)
+    with _lock:
+        entries = sorted(glob.glob(os.path.join(_entry_dir(tier, symbol), f"{schema}-*.joblib")),
+                         key=os.path.getmtime)
+        for old in entries[:-KEEP_ENTRIES]:
+            for stale in glob.glob(old[:-len('.joblib')] + '.*'):
+                os.remove(stale)
+
+
+def _sidecar_path(tier, symbol, name):
+    schema, window = _served.get((tier, symbol), (None, None))
+    if window is None:
+        return None
+    return _entry_path(tier, symbol, schema, window)[:-len('.joblib')] + f".{name}"
+
+
+def load_sidecar(tier, symbol, name):
+    # Data stored next to the model get_model last returned for (tier, symbol); dropped with it
+    path = _sidecar_path(tier, symbol, name)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"[WARN] Could not load {path} - {e}")
+        return None
+
+
+def save_sidecar(tier, symbol, name, value):
+    path = _sidecar_path(tier, symbol, name)
+    if path is None:
+        return
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    joblib.dump(value, tmp)
+    os.replace(tmp, path)
+
+
+def serving_model(tier, symbol, model, scaler=None):
+    # NumPy-only twin of the model get_model last returned for (tier, symbol), exported once
+    # per entry and kept next to it; None when disabled or the model does not compile
+    path = _sidecar_path(tier, symbol, COMPILED)
+    if not compiled_model.ENABLED or path is None:
+        return None
+    cached = _compiled.get((tier, symbol))
+    if cached is not None and cached[0] == path:
+        return cached[1]
+    compiled = load_sidecar(tier, symbol, COMPILED)
+    if compiled is None:
+        try:
+            compiled = compiled_model.compile_model(model, scaler)
+            save_sidecar(tier, symbol, COMPILED, compiled)
+        except NotImplementedError:
+            pass
+        except Exception as e:
+            print(f"[WARN] Could not compile {tier} {symbol}, serving the library model - {e}")
+    _compiled[(tier, symbol)] = (path, compiled)
+    return compiled
+
+
+def load(tier, symbol, schema, window):
+    path = _entry_path(tier, symbol, schema, window)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"[WARN] Could not load cached model {path} - {e}")
+        return None
+
+
+def latest(tier, symbol, schema):
+    entries = glob.glob(os.path.join(_entry_dir(tier, symbol), f"{schema}-*.joblib"))
+    for path in sorted(entries, key=os.path.getmtime, reverse=True):
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"[WARN] Could not load cached model {path} - {e}")
+    return None
+
+
+def continue_boosting(model, X, y, rounds=WARM_START_ROUNDS):
+    name = type(model).__name__
+    if name == 'QuantizedModel':
+        return type(model)(continue_boosting(model.model, model.edges.transform(X), y, rounds), model.edges)
+    if name == 'FoldAverage':
+        return type(model)([continue_boosting(m, X, y, rounds) for m in model.models])
+    if name == 'VotingClassifier':
+        warmed = copy.copy(model)
+        fitted = [(key, continue_boosting(est, X, y, rounds)) for key, est in model.named_estimators_.items()]
+        warmed.estimators_ = [est for _, est in fitted]
+        warmed.named_estimators_ = Bunch(**dict(fitted))
+        return warmed
+    params = model.get_params()
+    if name == 'XGBClassifier':
+        warmed = type(model)(**dict(params, n_estimators=rounds, n_jobs=model_threads()))
+        booster = model.get_booster()
+        if 'best_iteration' in booster.attributes():
+            # Continue from the early-stopped best round and let predict use every tree again
+            booster = booster[:model.best_iteration + 1]
+            booster.set_attr(best_iteration=None, best_score=None)
+        warmed.fit(X, y, xgb_model=booster)
+    elif name == 'LGBMClassifier':
+        warmed = type(model)(**dict(params, n_estimators=rounds, n_jobs=model_threads()))
+        warmed.fit(X, y, init_model=model.booster_)
+    elif name == 'CatBoostClassifier':
+        warmed = type(model)(**dict(params, iterations=rounds, thread_count=model_threads()))
+        warmed.fit(X, y, init_model=model)
+    else:
+        raise TypeError(f"cannot continue boosting a {name}")
+    return warmed
+
+
+def warm_start(previous, df, features):
+    # (model, acc): the previous model boosted on a class-balanced mix of the rows its last
+    # fit covered and the older candles since, then scored (balanced accuracy, like the
+    # balanced CV folds) on the newest known candles, which neither fit saw. None when
+    # there are too few new candles to both learn from and score.
+    ref = previous.get('reference')
+    if ref is None or 'datetime' not in df or not np.isscalar(previous['acc']):
+        return None
+    target = df['target'].to_numpy()
+    times = df['datetime']
+    # The newest candle's target needs the next close, so it can neither train nor score
+    known = (times < times.max()).to_numpy()
+    new = np.flatnonzero(known & (times > ref['end']).to_numpy())
+    if len(new) <= MIN_HOLDOUT_CANDLES:
+        return None
+    holdout = new[-MIN_HOLDOUT_CANDLES:]
+    if len(np.unique(target[holdout])) < 2:
+        return None
+    rows = np.flatnonzero(known)[:-MIN_HOLDOUT_CANDLES]
+    idx = training.balanced_indices(target[rows], random_state=42, shuffle_state=42)
+    if idx is None:
+        return None
+    rows = rows[idx]
+    X = training.feature_matrix(df, list(features), np.float64)
+    if previous['scaler'] is not None:
+        X = previous['scaler'].transform(X)
+    with profiling.span('warm_start', rows=len(rows)):
+        model = continue_boosting(previous['model'], X[rows], target[rows])
+    return model, balanced_accuracy_score(target[holdout], model.predict(X[holdout]))
+
+
+def get_model(tier, symbol, df, train_fn, features=FEATURES, gate=None, **config):
+    # Returns (model, acc, scaler); reuses the stored model for an unchanged window, and for a
+    # new one unless the retrain policy fires (gate: the tier's accuracy gate, for live accuracy)
+    schema = schema_hash(features, final_fit=training.FINAL_FIT, quantize=training.QUANTIZE,
+                         matrix='ndarray', **config)
+    window = window_hash(df, features)
+    with profiling.span('registry_load'):
+        entry = load(tier, symbol, schema, window)
+    if entry is not None:
+        _served[(tier, symbol)] = (schema, window)
+        return entry['model'], entry['acc'], entry['scaler']
+
+    previous = latest(tier, symbol, schema)
+    action = retrain_policy.UPDATE
+    if previous is not None:
+        action, reason = retrain_policy.decide(previous, df, features, gate)
+        if retrain_policy.ENABLED:
+            verdict = 'inference only' if action == retrain_policy.INFER else 'retraining'
+            print(f"[INFO] {tier} {symbol}: {verdict} - {reason}")
+    if action == retrain_policy.INFER:
+        _served[(tier, symbol)] = (schema, previous.get('window'))
+        return previous['model'], previous['acc'], previous['scaler']
+
+    if action == retrain_policy.UPDATE and previous is not None and previous['warm_starts'] < MAX_WARM_STARTS:
+        try:
+            warmed = warm_start(previous, df, features)
+            if warmed is not None:
+                model, acc = warmed
+                print(f"[INFO] Warm-started {tier} {symbol}, held-out accuracy {acc:.2f}")
+                entry = dict(previous, model=model, acc=acc, warm_starts=previous['warm_starts'] + 1,
+                             fitted_at=time.time(), reference=retrain_policy.reference(df, features))
+                save(tier, symbol, schema, window, entry)
+                _served[(tier, symbol)] = (schema, window)
+                return entry['model'], entry['acc'], entry['scaler']
+        except Exception as e:
+            print(f"[WARN] Warm start failed for {tier} {symbol}, refitting - {e}")
+
+    budget = remaining_budget()
+    _served[(tier, symbol)] = (schema, window)
+    if previous is None or budget is None:
+        return train(tier, symbol, schema, window, df, train_fn, features)
+    try:
+        return train_async(tier, symbol, schema, window, df, train_fn, features).result(timeout=max(budget, 0))
+    except TimeoutError:
+        print(f"[WARN] Training {tier} {symbol} is over its {max(budget, 0):.1f}s budget, serving the cached model")
+        _served[(tier, symbol)] = (schema, previous.get('window'))
+        return previous['model'], previous['acc'], previous['scaler']
+
+
+def train(tier, symbol, schema, window, df, train_fn, features=FEATURES):
+    start = time.perf_counter()
+    with profiling.span('train', rows=len(df)):
+        result = tuple(train_fn(df))
+    model, acc, scaler = (result + (None,))[:3]
+    if model is not None:
+        rounds = training.boosting_rounds(model)
+        print(f"[INFO] Trained {tier} {symbol} in {time.perf_counter() - start:.1f}s, boosting rounds {rounds}")
+        save(tier, symbol, schema, window,
+             {'model': model, 'acc': acc, 'scaler': scaler, 'warm_starts': 0, 'rounds': rounds,
+              'fitted_at': time.time(), 'reference': retrain_policy.reference(df, features)})
+    return model, acc, scaler
+
+
+def train_async(tier, symbol, schema, window, df, train_fn, features=FEATURES):
+    # One background training per (tier, symbol, schema, window); a later caller joins it
+    key = (tier, symbol, schema, window)
+    threads = model_threads()
+    fields = profiling.current()
+    with _inflight_lock:
+        if key in _inflight:
+            return _inflight[key]
+        future = _inflight[key] = Future()
+
+    def run():
+        try:
+            with limit_threads(threads, native=False), profiling.context(**fields):
+                future.set_result(train(tier, symbol, schema, window, df, train_fn, features))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+    threading.Thread(target=run, name=f"train-{tier}-{symbol}", daemon=True).start()
+    return future
@@ -1,89 +1,45 @@
 # === one_hour_pro.py ===
 import pandas as pd
 import numpy as np
-import requests
 from xgboost import XGBClassifier
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.utils import resample
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+
+import data_feed
+import engine
+from cpu_budget import model_threads
+import execution
+import model_registry
+import profiling
+import training
+import universe
+from features import add_indicators
+from api_scheduler import ApiKeyScheduler
 
 API_KEYS = [
     '54a7479bdf2040d3a35d6b3ae6457f9d',
     'd162b35754ca4c54a13ebe7abecab4e0',
     'a7266b2503fd497496d47527a7e63b5d'
 ]
+TIER = 'pro'
 INTERVAL = '1h'
-SYMBOLS = ['EUR/USD', 'USD/JPY','AUD/USD', 'USD/CAD']
+HISTORY_SIZE = 300
+EMA_ADJUST = False
+SYMBOLS = universe.tier_symbols(TIER, ['EUR/USD', 'USD/JPY','AUD/USD', 'USD/CAD'])
 MULTIPLIER = 100
-api_usage_index = 0
-
+KEY_SCHEDULER = ApiKeyScheduler(API_KEYS)
+EXECUTION_BACKEND = execution.DEFAULT_BACKEND or 'threads'
 
-def get_next_api_key():
-    global api_usage_index
-    key = API_KEYS[api_usage_index % len(API_KEYS)]
-    api_usage_index += 1
-    return key
 
 def fetch_data(symbol):
-    try:
-        api_key = get_next_api_key()
-        url = f"https://api.twelvedata.com/time_series?symbol={symbol}&interval=1h&outputsize=300&apikey={api_key}"
-        r = requests.get(url, timeout=10)
-        data = r.json()
-        if "values" not in data:
-            return pd.DataFrame()
-        df = pd.DataFrame(data["values"])
-        df = df.astype({'open': float, 'high': float, 'low': float, 'close': float})
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        return df.sort_values('datetime')
-    except Exception as e:
-        print(f"[ERROR fetching {symbol}] - {e}")
-        return pd.DataFrame()
-
-
-def compute_rsi(series, period=14):
-    delta = series.diff()
-    gain = np.where(delta > 0, delta, 0)
-    loss = np.where(delta < 0, -delta, 0)
-    avg_gain = pd.Series(gain).rolling(period).mean()
-    avg_loss = pd.Series(loss).rolling(period).mean()
-    rs = avg_gain / (avg_loss + 1e-6)
-    return 100 - (100 / (1 + rs))
-
-def compute_macd(df):
-    ema12 = df['close'].ewm(span=12, adjust=False).mean()
-    ema26 = df['close'].ewm(span=26, adjust=False).mean()
-    macd = ema12 - ema26
-    signal = macd.ewm(span=9, adjust=False).mean()
-    return macd - signal
-
-def compute_adx(df, period=14):
-    high, low, close = df['high'], df['low'], df['close']
-    plus_dm = np.where((high.diff() > low.diff()) & (high.diff() > 0), high.diff(), 0)
-    minus_dm = np.where((low.diff() > high.diff()) & (low.diff() > 0), low.diff(), 0)
-    tr = np.maximum.reduce([high - low, abs(high - close.shift()), abs(low - close.shift())])
-    atr = pd.Series(tr).rolling(window=period).mean()
-    plus_di = 100 * pd.Series(plus_dm).rolling(window=period).mean() / (atr + 1e-6)
-    minus_di = 100 * pd.Series(minus_dm).rolling(window=period).mean() / (atr + 1e-6)
-    dx = (abs(plus_di - minus_di) / (plus_di + minus_di + 1e-6)) * 100
-    return pd.Series(dx).rolling(window=period).mean()
+    return data_feed.fetch_data(symbol, KEY_SCHEDULER, INTERVAL, HISTORY_SIZE)
 
-def add_features(df):
-    df['ma5'] = df['close'].rolling(5).mean()
-    df['ma10'] = df['close'].rolling(10).mean()
-    df['ema10'] = df['close'].ewm(span=10, adjust=False).mean()
-    df['rsi14'] = compute_rsi(df['close'])
-    df['momentum'] = df['close'] - df['close'].shift(4)
-    df['macd'] = compute_macd(df)
-    df['adx'] = compute_adx(df)
-    df['bb_upper'] = df['close'].rolling(20).mean() + 2 * df['close'].rolling(20).std()
-    df['bb_lower'] = df['close'].rolling(20).mean() - 2 * df['close'].rolling(20).std()
-    df['volatility'] = df['high'] - df['low']
+
+def add_target(df):
     df['target'] = np.where(df['close'].shift(-1) > df['close'], 1, 0)
     return df.dropna()
 
+def add_features(df):
+    return add_target(add_indicators(df, EMA_ADJUST))
+
 def train_model(df):
     features = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
     X = df[features]
@@ -93,59 +49,30 @@ def train_model(df):
         print("[INFO] Skipping model training due to insufficient data.")
         return None, 0
 
-    df_combined = pd.concat([X, y], axis=1)
-    df_1 = df_combined[df_combined['target'] == 1]
-    df_0 = df_combined[df_combined['target'] == 0]
-
     # Balance the dataset
-    min_len = min(len(df_1), len(df_0))
-    if min_len < 10:
+    idx = training.balanced_indices(y.to_numpy(), min_len=10, random_state=42, shuffle_state=42)
+    if idx is None:
         print("[INFO] Not enough samples for balancing.")
         return None, 0
 
-    df_balanced = pd.concat([
-        resample(df_1, replace=True, n_samples=min_len, random_state=42),
-        resample(df_0, replace=True, n_samples=min_len, random_state=42)
-    ])
-    df_balanced = df_balanced.sample(frac=1, random_state=42)
-
-    X = df_balanced[features]
-    y = df_balanced['target']
-
-    tscv = TimeSeriesSplit(n_splits=3)
-    acc_scores = []
+    X = training.feature_matrix(df, features)[idx]
+    y = y.to_numpy()[idx]
 
-    for train_idx, test_idx in tscv.split(X):
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    def make_model():
+        return XGBClassifier(n_estimators=150, max_depth=4, learning_rate=0.05,
+                             use_label_encoder=False, eval_metric='logloss', verbosity=0,
+                             n_jobs=model_threads())
 
-        if len(X_train) == 0 or len(y_train) == 0:
-            print("[INFO] Empty training split, skipping this fold.")
-            continue
-
-        model = XGBClassifier(n_estimators=150, max_depth=4, learning_rate=0.05,
-                              use_label_encoder=False, eval_metric='logloss', verbosity=0)
-        model.fit(X_train, y_train)
-        preds = model.predict(X_test)
-        acc_scores.append(accuracy_score(y_test, preds))
-
-    if not acc_scores:
-        print("[INFO] No valid folds to train.")
-        return None, 0
-
-    final_model = XGBClassifier(n_estimators=150, max_depth=4, learning_rate=0.05,
-                                use_label_encoder=False, eval_metric='logloss', verbosity=0)
-    final_model.fit(X, y)
-
-    return final_model, np.mean(acc_scores)
+    return training.cross_validate(make_model, X, y, n_splits=3)
 
 
+@profiling.timed('predict')
 def predict_signal(symbol, df, model):
     features = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
     latest = df[features].iloc[-1:]
     row = df.iloc[-1]
-    pred = model.predict(latest)[0]
     proba = model.predict_proba(latest)[0]
+    pred = int(proba[1] > 0.5)
     signal = "BUY 📈" if pred == 1 else "SELL 🖉"
 
     confidence_score = sum([
@@ -168,22 +95,26 @@ def predict_signal(symbol, df, model):
         f"{row['close'] * MULTIPLIER:.2f}"
     ]
 
-def run_signal_engine():
-    headers = ["Symbol", "Timestamp", "Signal", "Prob SELL", "Prob BUY", "RSI", "Confidence", f"Price x{MULTIPLIER}"]
+def accuracy_gate(acc):
+    return acc >= 0.7
+
+def process_symbol(symbol, df):
+    if df.empty or len(df) < 100:
+        return [symbol, "-", "❌ Insufficient data", "-", "-", "-", "-", "-"]
+    df = add_target(df)
+    if len(df) < 100:
+        return [symbol, "-", "⚠️ Not enough data", "-", "-", "-", "-", "-"]
+    model, acc, _ = model_registry.get_model(TIER, symbol, df, train_model, gate=accuracy_gate, ema_adjust=EMA_ADJUST)
+    if model is None or not accuracy_gate(acc):
+        return [symbol, "-", f"⚠️ Model skipped (acc={acc:.2f})", "-", "-", "-", "-", "-"]
+    return predict_signal(symbol, df, model_registry.serving_model(TIER, symbol, model) or model)
 
-    def process(symbol):
-        df = fetch_data(symbol)
-        if df.empty or len(df) < 100:
-            return [symbol, "-", "❌ Insufficient data", "-", "-", "-", "-", "-"]
-        df = add_features(df)
-        if len(df) < 100:
-            return [symbol, "-", "⚠️ Not enough data", "-", "-", "-", "-", "-"]
-        model, acc = train_model(df)
-        if model is None or acc < 0.7:
-            return [symbol, "-", f"⚠️ Model skipped (acc={acc:.2f})", "-", "-", "-", "-", "-"]
-        return predict_signal(symbol, df, model)
-
-    with ThreadPoolExecutor() as executor:
-        table = list(executor.map(process, SYMBOLS))
+def error_row(symbol, err):
+    return [symbol, "-", "❌ Error", "-", "-", "-", "-", "-"]
 
+def build_output(table):
+    headers = ["Symbol", "Timestamp", "Signal", "Prob SELL", "Prob BUY", "RSI", "Confidence", f"Price x{MULTIPLIER}"]
     return pd.DataFrame(table, columns=headers)
+
+def run_signal_engine(backend=None, workers=None):
+    return engine.run_tier(TIER, backend, workers)
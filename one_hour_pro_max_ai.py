@@ -1,10 +1,5 @@
 import pandas as pd
 import numpy as np
-import requests
-import datetime
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.utils import resample
 from sklearn.ensemble import VotingClassifier
 from sklearn.preprocessing import StandardScaler
 
@@ -12,120 +7,86 @@ from xgboost import XGBClassifier
 from lightgbm import LGBMClassifier
 from catboost import CatBoostClassifier
 
+import data_feed
+import engine
+import explain
+from cpu_budget import model_threads
+import execution
+import model_registry
+import pooled_model
+import profiling
+import signal_history
+import training
+import universe
+from features import add_indicators
+from api_scheduler import ApiKeyScheduler
+
 # === CONFIG ===
 API_KEYS = [
     '54a7479bdf2040d3a35d6b3ae6457f9d',
     'd162b35754ca4c54a13ebe7abecab4e0',
     'a7266b2503fd497496d47527a7e63b5d',
-    '54a7479bdf2040d3a35d6b3ae6457f9d',
     '09c09d58ed5e4cf4afd9a9cac8e09b5d',
     'df00920c02c54a59a426948a47095543'
 ]
+TIER = 'pro_max'
 INTERVAL = '1h'
-SYMBOLS = ['EUR/USD', 'USD/JPY', 'GBP/USD', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP','XAU/USD',"BTC/USD"]
+HISTORY_SIZE = 300
+EMA_ADJUST = True
+SYMBOLS = universe.tier_symbols(TIER, ['EUR/USD', 'USD/JPY', 'GBP/USD', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP','XAU/USD',"BTC/USD"])
 MULTIPLIER = 100
-api_usage_index = 0
-
-def get_next_api_key():
-    global api_usage_index
-    key = API_KEYS[api_usage_index % len(API_KEYS)]
-    api_usage_index += 1
-    return key
+TP_OFFSET = 0.0020
+SL_OFFSET = 0.0015
+KEY_SCHEDULER = ApiKeyScheduler(API_KEYS)
+EXECUTION_BACKEND = execution.DEFAULT_BACKEND or 'serial'
 
 def fetch_data(symbol):
-    try:
-        api_key = get_next_api_key()
-        url = f"https://api.twelvedata.com/time_series?symbol={symbol}&interval=1h&outputsize=300&apikey={api_key}"
-        r = requests.get(url, timeout=10)
-        data = r.json()
-        if "values" not in data:
-            return pd.DataFrame()
-        df = pd.DataFrame(data["values"])
-        df = df.astype({'open': float, 'high': float, 'low': float, 'close': float})
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        return df.sort_values('datetime')
-    except Exception as e:
-        print(f"[ERROR fetching {symbol}] - {e}")
-        return pd.DataFrame()
-
-def compute_rsi(series, period=14):
-    delta = series.diff()
-    gain = np.where(delta > 0, delta, 0)
-    loss = np.where(delta < 0, -delta, 0)
-    avg_gain = pd.Series(gain).rolling(period).mean()
-    avg_loss = pd.Series(loss).rolling(period).mean()
-    rs = avg_gain / (avg_loss + 1e-6)
-    return 100 - (100 / (1 + rs))
-
-def compute_macd(df):
-    ema12 = df['close'].ewm(span=12).mean()
-    ema26 = df['close'].ewm(span=26).mean()
-    macd = ema12 - ema26
-    signal = macd.ewm(span=9).mean()
-    return macd - signal
-
-def compute_adx(df, period=14):
-    high, low, close = df['high'], df['low'], df['close']
-    plus_dm = np.where((high.diff() > low.diff()) & (high.diff() > 0), high.diff(), 0)
-    minus_dm = np.where((low.diff() > high.diff()) & (low.diff() > 0), low.diff(), 0)
-    tr = np.maximum.reduce([high - low, abs(high - close.shift()), abs(low - close.shift())])
-    atr = pd.Series(tr).rolling(window=period).mean()
-    plus_di = 100 * pd.Series(plus_dm).rolling(window=period).mean() / (atr + 1e-6)
-    minus_di = 100 * pd.Series(minus_dm).rolling(window=period).mean() / (atr + 1e-6)
-    dx = (abs(plus_di - minus_di) / (plus_di + minus_di + 1e-6)) * 100
-    return pd.Series(dx).rolling(window=period).mean()
+    return data_feed.fetch_data(symbol, KEY_SCHEDULER, INTERVAL, HISTORY_SIZE)
 
-def add_features(df):
-    df['ma5'] = df['close'].rolling(5).mean()
-    df['ma10'] = df['close'].rolling(10).mean()
-    df['ema10'] = df['close'].ewm(span=10).mean()
-    df['rsi14'] = compute_rsi(df['close'])
-    df['momentum'] = df['close'] - df['close'].shift(4)
-    df['macd'] = compute_macd(df)
-    df['adx'] = compute_adx(df)
-    df['bb_upper'] = df['close'].rolling(20).mean() + 2 * df['close'].rolling(20).std()
-    df['bb_lower'] = df['close'].rolling(20).mean() - 2 * df['close'].rolling(20).std()
-    df['volatility'] = df['high'] - df['low']
+
+def add_target(df):
     df['target'] = np.where(df['close'].shift(-1) > df['close'], 1, 0)
     return df.dropna()
 
-def train_ensemble_model(df):
-    features = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
-    df_1 = df[df['target'] == 1]
-    df_0 = df[df['target'] == 0]
-    min_len = min(len(df_1), len(df_0))
-    df_bal = pd.concat([
-        resample(df_1, replace=True, n_samples=min_len, random_state=42),
-        resample(df_0, replace=True, n_samples=min_len, random_state=42)
-    ]).sample(frac=1).reset_index(drop=True)
+def add_features(df):
+    return add_target(add_indicators(df, EMA_ADJUST))
 
-    X = df_bal[features]
-    y = df_bal['target']
+def make_ensemble(feature_types=None):
+    # feature_types: per-column 'q'/'c' so XGBoost splits the pooled symbol id as a category
+    categorical = dict(enable_categorical=True, feature_types=feature_types) if feature_types else {}
+    xgb = XGBClassifier(n_estimators=100, max_depth=4, learning_rate=0.05, use_label_encoder=False, eval_metric='logloss', verbosity=0, n_jobs=model_threads(), **categorical)
+    lgbm = LGBMClassifier(n_estimators=100, max_depth=4, learning_rate=0.05, verbosity=-1, n_jobs=model_threads())
+    cat = CatBoostClassifier(iterations=100, depth=4, learning_rate=0.05, verbose=0, thread_count=model_threads())
+    return VotingClassifier(estimators=[('xgb', xgb), ('lgbm', lgbm), ('cat', cat)], voting='soft')
 
-    scaler = StandardScaler()
-    X_scaled = pd.DataFrame(scaler.fit_transform(X), columns=features)
+def train_ensemble_model(df):
+    features = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
+    idx = training.balanced_indices(df['target'].to_numpy(), random_state=42, shuffle_state=None)
+    if idx is None:
+        return None, 0, None
 
-    tscv = TimeSeriesSplit(n_splits=3)
-    acc_scores = []
+    X = training.feature_matrix(df, features, np.float64)[idx]
+    y = df['target'].to_numpy()[idx]
 
-    xgb = XGBClassifier(n_estimators=100, max_depth=4, learning_rate=0.05, use_label_encoder=False, eval_metric='logloss', verbosity=0)
-    lgbm = LGBMClassifier(n_estimators=100, max_depth=4, learning_rate=0.05, verbosity=-1)
-    cat = CatBoostClassifier(iterations=100, depth=4, learning_rate=0.05, verbose=0)
+    # Scale the balanced copy in place instead of allocating a second matrix; the stored
+    # scaler keeps copy=True for later callers
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X, copy=False)
 
-    for train_idx, test_idx in tscv.split(X_scaled):
-        X_train, X_test = X_scaled.iloc[train_idx], X_scaled.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    model, acc = training.cross_validate(make_ensemble, X_scaled, y, n_splits=3)
+    return model, acc, scaler
 
-        ensemble = VotingClassifier(estimators=[('xgb', xgb), ('lgbm', lgbm), ('cat', cat)], voting='soft')
-        ensemble.fit(X_train, y_train)
-        preds = ensemble.predict(X_test)
-        acc_scores.append(accuracy_score(y_test, preds))
+def top_features(model, features):
+    importances = np.mean([
+        model.named_estimators_['xgb'].feature_importances_,
+        model.named_estimators_['lgbm'].feature_importances_
+    ], axis=0)
 
-    final_ensemble = VotingClassifier(estimators=[('xgb', xgb), ('lgbm', lgbm), ('cat', cat)], voting='soft')
-    final_ensemble.fit(X_scaled, y)
-    return final_ensemble, np.mean(acc_scores), scaler
+    importance_df = pd.DataFrame({'Feature': features, 'Importance': importances})
+    return ', '.join(importance_df.sort_values(by='Importance', ascending=False).head(3)['Feature'])
 
-def predict(df, model, scaler, symbol, importance_info=None):
+@profiling.timed('predict')
+def predict(df, model, scaler, symbol, importance_info=None, proba=None):
     features = ['ma5', 'ma10', 'ema10', 'rsi14', 'momentum', 'macd', 'adx', 'bb_upper', 'bb_lower', 'volatility']
     
     # Use 2nd last row instead of last to prevent stale TP hits
@@ -134,8 +95,13 @@ def predict(df, model, scaler, symbol, importance_info=None):
     
     last = df.iloc[-2]  # <<< change here
     X_pred = df[features].iloc[[-2]]  # <<< change here
-    X_pred_scaled = pd.DataFrame(scaler.transform(X_pred), columns=features)
-    proba = model.predict_proba(X_pred_scaled)[0]
+    compiled = model_registry.serving_model(TIER, symbol, model, scaler) if proba is None else None
+    if compiled is not None:
+        proba = compiled.predict_proba(X_pred.to_numpy())[0]
+    if proba is None or importance_info is None:
+        X_pred_scaled = scaler.transform(X_pred.to_numpy())
+    if proba is None:
+        proba = model.predict_proba(X_pred_scaled)[0]
     signal = "BUY 📈" if proba[1] > 0.5 else "SELL 🔉"
 
     confidence = sum([
@@ -147,17 +113,13 @@ def predict(df, model, scaler, symbol, importance_info=None):
     ])
     conf_label = "✅ Strong" if confidence >= 4 else "⚠️ Weak"
     price = round(last['close'], 4)
-    tp = price + 0.0020 if signal == "BUY 📈" else price - 0.0020
-    sl = price - 0.0015 if signal == "BUY 📈" else price + 0.0015
-
-    # Feature importance
-    importances = np.mean([
-        model.named_estimators_['xgb'].feature_importances_,
-        model.named_estimators_['lgbm'].feature_importances_
-    ], axis=0)
+    tp = price + TP_OFFSET if signal == "BUY 📈" else price - TP_OFFSET
+    sl = price - SL_OFFSET if signal == "BUY 📈" else price + SL_OFFSET
 
-    importance_df = pd.DataFrame({'Feature': features, 'Importance': importances})
-    top_features = ', '.join(importance_df.sort_values(by='Importance', ascending=False).head(3)['Feature'])
+    # Per-signal drivers: TreeSHAP over all three members, cached next to the model
+    if importance_info is None:
+        values = explain.explain(TIER, symbol, model, X_pred_scaled, [str(last['datetime'])])
+        importance_info = top_features(model, features) if values is None else explain.top_drivers(values[0], features)
 
     return {
         "Symbol": symbol,
@@ -167,37 +129,92 @@ def predict(df, model, scaler, symbol, importance_info=None):
         "Confidence": conf_label,
         "Price x100": round(price * MULTIPLIER, 2),
         "Plan": f"{price} / TP: {round(tp, 4)} / SL: {round(sl, 4)}",
-        "Top Features": top_features
+        "Top Features": importance_info
     }
 
 
-def run_signal_engine():
-    results = []
-    for symbol in SYMBOLS:
-        print(f"🔄 Fetching data for {symbol}...")
-        df = fetch_data(symbol)
+def accuracy_gate(acc):
+    return acc > 0.7
+
+
+def process_symbol(symbol, df):
+    if df.empty or len(df) < 100:
+        print(f"⛔ Skipped {symbol}: Not enough data.")
+        return signal_history.Skipped(symbol, "Not enough data")
+
+    df = add_target(df)
+    model, acc, scaler = model_registry.get_model(TIER, symbol, df, train_ensemble_model, gate=accuracy_gate,
+                                                   ema_adjust=EMA_ADJUST)
+
+    if model is None or scaler is None:
+        print(f"⚠️ Skipped {symbol}: Model training failed.")
+        return signal_history.Skipped(symbol, "Model training failed")
+
+    if not accuracy_gate(acc):
+        print(f"⚠️ Skipped {symbol}: Low accuracy ({acc:.2f}).")
+        return signal_history.Skipped(symbol, f"Low accuracy ({acc:.2f})")
+
+    return predict(df, model, scaler, symbol)
 
+
+def process_pooled(frames):
+    # One ensemble over every symbol's rows and one batched predict_proba; the accuracy gate
+    # is still applied per symbol, from that symbol's rows in the held-out folds
+    ready, skipped = {}, []
+    for symbol, df in frames.items():
         if df.empty or len(df) < 100:
             print(f"⛔ Skipped {symbol}: Not enough data.")
+            skipped.append(signal_history.Skipped(symbol, "Not enough data"))
             continue
-
-        df = add_features(df)
-        model, acc, scaler = train_ensemble_model(df)
-
-        if model is None or scaler is None:
-            print(f"⚠️ Skipped {symbol}: Model training failed.")
+        ready[symbol] = add_target(df)
+    if not ready:
+        return skipped
+
+    feature_types = ['q'] * pooled_model.SYMBOL_INDEX + ['c']
+    model, accs, scaler = pooled_model.get_model(TIER, ready, SYMBOLS, lambda: make_ensemble(feature_types),
+                                                 scale=True, shuffle_state=None, ema_adjust=EMA_ADJUST)
+    if model is None:
+        print("⚠️ Pooled model training failed.")
+        return skipped + [signal_history.Skipped(symbol, "Model training failed") for symbol in ready]
+    print("[INFO] Pooled accuracy: " + ', '.join(f"{s} {accs.get(s, 0):.2f}" for s in ready))
+
+    # One batched predict_proba and one batched TreeSHAP call for every symbol
+    present = [s for s in SYMBOLS if s in ready]
+    X = pooled_model.design_matrix(scaler, ready, SYMBOLS, row=-2)
+    with profiling.span('predict_batch', rows=len(X)):
+        probas = dict(zip(present, model.predict_proba(X)))
+    keys = [(s, str(ready[s]['datetime'].iloc[-2])) for s in present]
+    values = explain.explain(TIER, pooled_model.REGISTRY_SYMBOL, model, X, keys)
+    drivers = {s: (explain.top_drivers(values[i], pooled_model.POOLED_FEATURES) if values is not None
+                   else top_features(model, pooled_model.POOLED_FEATURES)) for i, s in enumerate(present)}
+    results = skipped
+    for symbol in frames:
+        if symbol not in ready:
             continue
-
-        if acc <= 0.7:
+        acc = accs.get(symbol, 0)
+        if not accuracy_gate(acc):
             print(f"⚠️ Skipped {symbol}: Low accuracy ({acc:.2f}).")
+            results.append(signal_history.Skipped(symbol, f"Low accuracy ({acc:.2f})"))
             continue
+        results.append(predict(ready[symbol], model, scaler, symbol, importance_info=drivers[symbol], proba=probas[symbol]))
+    return results
+
 
-        results.append(predict(df, model, scaler, symbol))
+def error_row(symbol, err):
+    return signal_history.Skipped(symbol, "Error")
 
+
+def build_output(results):
+    results = [res for res in results if res]
     if not results:
         print("❌ No signals generated.")
     return pd.DataFrame(results)
 
+
+def run_signal_engine(backend=None, workers=None):
+    return engine.run_tier(TIER, backend, workers)
+
+
 if __name__ == "__main__":
     output = run_signal_engine()
     if not output.empty:
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+import model_registry
+import training
+from features import FEATURES
+
+# === CONFIG ===
+# Tiers (engine names, comma separated) that train one model over all their symbols
+POOLED_TIERS = set(filter(None, os.environ.get('POOLED_TIERS', '').split(',')))
+# Price-level columns, divided by close so every symbol shares one scale
+PRICE_FEATURES = ['ma5', 'ma10', 'ema10', 'momentum', 'macd', 'bb_upper', 'bb_lower', 'volatility']
+SYMBOL_COLUMN = 'symbol_id'
+POOLED_FEATURES = FEATURES + [SYMBOL_COLUMN]
+SYMBOL_INDEX = len(FEATURES)
+REGISTRY_SYMBOL = '_pooled'
+
+
+def is_pooled(tier):
+    return tier in POOLED_TIERS
+
+
+def stack(frames, symbols, rows=None):
+    # frames: {symbol: featurized df}; symbol ids are positions in the tier's symbol list so
+    # they stay stable across refreshes. rows=-2 etc. takes a single row per symbol.
+    parts = []
+    for code, symbol in enumerate(symbols):
+        if symbol not in frames:
+            continue
+        df = frames[symbol] if rows is None else frames[symbol].iloc[[rows]]
+        close = df['close'].to_numpy()
+        part = pd.DataFrame({name: df[name].to_numpy() / close if name in PRICE_FEATURES else df[name].to_numpy()
+                             for name in FEATURES})
+        part[SYMBOL_COLUMN] = code
+        if 'datetime' in df:
+            part['datetime'] = df['datetime'].to_numpy()
+        if 'target' in df:
+            part['target'] = df['target'].to_numpy()
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+class SymbolScaler:
+    # StandardScaler over the feature columns; the trailing symbol id passes through untouched
+    def __init__(self):
+        self.scaler = StandardScaler(copy=False)
+
+    def fit_transform(self, X):
+        X[:, :SYMBOL_INDEX] = self.scaler.fit_transform(X[:, :SYMBOL_INDEX])
+        return X
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X[:, :SYMBOL_INDEX] = self.scaler.transform(X[:, :SYMBOL_INDEX])
+        return X
+
+
+def train(df, make_model, scale=False, shuffle_state=42):
+    # Balances each symbol on its own, then fits one model on the shuffled union;
+    # returns (model, {symbol id: mean fold accuracy}, scaler)
+    ids = df[SYMBOL_COLUMN].to_numpy()
+    target = df['target'].to_numpy()
+    parts = []
+    for code in np.unique(ids):
+        rows = np.flatnonzero(ids == code)
+        idx = training.balanced_indices(target[rows], random_state=42, shuffle_state=42)
+        if idx is None:
+            print(f"[INFO] Symbol id {code} has a single class, left out of the pooled fit.")
+            continue
+        parts.append(rows[idx])
+    if not parts:
+        return None, {}, None
+    idx = np.concatenate(parts)
+    rng = np.random.RandomState(shuffle_state) if shuffle_state is not None else np.random
+    idx = idx[rng.choice(len(idx), size=len(idx), replace=False)]
+
+    X = training.feature_matrix(df, POOLED_FEATURES, np.float64)[idx]
+    scaler = SymbolScaler() if scale else None
+    if scaler is not None:
+        X = scaler.fit_transform(X)
+    model, acc = training.cross_validate(make_model, X, target[idx], n_splits=3,
+                                         groups=ids[idx], categorical=(SYMBOL_INDEX,))
+    return model, (acc or {}), scaler
+
+
+def get_model(tier, frames, symbols, make_model, scale=False, shuffle_state=42, **config):
+    # One registry entry per tier; returns (model, {symbol: acc}, scaler)
+    df = stack(frames, symbols)
+    train_fn = lambda data: train(data, make_model, scale, shuffle_state)
+    model, acc, scaler = model_registry.get_model(tier, REGISTRY_SYMBOL, df, train_fn, POOLED_FEATURES,
+                                                  symbols=tuple(symbols), **config)
+    return model, {symbols[int(code)]: value for code, value in (acc or {}).items()}, scaler
+
+
+def design_matrix(scaler, frames, symbols, row=-1):
+    # One model-ready row per symbol present in frames, in symbol-list order
+    X = training.feature_matrix(stack(frames, symbols, rows=row), POOLED_FEATURES, np.float64)
+    return X if scaler is None else scaler.transform(X)
+
+
+def predict_proba(model, scaler, frames, symbols, row=-1):
+    # One batched predict_proba for every symbol; returns {symbol: proba row}
+    present = [s for s in symbols if s in frames]
+    return dict(zip(present, model.predict_proba(design_matrix(scaler, frames, symbols, row))))
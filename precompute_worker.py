@@ -0,0 +1,198 @@
+import json
+import os
+import pickle
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+import pandas as pd
+
+import candle_store
+import cpu_budget
+import profiling
+from signal_cache import CACHE, candle_window
+
+# === CONFIG ===
+# A worker run as its own process (python precompute_worker.py, with PRECOMPUTE_IN_PROCESS=0
+# on the dashboard) publishes here only; both processes must see the same directory, which
+# separate process types on dyno-style hosts do not
+PUBLISH_DIR = os.environ.get('PUBLISH_DIR', os.path.join('data', 'published'))
+CLOSE_DELAY = 20          # seconds after the candle close before the first attempt
+JITTER = 10
+MAX_ATTEMPTS = 4
+RETRY_DELAY = 60
+# Seconds the in-process scheduler waits before its catch-up run, so the dashboard's first
+# render does not share the process with the ML imports
+START_DELAY = float(os.environ.get('PRECOMPUTE_START_DELAY', '60'))
+# FX and metals stop trading Friday 22:00 to Sunday 22:00 UTC (hours into the week); a
+# candle of that window never arrives, so it is not waited for. Crypto trades throughout
+WEEKEND = (4 * 24 + 22, 6 * 24 + 22)
+CRYPTO_BASES = set(os.environ.get('CRYPTO_BASES', 'BTC,ETH,LTC,XRP,SOL').split(','))
+# Dashboard tab name -> engine tier
+TIERS = {
+    '1H': 'standard',
+    'Pro': 'pro',
+    'Pro+': 'pro_plus',
+    'Pro Max': 'pro_max',
+}
+
+_status = {}
+_status_lock = threading.Lock()
+_thread = None
+
+
+def _path(name):
+    return os.path.join(PUBLISH_DIR, f"{name.replace(' ', '_').replace('+', '_plus')}.pkl")
+
+
+def publish(name, candle_hour, value, expires_at):
+    entry = {'value': value, 'computed_at': datetime.utcnow(), 'candle_hour': candle_hour, 'expires_at': expires_at}
+    CACHE.put((name, candle_hour), entry)
+    os.makedirs(PUBLISH_DIR, exist_ok=True)
+    tmp = f"{_path(name)}.tmp"
+    with open(tmp, 'wb') as fh:
+        pickle.dump(entry, fh)
+    os.replace(tmp, _path(name))
+    return entry
+
+
+def load_published(name, candle_hour):
+    try:
+        with open(_path(name), 'rb') as fh:
+            entry = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return entry if entry['candle_hour'] == candle_hour else None
+
+
+def update_status(name, **fields):
+    with _status_lock:
+        _status.setdefault(name, {}).update(fields)
+        os.makedirs(PUBLISH_DIR, exist_ok=True)
+        with open(os.path.join(PUBLISH_DIR, 'status.json'), 'w') as fh:
+            json.dump(_status, fh, indent=2, default=str)
+
+
+def timings():
+    # Stage spans of this process, or the ones a separate worker process published last
+    return profiling.spans() or profiling.load_json(os.path.join(PUBLISH_DIR, 'timings.json'))
+
+
+def get_status():
+    try:
+        with open(os.path.join(PUBLISH_DIR, 'status.json')) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        with _status_lock:
+            return dict(_status)
+
+
+def market_open(symbol, candle_hour):
+    # Whether the candle that just closed traded at all
+    if symbol.split('/')[0] in CRYPTO_BASES:
+        return True
+    closed = candle_hour - timedelta(hours=1)
+    return not WEEKEND[0] <= closed.weekday() * 24 + closed.hour < WEEKEND[1]
+
+
+def stale_symbols(profile, candle_hour):
+    # Symbols whose just-closed candle is not stored yet although their market traded it
+    closed = (candle_hour - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    stale = []
+    for symbol in profile.symbols:
+        last = candle_store.last_timestamp(symbol, profile.interval)
+        if (last is None or last < closed) and market_open(symbol, candle_hour):
+            stale.append(symbol)
+    return stale
+
+
+def merge_output(previous, output, symbols, order):
+    # Rows of the rerun symbols replace their previous ones, in the tier's symbol order
+    if previous is None or symbols is None or 'Symbol' not in previous:
+        return output
+    kept = previous[~previous['Symbol'].isin(symbols)]
+    frames = [df for df in (kept, output) if not df.empty]
+    if not frames:
+        return output
+    rank = {symbol: i for i, symbol in enumerate(order)}
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.sort_values('Symbol', key=lambda col: col.map(rank), kind='stable').reset_index(drop=True)
+
+
+def run_tiers(names, candle_hour, expires_at):
+    # All pending tiers share one fetch and one feature pass per attempt; retries refetch and
+    # rerun only the symbols still missing their candle (all of a pooled tier's symbols)
+    import engine  # deferred so the dashboard can import this module without the ML stack
+    pending = list(names)
+    outputs, rerun = {}, {}
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        for name in pending:
+            update_status(name, state='running', attempt=attempt, candle_hour=candle_hour,
+                          started_at=datetime.utcnow())
+        symbols = None if any(name not in rerun for name in pending) else set().union(*(rerun[n] for n in pending))
+        start = time.perf_counter()
+        try:
+            results = engine.run_tiers([TIERS[name] for name in pending], symbols=symbols)
+            duration = round(time.perf_counter() - start, 2)
+            for name in list(pending):
+                profile = engine.load_profile(TIERS[name])
+                outputs[name] = merge_output(outputs.get(name), results[TIERS[name]], symbols, profile.symbols)
+                stale = stale_symbols(profile, candle_hour)
+                if not stale or attempt == MAX_ATTEMPTS:
+                    publish(name, candle_hour, outputs[name], expires_at)
+                    update_status(name, state='published_stale' if stale else 'published',
+                                  rows=len(outputs[name]), duration_s=duration,
+                                  finished_at=datetime.utcnow(), last_error=None,
+                                  cpu=cpu_budget.last_usage(TIERS[name]))
+                    pending.remove(name)
+                else:
+                    rerun[name] = profile.symbols if engine.pooled_profile(profile) else stale
+                    update_status(name, state='waiting_for_candle',
+                                  last_error=f"latest candle not available yet for {', '.join(stale)}")
+        except Exception as e:
+            print(f"[ERROR precomputing {', '.join(pending)}] - {e}")
+            for name in pending:
+                update_status(name, state='failed', last_error=f"{type(e).__name__}: {e}")
+        os.makedirs(PUBLISH_DIR, exist_ok=True)
+        profiling.to_json(os.path.join(PUBLISH_DIR, 'timings.json'))
+        if not pending or datetime.utcnow() + timedelta(seconds=RETRY_DELAY * attempt) >= expires_at:
+            break
+        time.sleep(RETRY_DELAY * attempt + random.uniform(0, JITTER))
+    return {name: name not in pending for name in names}
+
+
+def run_all(now=None):
+    candle_hour, expires_at = candle_window(now)
+    return run_tiers(list(TIERS), candle_hour, expires_at)
+
+
+def seconds_until_next_run(now=None):
+    now = now or datetime.utcnow()
+    _, next_close = candle_window(now)
+    return (next_close - now).total_seconds() + CLOSE_DELAY + random.uniform(0, JITTER)
+
+
+def run_forever(run_now=True, delay=0):
+    time.sleep(delay)
+    candle_hour, _ = candle_window()
+    if run_now and any(load_published(name, candle_hour) is None for name in TIERS):
+        run_all()
+    while True:
+        time.sleep(seconds_until_next_run())
+        run_all()
+
+
+def start_in_process(run_now=True, delay=None):
+    # Scheduler thread inside the dashboard process; started at most once per process
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        delay = START_DELAY if delay is None else delay
+        _thread = threading.Thread(target=run_forever, args=(run_now, delay), name='precompute', daemon=True)
+        _thread.start()
+    return _thread
+
+
+if __name__ == "__main__":
+    run_forever()
@@ -0,0 +1,198 @@
+import collections
+import csv
+import functools
+import io
+import itertools
+import json
+import os
+import threading
+import time
+
+# === CONFIG ===
+# Per-stage timing spans; with PROFILE_STAGES=0 span() hands back one shared no-op object
+ENABLED = os.environ.get('PROFILE_STAGES', '1') != '0'
+# Most recent spans kept in memory, across all runs
+BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER', '20000'))
+FIELDS = ['run', 'tier', 'symbol', 'stage', 'started_at', 'wall_s', 'cpu_s', 'rows', 'error']
+
+_spans = collections.deque(maxlen=BUFFER_SIZE)
+_local = threading.local()
+_run_ids = itertools.count(1)
+
+
+class Span:
+    # wall and CPU seconds of the with-block; CPU is process time, so it includes the native
+    # threads a booster spawns (and anything else running in the process at the same time)
+    __slots__ = ('record', 'wall', 'cpu')
+
+    def __init__(self, stage, symbol, rows):
+        self.record = {'stage': stage, 'symbol': symbol, 'rows': rows}
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        wall, cpu = time.perf_counter() - self.wall, time.process_time() - self.cpu
+        record = dict(current(), **{k: v for k, v in self.record.items() if v is not None})
+        record.update(started_at=time.time() - wall, wall_s=wall, cpu_s=cpu,
+                      error=exc_type.__name__ if exc_type else None)
+        emit(record)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage, symbol=None, rows=None):
+    # with span('fit', rows=len(X)) as s: ...; s['rows'] = n also works inside the block
+    return Span(stage, symbol, rows) if ENABLED else _NO_SPAN
+
+
+def timed(stage):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current():
+    return getattr(_local, 'context', {})
+
+
+class context:
+    # Fields (run, tier, symbol) stamped on every span recorded by this thread inside the block
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __enter__(self):
+        self.previous = current()
+        _local.context = dict(self.previous, **self.fields)
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.context = self.previous
+        return False
+
+
+def new_run():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{next(_run_ids)}"
+
+
+def emit(record):
+    captured = getattr(_local, 'captured', None)
+    if captured is not None:
+        captured.append(record)
+    else:
+        _spans.append(record)
+
+
+class capture:
+    # Collects this thread's spans into a list instead of the buffer, so a worker process can
+    # return them with its result; the caller hands them to record()
+    def __enter__(self):
+        self.previous = getattr(_local, 'captured', None)
+        _local.captured = [] if ENABLED else None
+        return _local.captured
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.captured = self.previous
+        return False
+
+
+class carry:
+    # The creating thread's context fields and capture list (or those of origin, a carry made
+    # there), re-entered in a pool thread so its spans land where the creator's would; one
+    # instance per block, like context
+    def __init__(self, origin=None):
+        if origin is None:
+            self.fields, self.captured = current(), getattr(_local, 'captured', None)
+        else:
+            self.fields, self.captured = origin.fields, origin.captured
+
+    def __enter__(self):
+        self.previous = (current(), getattr(_local, 'captured', None))
+        _local.context, _local.captured = self.fields, self.captured
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.context, _local.captured = self.previous
+        return False
+
+
+def record(spans):
+    for s in spans or ():
+        emit(s)
+
+
+def spans(run=None, tier=None):
+    return [s for s in list(_spans)
+            if (run is None or s.get('run') == run) and (tier is None or s.get('tier') in (tier, None))]
+
+
+def clear():
+    _spans.clear()
+
+
+def to_csv(path=None, rows=None):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(spans() if rows is None else rows)
+    if path is None:
+        return out.getvalue()
+    with open(path, 'w', newline='') as f:
+        f.write(out.getvalue())
+
+
+def to_json(path=None, rows=None):
+    text = json.dumps(spans() if rows is None else rows, default=str)
+    if path is None:
+        return text
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def runs(rows, tier=None):
+    # Run ids that touched tier, oldest first
+    return list(dict.fromkeys(s['run'] for s in rows if s.get('run') and (tier is None or s.get('tier') == tier)))
+
+
+def breakdown(rows, tier=None, last_runs=20):
+    # (latest run per stage, p50/p95 per stage over the last runs); run-wide stages such as the
+    # shared fetch carry no tier and are counted for every tier of their run
+    import pandas as pd
+    ids = runs(rows, tier)[-last_runs:]
+    df = pd.DataFrame([s for s in rows if s.get('run') in ids and (tier is None or s.get('tier') in (tier, None))],
+                      columns=FIELDS)
+    if df.empty:
+        return df, df
+    df['rows'] = pd.to_numeric(df['rows'])
+    per_run = df.groupby(['run', 'stage'], sort=False).agg(
+        symbols=('symbol', 'nunique'), wall_s=('wall_s', 'sum'), cpu_s=('cpu_s', 'sum'), rows=('rows', 'sum'),
+        errors=('error', 'count')).reset_index()
+    latest = per_run[per_run['run'] == ids[-1]].drop(columns='run').set_index('stage')
+    spread = per_run.groupby('stage', sort=False)['wall_s'].quantile([0.5, 0.95]).unstack()
+    spread.columns = ['p50_wall_s', 'p95_wall_s']
+    spread.insert(0, 'runs', per_run.groupby('stage', sort=False)['run'].nunique())
+    return latest.round(3), spread.round(3)
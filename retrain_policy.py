@@ -0,0 +1,95 @@
+import os
+import time
+
+import numpy as np
+
+import training
+
+# === CONFIG ===
+# With the policy on, a new candle window reuses the last fitted model unless a trigger below
+# fires; RETRAIN_POLICY=0 retrains (or warm-starts) on every new window as before
+ENABLED = os.environ.get('RETRAIN_POLICY', '1') != '0'
+RETRAIN_AFTER_CANDLES = int(os.environ.get('RETRAIN_AFTER_CANDLES', '24'))
+MAX_MODEL_AGE_HOURS = float(os.environ.get('MAX_MODEL_AGE_HOURS', '72'))
+# PSI of the latest DRIFT_WINDOW candles against the last DRIFT_WINDOW the model was fitted on;
+# 0.25 is the usual "significant shift" cut-off
+PSI_THRESHOLD = float(os.environ.get('DRIFT_PSI_THRESHOLD', '0.25'))
+DRIFT_WINDOW = int(os.environ.get('DRIFT_WINDOW_CANDLES', '48'))
+DRIFT_BINS = 5
+# Candles with a known outcome needed before live accuracy is held against the tier's gate
+LIVE_MIN_CANDLES = int(os.environ.get('LIVE_ACCURACY_MIN_CANDLES', '12'))
+EPS = 1e-4
+
+INFER = 'infer'
+UPDATE = 'update'
+REFIT = 'refit'
+
+
+def _recent(df, candles):
+    # Rows of the last `candles` candle times (a pooled frame holds several symbols per time)
+    times = df['datetime'].to_numpy()
+    unique = np.unique(times)
+    return times >= unique[-min(candles, len(unique))]
+
+
+def _bin_shares(edges, X):
+    counts = [np.bincount(np.searchsorted(e, col, side='right'), minlength=len(e) + 1) for e, col in zip(edges, X.T)]
+    return np.array(counts) / max(len(X), 1)
+
+
+def reference(df, features):
+    # Stored with each fitted entry: the last candle it saw and the bins of its latest candles
+    if 'datetime' not in df:
+        return None
+    X = df.loc[_recent(df, DRIFT_WINDOW), list(features)].to_numpy(np.float64)
+    edges = np.quantile(X, np.linspace(0, 1, DRIFT_BINS + 1)[1:-1], axis=0).T
+    return {'end': df['datetime'].max(), 'edges': edges, 'shares': _bin_shares(edges, X)}
+
+
+def psi(ref, df, features):
+    X = df.loc[_recent(df, DRIFT_WINDOW), list(features)].to_numpy(np.float64)
+    expected = np.clip(ref['shares'], EPS, None)
+    actual = np.clip(_bin_shares(ref['edges'], X), EPS, None)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+
+
+def live_accuracy(entry, df, features, new):
+    # Hit rate on the candles since the fit whose next close is already known
+    known = new & (df['datetime'] < df['datetime'].max()).to_numpy()
+    candles = df.loc[known, 'datetime'].nunique()
+    if candles < LIVE_MIN_CANDLES:
+        return None, candles
+    X = training.feature_matrix(df[known], list(features), np.float64)
+    if entry.get('scaler') is not None:
+        X = entry['scaler'].transform(X)
+    return float(np.mean(entry['model'].predict(X) == df.loc[known, 'target'].to_numpy())), candles
+
+
+def decide(entry, df, features, gate=None):
+    # (action, reason) for a stored entry facing a new window: INFER serves it as is, UPDATE
+    # takes the usual warm-start-or-retrain path, REFIT skips the warm start
+    if not ENABLED:
+        return UPDATE, "retrain policy off"
+    ref = entry.get('reference')
+    if ref is None or 'datetime' not in df:
+        return UPDATE, "no fit reference stored with the model"
+    stored = entry.get('acc')
+    if gate is not None and np.isscalar(stored) and not gate(stored):
+        # Served as is it would stay skipped until another trigger fires
+        return REFIT, f"stored accuracy {stored:.2f} fails the gate"
+    new = (df['datetime'] > ref['end']).to_numpy()
+    candles = df.loc[new, 'datetime'].nunique()
+    if RETRAIN_AFTER_CANDLES and candles >= RETRAIN_AFTER_CANDLES:
+        return UPDATE, f"{candles} new candles since the last fit"
+    age = (time.time() - entry.get('fitted_at', entry.get('saved_at', 0))) / 3600
+    if MAX_MODEL_AGE_HOURS and age >= MAX_MODEL_AGE_HOURS:
+        return UPDATE, f"model is {age:.0f}h old"
+    drift = psi(ref, df, features)
+    worst = int(np.argmax(drift))
+    if drift[worst] > PSI_THRESHOLD:
+        return REFIT, f"drift on {list(features)[worst]} (PSI {drift[worst]:.2f})"
+    acc, known = live_accuracy(entry, df, features, new) if gate is not None else (None, 0)
+    if acc is not None and not gate(acc):
+        return REFIT, f"live accuracy {acc:.2f} over {known} candles fails the gate"
+    live = f", live accuracy {acc:.2f}" if acc is not None else ""
+    return INFER, f"{candles} new candle(s), max PSI {drift[worst]:.2f}{live}, {age:.1f}h old"
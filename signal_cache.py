@@ -0,0 +1,71 @@
+import threading
+from datetime import datetime, timedelta
+
+
+def candle_window(now=None):
+    # (candle hour, next candle close) for the 1h candle that is currently forming
+    now = now or datetime.utcnow()
+    hour = now.replace(minute=0, second=0, microsecond=0)
+    return hour, hour + timedelta(hours=1)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SignalCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flights = {}
+
+    def _evict(self, now):
+        for key in [k for k, entry in self._entries.items() if entry['expires_at'] <= now]:
+            del self._entries[key]
+
+    def peek(self, key, now=None):
+        with self._lock:
+            self._evict(now or datetime.utcnow())
+            return self._entries.get(key)
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+
+    def get_or_compute(self, key, compute, expires_at, now=None):
+        # Single flight: concurrent callers for the same key share one compute() call
+        with self._lock:
+            self._evict(now or datetime.utcnow())
+            if key in self._entries:
+                return self._entries[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            entry = {'value': compute(), 'computed_at': datetime.utcnow(), 'expires_at': expires_at}
+            with self._lock:
+                self._entries[key] = entry
+            flight.value = entry
+            return entry
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+# Imported modules outlive Streamlit reruns, so this is shared by every session in the process
+CACHE = SignalCache()
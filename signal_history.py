@@ -0,0 +1,160 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from signal_cache import candle_window
+
+# === CONFIG ===
+DB_PATH = os.environ.get('SIGNAL_DB_PATH', os.path.join('data', 'signals.db'))
+ENABLED = os.environ.get('SIGNAL_HISTORY', '1') != '0'
+COLUMNS = ['symbol', 'candle', 'tier', 'recorded_at', 'signal', 'prob_buy', 'confidence', 'rsi', 'price', 'detail']
+_LEADING_SYMBOLS = re.compile(r'^\W+')
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+class Skipped:
+    # Result of a symbol that produced no signal; falsy, so build_output drops it like None,
+    # but the reason still reaches the history
+    __slots__ = ('symbol', 'reason')
+
+    def __init__(self, symbol, reason):
+        self.symbol = symbol
+        self.reason = reason
+
+    def __bool__(self):
+        return False
+
+
+def _connect(db_path=None):
+    path = db_path or DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    with _init_lock:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Append-only; candle and recorded_at are epoch seconds (UTC). The key serves "last N
+            # for a symbol" (optionally one tier), the candle index "every tier at hour T"
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS signals (
+                    symbol TEXT NOT NULL,
+                    candle INTEGER NOT NULL,
+                    tier TEXT NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    signal TEXT NOT NULL,
+                    prob_buy REAL, confidence TEXT, rsi REAL, price REAL, detail TEXT,
+                    PRIMARY KEY (symbol, candle, tier, recorded_at)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS signals_by_candle ON signals (candle, tier)")
+            conn.commit()
+            _initialized.add(path)
+    return conn
+
+
+def _epoch(value):
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _strip(text):
+    return _LEADING_SYMBOLS.sub('', str(text)).strip()
+
+
+def _signal(text):
+    # ('BUY' | 'SELL' | 'SKIP' | 'ERROR', reason) from an output row's Signal cell
+    text = _strip(text)
+    for action in ('BUY', 'SELL'):
+        if text.startswith(action):
+            return action, None
+    return ('ERROR' if text.startswith('Error') else 'SKIP'), text
+
+
+def _number(value):
+    number = pd.to_numeric(value, errors='coerce')
+    return None if pd.isna(number) else float(number)
+
+
+def rows(tier, output, skipped=(), candles=None, recorded_at=None):
+    # History rows for one tier's output DataFrame plus its Skipped results; candles maps
+    # symbol -> newest candle the refresh saw, which keys the row. A symbol without one (its
+    # fetch failed or came back empty) is keyed by the refresh's candle hour instead
+    candles = candles or {}
+    recorded_at = recorded_at or time.time()
+    refresh_hour = _epoch(candle_window(pd.Timestamp(recorded_at, unit='s'))[0])
+    candle = lambda symbol: _epoch(candles[symbol]) if symbol in candles else refresh_hour
+    price = next((c for c in output.columns if str(c).startswith('Price')), None)
+    details = [c for c in ('Plan', 'Top Features') if c in output.columns]
+    out = []
+    for record in output.to_dict('records'):
+        symbol = record.get('Symbol')
+        if not symbol:
+            continue
+        signal, reason = _signal(record.get('Signal', ''))
+        detail = reason or ' | '.join(str(record[c]) for c in details if pd.notna(record[c])) or None
+        confidence = record.get('Confidence')
+        out.append((symbol, candle(symbol), tier, recorded_at, signal, _number(record.get('Prob BUY')),
+                    _strip(confidence) if isinstance(confidence, str) and confidence != '-' else None,
+                    _number(record.get('RSI')), _number(record.get(price)) if price else None, detail))
+    for skip in skipped:
+        signal = 'ERROR' if skip.reason.startswith('Error') else 'SKIP'
+        out.append((skip.symbol, candle(skip.symbol), tier, recorded_at, signal,
+                    None, None, None, None, skip.reason))
+    return out
+
+
+def record(history_rows, db_path=None):
+    # One transaction for the whole batch (every tier of a refresh)
+    if not history_rows:
+        return 0
+    conn = _connect(db_path)
+    try:
+        conn.executemany(f"INSERT OR IGNORE INTO signals VALUES ({', '.join('?' * len(COLUMNS))})", history_rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(history_rows)
+
+
+def _frame(values):
+    df = pd.DataFrame(values, columns=COLUMNS)
+    df['candle'] = pd.to_datetime(df['candle'], unit='s')
+    df['recorded_at'] = pd.to_datetime(df['recorded_at'], unit='s')
+    return df
+
+
+def last_signals(symbol, n=10, tier=None, db_path=None):
+    # Newest first
+    query = f"SELECT {', '.join(COLUMNS)} FROM signals WHERE symbol = ?"
+    params = [symbol]
+    if tier:
+        query += " AND tier = ?"
+        params.append(tier)
+    query += " ORDER BY candle DESC, recorded_at DESC LIMIT ?"
+    params.append(int(n))
+    conn = _connect(db_path)
+    try:
+        return _frame(conn.execute(query, params).fetchall())
+    finally:
+        conn.close()
+
+
+def at_hour(candle, tier=None, db_path=None):
+    # Every tier's (or one tier's) signals for one candle; the latest recording per tier and symbol
+    query = f"SELECT {', '.join(COLUMNS)} FROM signals WHERE candle = ?"
+    params = [_epoch(candle)]
+    if tier:
+        query += " AND tier = ?"
+        params.append(tier)
+    conn = _connect(db_path)
+    try:
+        df = _frame(conn.execute(query + " ORDER BY tier, symbol, recorded_at", params).fetchall())
+    finally:
+        conn.close()
+    return df.drop_duplicates(['tier', 'symbol'], keep='last').reset_index(drop=True)
@@ -0,0 +1,415 @@
+import itertools
+import json
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import features
+from features import EPS, FEATURES, OHLC
+
+# === CONFIG ===
+# Incremental featurizing in the refresh path; 0 recomputes every symbol's window each refresh
+ENABLED = os.environ.get('STREAM_FEATURES', '1') != '0'
+# Per-symbol indicator state and feature rows, so a restart resumes the stream instead of warming up
+STATE_DIR = os.environ.get('INDICATOR_STATE_DIR', os.path.join('data', 'indicator_state'))
+
+NAN = float('nan')
+
+_streams = {}
+_lock = threading.Lock()
+
+
+class RollingWindow:
+    def __init__(self, window, values=()):
+        self.window = window
+        self.values = deque(values, maxlen=window)
+
+    def update(self, value):
+        self.values.append(value)
+
+    def mean(self, n=None):
+        # Summed oldest-first like features.rolling_mean: O(window), independent of history length
+        n = n or self.window
+        if len(self.values) < n:
+            return NAN
+        total = 0.0
+        for v in itertools.islice(self.values, len(self.values) - n, None):
+            total += v
+        return total / n
+
+    def std(self, mean):
+        if len(self.values) < self.window:
+            return NAN
+        total = 0.0
+        for v in self.values:
+            total += (v - mean) * (v - mean)
+        return math.sqrt(total / (self.window - 1))
+
+    def copy(self):
+        return RollingWindow(self.window, self.values)
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['window'], data['values'])
+
+
+class EMAState:
+    def __init__(self, span, adjust=False, value=None, num=0.0, den=0.0):
+        self.span = span
+        self.adjust = adjust
+        self.alpha = 2.0 / (span + 1)
+        self.decay = 1.0 - self.alpha
+        self.value = value
+        self.num = num
+        self.den = den
+
+    def update(self, x):
+        # The recursions features.ema runs through lfilter, one step at a time
+        if self.adjust:
+            self.num = x + self.decay * self.num
+            self.den = 1.0 + self.decay * self.den
+            self.value = self.num / self.den
+        else:
+            self.value = self.alpha * x + self.decay * (x if self.value is None else self.value)
+        return self.value
+
+    def copy(self):
+        return EMAState(self.span, self.adjust, self.value, self.num, self.den)
+
+    def to_dict(self):
+        return {'span': self.span, 'adjust': self.adjust, 'value': self.value, 'num': self.num, 'den': self.den}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class RSIState:
+    def __init__(self, period=14):
+        self.prev_close = None
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+
+    def update(self, close):
+        delta = NAN if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.gains.update(delta if delta > 0 else 0.0)
+        self.losses.update(-delta if delta < 0 else 0.0)
+        rs = self.gains.mean() / (self.losses.mean() + EPS)
+        return 100 - (100 / (1 + rs))
+
+    def copy(self):
+        state = RSIState(self.gains.window)
+        state.prev_close, state.gains, state.losses = self.prev_close, self.gains.copy(), self.losses.copy()
+        return state
+
+    def to_dict(self):
+        return {'prev_close': self.prev_close, 'gains': self.gains.to_dict(), 'losses': self.losses.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['gains']['window'])
+        state.prev_close = data['prev_close']
+        state.gains = RollingWindow.from_dict(data['gains'])
+        state.losses = RollingWindow.from_dict(data['losses'])
+        return state
+
+
+class MACDState:
+    def __init__(self, adjust=False):
+        self.fast = EMAState(12, adjust)
+        self.slow = EMAState(26, adjust)
+        self.signal = EMAState(9, adjust)
+
+    def update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        return line - self.signal.update(line)
+
+    def copy(self):
+        state = MACDState()
+        state.fast, state.slow, state.signal = self.fast.copy(), self.slow.copy(), self.signal.copy()
+        return state
+
+    def to_dict(self):
+        return {name: getattr(self, name).to_dict() for name in ('fast', 'slow', 'signal')}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for name in ('fast', 'slow', 'signal'):
+            setattr(state, name, EMAState.from_dict(data[name]))
+        return state
+
+
+class ADXState:
+    WINDOWS = ('plus_dm', 'minus_dm', 'tr', 'dx')
+
+    def __init__(self, period=14):
+        self.prev = None
+        for name in self.WINDOWS:
+            setattr(self, name, RollingWindow(period))
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            high_diff = low_diff = tr = NAN
+        else:
+            prev_high, prev_low, prev_close = self.prev
+            high_diff, low_diff = high - prev_high, low - prev_low
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev = (high, low, close)
+        self.plus_dm.update(high_diff if high_diff > low_diff and high_diff > 0 else 0.0)
+        self.minus_dm.update(low_diff if low_diff > high_diff and low_diff > 0 else 0.0)
+        self.tr.update(tr)
+        atr = self.tr.mean() + EPS
+        plus_di = 100 * self.plus_dm.mean() / atr
+        minus_di = 100 * self.minus_dm.mean() / atr
+        self.dx.update((abs(plus_di - minus_di) / (plus_di + minus_di + EPS)) * 100)
+        return self.dx.mean()
+
+    def copy(self):
+        state = ADXState(self.tr.window)
+        state.prev = self.prev
+        for name in self.WINDOWS:
+            setattr(state, name, getattr(self, name).copy())
+        return state
+
+    def to_dict(self):
+        return {'prev': self.prev, **{name: getattr(self, name).to_dict() for name in self.WINDOWS}}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['tr']['window'])
+        state.prev = tuple(data['prev']) if data['prev'] else None
+        for name in cls.WINDOWS:
+            setattr(state, name, RollingWindow.from_dict(data[name]))
+        return state
+
+
+class IndicatorState:
+    # Everything needed to produce the FEATURES row of one more candle in constant time
+    def __init__(self, adjust=False):
+        self.adjust = adjust
+        self.closes = RollingWindow(20)
+        self.ema10 = EMAState(10, adjust)
+        self.rsi = RSIState()
+        self.macd = MACDState(adjust)
+        self.adx = ADXState()
+
+    def update(self, high, low, close):
+        self.closes.update(close)
+        ma20 = self.closes.mean()
+        band = 2 * self.closes.std(ma20)
+        row = {
+            'ma5': self.closes.mean(5),
+            'ma10': self.closes.mean(10),
+            'ema10': self.ema10.update(close),
+            'rsi14': self.rsi.update(close),
+            'momentum': close - self.closes.values[-5] if len(self.closes.values) >= 5 else NAN,
+            'macd': self.macd.update(close),
+            'adx': self.adx.update(high, low, close),
+            'bb_upper': ma20 + band,
+            'bb_lower': ma20 - band,
+            'volatility': high - low,
+        }
+        return [row[name] for name in FEATURES]
+
+    def copy(self):
+        state = IndicatorState(self.adjust)
+        state.closes, state.ema10, state.rsi = self.closes.copy(), self.ema10.copy(), self.rsi.copy()
+        state.macd, state.adx = self.macd.copy(), self.adx.copy()
+        return state
+
+    def to_dict(self):
+        return {'adjust': self.adjust, 'closes': self.closes.to_dict(), 'ema10': self.ema10.to_dict(),
+                'rsi': self.rsi.to_dict(), 'macd': self.macd.to_dict(), 'adx': self.adx.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['adjust'])
+        state.closes = RollingWindow.from_dict(data['closes'])
+        state.ema10 = EMAState.from_dict(data['ema10'])
+        state.rsi = RSIState.from_dict(data['rsi'])
+        state.macd = MACDState.from_dict(data['macd'])
+        state.adx = ADXState.from_dict(data['adx'])
+        return state
+
+
+def _ema_tail(x, span, adjust):
+    # Last value of features.ema along the time axis, plus the adjust=True running sums
+    if not adjust:
+        return features.ema(x, span)[..., -1], None, None
+    from scipy.signal import lfilter  # deferred like features.ema
+    decay = 1.0 - 2.0 / (span + 1)
+    num = lfilter([1.0], [1.0, -decay], x, axis=-1)[..., -1]
+    den = lfilter([1.0], [1.0, -decay], np.ones(x.shape[-1]))[-1]
+    return num / den, num, den
+
+
+def warm_states(ohlc, adjust=False):
+    # ohlc: (symbols, time, 4) array -> each symbol's state after its last candle, read off the
+    # same vectorized series features.compute_features builds, so streaming on from it matches
+    # add_indicators over the whole history
+    ohlc = np.asarray(ohlc, dtype=float)
+    states = [IndicatorState(adjust) for _ in range(len(ohlc))]
+    if ohlc.shape[1] == 0:
+        return states
+    high, low, close = (np.ascontiguousarray(ohlc[..., i]) for i in (1, 2, 3))
+    gain, loss = features.rsi_terms(close)
+    adx_terms = features.adx_terms(high, low, close)
+    emas = {name: _ema_tail(close, span, adjust) for name, span in (('ema10', 10), ('fast', 12), ('slow', 26))}
+    line = features.ema(close, 12, adjust) - features.ema(close, 26, adjust)
+    emas['signal'] = _ema_tail(line, 9, adjust)
+    for i, state in enumerate(states):
+        state.closes.values.extend(close[i, -20:].tolist())
+        state.rsi.prev_close = float(close[i, -1])
+        state.rsi.gains.values.extend(gain[i, -14:].tolist())
+        state.rsi.losses.values.extend(loss[i, -14:].tolist())
+        state.adx.prev = tuple(ohlc[i, -1, 1:].tolist())
+        for name, series in zip(ADXState.WINDOWS, adx_terms):
+            getattr(state.adx, name).values.extend(series[i, -14:].tolist())
+        for name, (value, num, den) in emas.items():
+            ema = state.ema10 if name == 'ema10' else getattr(state.macd, name)
+            ema.value = float(value[i])
+            if adjust:
+                ema.num, ema.den = float(num[i]), float(den)
+    return states
+
+
+class FeatureStream:
+    # A symbol's feature rows for its closed candles and the indicator state after the last one
+    def __init__(self, state, times, values, last):
+        self.state = state
+        self.times = times
+        self.values = values
+        self.last = last
+
+    def extend(self, times, ohlc):
+        # Feature rows for a frame that continues this stream, or None when it does not: the
+        # last closed candle is missing or was revised, or the frame reaches further back.
+        # Every row but the frame's last is a closed candle; the last may still be forming, so
+        # it is computed on a copy of the state.
+        pos = int(np.searchsorted(times, self.times[-1]))
+        if pos == len(times) or times[pos] != self.times[-1] or not np.array_equal(ohlc[pos], self.last):
+            return None
+        start = len(self.times) - 1 - pos
+        if start < 0:
+            return None
+        closed = [self.state.update(*ohlc[i, 1:].tolist()) for i in range(pos + 1, len(times) - 1)]
+        rows = list(closed)
+        if pos < len(times) - 1:
+            rows.append(self.state.copy().update(*ohlc[-1, 1:].tolist()))
+        out = np.vstack([self.values[start:], np.array(rows).reshape(-1, len(FEATURES))])
+        if closed:
+            keep = max(len(self.times), len(times) - 1)
+            self.values = np.vstack([self.values, closed])[-keep:]
+            self.times = np.concatenate([self.times, times[pos + 1:-1]])[-keep:]
+            self.last = ohlc[-2].copy()
+        return out
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as fh:
+            np.savez(fh, times=self.times, values=self.values, last=self.last,
+                     state=np.array(json.dumps(self.state.to_dict())))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(IndicatorState.from_dict(json.loads(str(data['state']))),
+                       data['times'], data['values'], data['last'])
+
+
+def _path(symbol, interval, adjust):
+    mode = 'adjusted' if adjust else 'recursive'
+    return os.path.join(STATE_DIR, interval, f"{symbol.replace('/', '_')}-{mode}.npz")
+
+
+def _save(stream, symbol, interval, adjust):
+    # Lost state only costs a warm-up after the next restart, so it never fails a refresh
+    try:
+        stream.save(_path(symbol, interval, adjust))
+    except Exception as e:
+        print(f"[WARN] Could not save indicator state for {symbol} - {e}")
+
+
+def _stream(symbol, interval, adjust):
+    key = (symbol, interval, adjust)
+    if key not in _streams:
+        path = _path(symbol, interval, adjust)
+        if not os.path.exists(path):
+            return None
+        try:
+            _streams[key] = FeatureStream.load(path)
+        except Exception as e:
+            print(f"[WARN] Could not load {path} - {e}")
+            return None
+    return _streams[key]
+
+
+def _times(df):
+    # candle_store frames are parsed already; pd.to_datetime would walk them element by element
+    stamps = df['datetime']
+    if not pd.api.types.is_datetime64_any_dtype(stamps):
+        stamps = pd.to_datetime(stamps)
+    return stamps.to_numpy('datetime64[ns]').view('int64')
+
+
+def _assign(df, values, columns):
+    picked = [i for i, name in enumerate(FEATURES) if name in columns]
+    names = [FEATURES[i] for i in picked]
+    if not any(name in df.columns for name in names):
+        # Joined as one block: column-by-column inserts cost more than streaming the candles
+        return pd.concat([df, pd.DataFrame(values[:, picked], columns=names, index=df.index)], axis=1)
+    for i, name in zip(picked, names):
+        df[name] = values[:, i]
+    return df
+
+
+def stream_indicators_many(frames, adjust=False, columns=FEATURES, interval='1h'):
+    # Same result as features.add_indicators_many for a symbol seen for the first time. After
+    # that only its new candles go through the indicator state, so the cost per candle stays
+    # flat as history grows. Rows already computed are kept as they were: a sliding window's
+    # first rows keep the values the longer history gave them instead of restarting the EMAs.
+    out, cold = {}, {}
+    with _lock:
+        for symbol, df in frames.items():
+            stream = _stream(symbol, interval, adjust) if len(df) >= 2 else None
+            if stream is None:
+                cold[symbol] = df
+                continue
+            times = _times(df)
+            last = stream.times[-1]
+            values = stream.extend(times, df[OHLC].to_numpy(dtype=float))
+            if values is None:
+                cold[symbol] = df
+                continue
+            if stream.times[-1] != last:
+                _save(stream, symbol, interval, adjust)
+            out[symbol] = _assign(df, values, columns)
+
+        by_length = {}
+        for symbol, df in cold.items():
+            by_length.setdefault(len(df), []).append(symbol)
+        for length, symbols in by_length.items():
+            if length < 2:
+                out.update(features.add_indicators_many({s: cold[s] for s in symbols}, adjust, columns))
+                continue
+            ohlc = np.stack([cold[s][OHLC].to_numpy(dtype=float) for s in symbols])
+            values = features.compute_features(ohlc, adjust)
+            for i, state in enumerate(warm_states(ohlc[:, :-1], adjust)):
+                symbol, df = symbols[i], cold[symbols[i]]
+                times = _times(df)
+                stream = FeatureStream(state, times[:-1].copy(), values[i, :-1].copy(), ohlc[i, -2].copy())
+                _streams[(symbol, interval, adjust)] = stream
+                _save(stream, symbol, interval, adjust)
+                out[symbol] = _assign(df, values[i], columns)
+    return {s: out[s] for s in frames}
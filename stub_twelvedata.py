@@ -0,0 +1,146 @@
+import json
+import zlib
+import time
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+# === CONFIG ===
+HISTORY = 5000
+BASE_PRICES = {'USD/JPY': 150.0, 'XAU/USD': 2300.0, 'BTC/USD': 60000.0}
+
+
+def synthetic_series(symbol, n=HISTORY, seed=42, end=None, regime_switch=0.0):
+    # Geometric random walk; with regime_switch > 0 (per-candle switch probability) it alternates
+    # between calm and volatile regimes, each segment with its own drift
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+    end = end or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    returns = rng.normal(0, 0.002, n)
+    wick_up, wick_down = np.abs(rng.normal(0, 0.001, n)), np.abs(rng.normal(0, 0.001, n))
+    if regime_switch:
+        segment = np.cumsum(rng.random(n) < regime_switch)
+        drift = rng.normal(0, 0.0005, segment[-1] + 1)[segment]
+        vol = np.where(segment % 2, 2.0, 0.6)
+        returns, wick_up, wick_down = returns * vol + drift, wick_up * vol, wick_down * vol
+    close = BASE_PRICES.get(symbol, 1.0) * np.exp(np.cumsum(returns))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + wick_up)
+    low = np.minimum(open_, close) * (1 - wick_down)
+    stamps = [(end - timedelta(hours=n - 1 - i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(n)]
+    return [{'datetime': t, 'open': f"{o:.5f}", 'high': f"{h:.5f}", 'low': f"{l:.5f}", 'close': f"{c:.5f}"}
+            for t, o, h, l, c in zip(stamps, open_, high, low, close)]
+
+
+class StubTwelveData:
+
+    def __init__(self, history=HISTORY, latency=0.0, seed=42, port=0, credits_per_minute=None, regime_switch=0.0):
+        self.history = history
+        self.latency = latency
+        self.seed = seed
+        self.regime_switch = regime_switch
+        self.credits_per_minute = credits_per_minute
+        self.request_count = 0
+        self._credits = {}
+        self.bytes_sent = 0
+        self._series = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def series(self, symbol):
+        with self._lock:
+            if symbol not in self._series:
+                self._series[symbol] = synthetic_series(symbol, self.history, self.seed, regime_switch=self.regime_switch)
+            return self._series[symbol]
+
+    def rate_limited(self, key, credits=1):
+        if self.credits_per_minute is None:
+            return False
+        minute = int(time.time() // 60)
+        with self._lock:
+            used = self._credits.get((key, minute), 0) + credits
+            self._credits[(key, minute)] = used
+        return used > self.credits_per_minute
+
+    def respond(self, query):
+        symbol = query.get('symbol', [''])[0]
+        if not symbol:
+            return {'code': 400, 'message': 'symbol is required', 'status': 'error'}
+        # Comma separated symbols cost a credit each and come back keyed by symbol
+        symbols = symbol.split(',')
+        if self.rate_limited(query.get('apikey', [''])[0], len(symbols)):
+            return {'code': 429, 'message': 'You have run out of API credits for the current minute.',
+                    'status': 'error'}
+        if len(symbols) > 1:
+            return {s: self.series_response(s, query) for s in symbols}
+        return self.series_response(symbol, query)
+
+    def series_response(self, symbol, query):
+        values = self.series(symbol)
+        if 'start_date' in query:
+            start = query['start_date'][0]
+            values = [v for v in values if v['datetime'] >= start]
+        outputsize = int(query.get('outputsize', [30])[0])
+        values = values[-outputsize:][::-1]
+        return {'meta': {'symbol': symbol, 'interval': query.get('interval', ['1h'])[0]},
+                'values': values, 'status': 'ok'}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = json.dumps(stub.respond(parse_qs(urlparse(self.path).query))).encode()
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve synthetic TwelveData candles locally")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--regime-switch', type=float, default=0.0, help="per-candle regime switch probability")
+    args = parser.parse_args()
+    stub = StubTwelveData(latency=args.latency, port=args.port, regime_switch=args.regime_switch).start()
+    print(f"Stub TwelveData running at {stub.url} (set TWELVEDATA_BASE_URL to use it)")
+    stub._thread.join()
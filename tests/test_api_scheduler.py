@@ -0,0 +1,93 @@
+import itertools
+
+import pytest
+
+import api_scheduler
+import candle_store
+from api_scheduler import ApiKeyScheduler
+
+_names = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'candles.db')
+    monkeypatch.setattr(candle_store, 'DB_PATH', path)
+    return path
+
+
+def keys(n):
+    # Buckets are module-wide per key, so every test gets fresh key names
+    return [f"test-key-{next(_names):04d}" for _ in range(n)]
+
+
+def forget(names):
+    # Drops this process's buckets, as if another process were using the keys
+    for name in names:
+        api_scheduler._buckets.pop(name, None)
+
+
+def test_acquire_takes_credits_from_the_fullest_key():
+    a, b = keys(2)
+    scheduler = ApiKeyScheduler([a, b], per_minute=4, per_day=100)
+    assert scheduler.acquire(timeout=0, credits=3) == a
+    # a has 1 credit left, b still 4
+    assert scheduler.acquire(timeout=0) == b
+    assert scheduler.acquire(timeout=0, credits=4) is None
+
+
+def test_rate_limited_key_backs_off_to_another_key():
+    a, b = keys(2)
+    scheduler = ApiKeyScheduler([a, b], per_minute=4, per_day=100)
+    scheduler.report_rate_limited(a, cooldown=60)
+    assert [scheduler.acquire(timeout=0) for _ in range(4)] == [b] * 4
+    assert scheduler.acquire(timeout=0) is None
+
+
+def test_acquire_prefers_a_key_outside_exclude():
+    a, b = keys(2)
+    scheduler = ApiKeyScheduler([a, b], per_minute=4, per_day=100)
+    assert scheduler.acquire(timeout=0, exclude=(a,)) == b
+    assert scheduler.acquire(timeout=0, exclude=(a, b)) in (a, b)
+
+
+def test_acquire_waits_for_a_refill():
+    (a,) = keys(1)
+    scheduler = ApiKeyScheduler([a], per_minute=600, per_day=1000)
+    assert scheduler.acquire(timeout=0, credits=600) == a
+    # 600 per minute refills one credit every 0.1s
+    assert scheduler.acquire(timeout=2) == a
+
+
+def test_remaining_reports_minute_and_day_credits():
+    a, b = keys(2)
+    scheduler = ApiKeyScheduler([a, b], per_minute=8, per_day=20)
+    scheduler.acquire(timeout=0, credits=5)
+    assert scheduler.remaining() == {f"...{a[-4:]}": {'minute': 3, 'day': 15},
+                                     f"...{b[-4:]}": {'minute': 8, 'day': 20}}
+
+
+def test_credits_are_shared_between_processes():
+    a, b = keys(2)
+    ApiKeyScheduler([a, b], per_minute=4, per_day=100).acquire(timeout=0, credits=4)
+    forget([a, b])
+    other = ApiKeyScheduler([a, b], per_minute=4, per_day=100)
+    assert other.acquire(timeout=0, credits=4) == b
+    assert other.acquire(timeout=0, credits=2) is None
+    forget([a, b])
+    assert ApiKeyScheduler([a, b], per_minute=4, per_day=100).remaining()[f"...{a[-4:]}"]['day'] == 96
+
+
+def test_rate_limit_is_shared_between_processes():
+    a, b = keys(2)
+    ApiKeyScheduler([a, b], per_minute=4, per_day=100).report_rate_limited(a)
+    forget([a, b])
+    assert ApiKeyScheduler([a, b], per_minute=4, per_day=100).acquire(timeout=0) == b
+
+
+def test_unshared_buckets_stay_per_process(monkeypatch):
+    monkeypatch.setattr(api_scheduler, 'SHARED', False)
+    a, b = keys(2)
+    ApiKeyScheduler([a, b], per_minute=4, per_day=100).report_rate_limited(a)
+    forget([a, b])
+    assert ApiKeyScheduler([a, b], per_minute=4, per_day=100).acquire(timeout=0) == a
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from catboost import CatBoostClassifier
+from lightgbm import LGBMClassifier
+from xgboost import XGBClassifier
+
+import compiled_model
+import data_feed
+import one_hour
+import one_hour_pro_max_ai
+import training
+from features import FEATURES, add_indicators
+from stub_twelvedata import synthetic_series
+
+# Compiled trees compare float32 thresholds and sum leaves in float64
+ATOL = 1e-6
+
+
+def features_frame(module, symbol='EUR/USD'):
+    df = data_feed.parse_values(synthetic_series(symbol, module.HISTORY_SIZE)).reset_index(drop=True)
+    return module.add_target(add_indicators(df, module.EMA_ADJUST))
+
+
+def assert_same_proba(model, compiled, X, scaler=None):
+    expected = model.predict_proba(X if scaler is None else scaler.transform(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), expected, rtol=0, atol=ATOL)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X if scaler is None else scaler.transform(X)))
+
+
+@pytest.mark.parametrize('module, train_fn', [(one_hour, one_hour.train_model),
+                                              (one_hour_pro_max_ai, one_hour_pro_max_ai.train_ensemble_model)])
+def test_tier_models_compile_to_the_same_probabilities(module, train_fn):
+    df = features_frame(module)
+    model, _, scaler = (tuple(train_fn(df)) + (None,))[:3]
+    X = df[FEATURES].to_numpy()
+    assert_same_proba(model, compiled_model.compile_model(model, scaler), X, scaler)
+
+
+def noisy_data(n=400):
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(n, 6))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize('make_model', [
+    lambda: XGBClassifier(n_estimators=40, max_depth=4),
+    lambda: LGBMClassifier(n_estimators=40, num_leaves=15, verbose=-1),
+    lambda: CatBoostClassifier(iterations=40, depth=4, verbose=0, allow_writing_files=False),
+], ids=['xgboost', 'lightgbm', 'catboost'])
+def test_boosters_with_missing_values(make_model):
+    X, y = noisy_data()
+    model = make_model().fit(X, y)
+    assert_same_proba(model, compiled_model.compile_model(model), X)
+
+
+@pytest.mark.parametrize('final_fit, quantize', [('average', False), ('refit', True)])
+def test_fold_average_and_quantized_models(final_fit, quantize):
+    X, y = noisy_data()
+    X = np.nan_to_num(X)
+    model, _ = training.cross_validate(lambda: XGBClassifier(n_estimators=20, max_depth=3), X, y,
+                                       final_fit=final_fit, quantize=quantize, early_stopping=0)
+    assert_same_proba(model, compiled_model.compile_model(model), X)
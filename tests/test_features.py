@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+import features
+from bench_features import make_frames, reference_features
+
+
+def assert_same_features(df, ref):
+    pd.testing.assert_frame_equal(df[features.FEATURES].reset_index(drop=True),
+                                  ref[features.FEATURES].reset_index(drop=True),
+                                  check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_add_indicators_matches_pandas_reference(adjust):
+    df = make_frames(1, 500)['SYM0/USD']
+    assert_same_features(features.add_indicators(df.copy(), adjust), reference_features(df.copy(), adjust))
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_add_indicators_many_matches_pandas_reference(adjust):
+    # Unequal lengths go through separate stacked passes; the empty frame passes through
+    frames = make_frames(4, 400)
+    frames['SYM1/USD'] = frames['SYM1/USD'].tail(250).reset_index(drop=True)
+    frames['SYM2/USD'] = frames['SYM2/USD'].head(30)
+    frames['EMPTY/USD'] = pd.DataFrame(columns=['datetime'] + features.OHLC)
+    out = features.add_indicators_many({s: df.copy() for s, df in frames.items()}, adjust)
+    assert list(out) == list(frames)
+    assert out['EMPTY/USD'].empty
+    for symbol, df in frames.items():
+        if len(df):
+            assert_same_features(out[symbol], reference_features(df.copy(), adjust))
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_adjust_columns_recomputed_for_other_mode(adjust):
+    # What engine.fetch_and_featurize does for tiers on the other EMA mode
+    frames = make_frames(3, 300)
+    base = features.add_indicators_many({s: df.copy() for s, df in frames.items()}, not adjust)
+    out = features.add_indicators_many(base, adjust, features.ADJUST_COLUMNS)
+    for symbol, df in frames.items():
+        assert_same_features(out[symbol], reference_features(df.copy(), adjust))
+
+
+def test_short_history_is_nan_until_windows_fill():
+    df = features.add_indicators(make_frames(1, 10)['SYM0/USD'], False)
+    assert df['ma10'].iloc[:9].isna().all() and df['ma10'].iloc[9:].notna().all()
+    assert df[['bb_upper', 'bb_lower', 'adx']].isna().all().all()
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import retrain_policy
+from retrain_policy import INFER, REFIT, UPDATE
+
+FEATURES = ['f0', 'f1', 'f2']
+FITTED = 150
+
+
+class Constant:
+    def __init__(self, label):
+        self.label = label
+
+    def predict(self, X):
+        return np.full(len(X), self.label)
+
+
+def gate(acc):
+    return acc >= 0.6
+
+
+def make_df(n, shift=0.0):
+    # Every DRIFT_WINDOW candles repeat the same feature rows, so undrifted PSI is zero
+    rng = np.random.default_rng(0)
+    block = rng.normal(size=(retrain_policy.DRIFT_WINDOW, len(FEATURES)))
+    values = np.tile(block, (n // len(block) + 1, 1))[:n]
+    df = pd.DataFrame(values, columns=FEATURES)
+    df.loc[FITTED:, FEATURES] += shift
+    df['datetime'] = pd.date_range('2026-01-05', periods=n, freq='h')
+    df['target'] = 1
+    return df
+
+
+def make_entry(label=1, acc=0.7, age_hours=1.0):
+    return {'model': Constant(label), 'scaler': None, 'acc': acc, 'fitted_at': time.time() - age_hours * 3600,
+            'reference': retrain_policy.reference(make_df(FITTED), FEATURES)}
+
+
+@pytest.fixture(autouse=True)
+def policy(monkeypatch):
+    monkeypatch.setattr(retrain_policy, 'ENABLED', True)
+    monkeypatch.setattr(retrain_policy, 'RETRAIN_AFTER_CANDLES', 24)
+    monkeypatch.setattr(retrain_policy, 'MAX_MODEL_AGE_HOURS', 72)
+    monkeypatch.setattr(retrain_policy, 'PSI_THRESHOLD', 0.25)
+    monkeypatch.setattr(retrain_policy, 'LIVE_MIN_CANDLES', 12)
+
+
+def test_few_new_candles_infer():
+    action, _ = retrain_policy.decide(make_entry(), make_df(FITTED + 5), FEATURES, gate)
+    assert action == INFER
+
+
+def test_policy_off_or_no_reference_updates(monkeypatch):
+    assert retrain_policy.decide(dict(make_entry(), reference=None), make_df(FITTED + 5), FEATURES)[0] == UPDATE
+    monkeypatch.setattr(retrain_policy, 'ENABLED', False)
+    assert retrain_policy.decide(make_entry(), make_df(FITTED + 5), FEATURES)[0] == UPDATE
+
+
+def test_many_new_candles_update():
+    action, reason = retrain_policy.decide(make_entry(), make_df(FITTED + 24), FEATURES, gate)
+    assert action == UPDATE and '24 new candles' in reason
+
+
+def test_old_model_updates():
+    action, reason = retrain_policy.decide(make_entry(age_hours=80), make_df(FITTED + 5), FEATURES, gate)
+    assert action == UPDATE and 'old' in reason
+
+
+def test_drift_refits():
+    action, reason = retrain_policy.decide(make_entry(), make_df(FITTED + 20, shift=5.0), FEATURES, gate)
+    assert action == REFIT and 'drift' in reason
+
+
+def test_failing_live_accuracy_refits():
+    # 14 new candles, 13 with a known outcome, all predicted wrong
+    action, reason = retrain_policy.decide(make_entry(label=0), make_df(FITTED + 14), FEATURES, gate)
+    assert action == REFIT and 'live accuracy 0.00' in reason
+    assert retrain_policy.decide(make_entry(label=0), make_df(FITTED + 5), FEATURES, gate)[0] == INFER
+
+
+def test_stored_accuracy_failing_the_gate_refits():
+    action, reason = retrain_policy.decide(make_entry(acc=0.55), make_df(FITTED + 1), FEATURES, gate)
+    assert action == REFIT and 'stored accuracy 0.55' in reason
+    # Without a gate, or for a pooled entry's per-symbol accuracies, the stored value is not judged
+    assert retrain_policy.decide(make_entry(acc=0.55), make_df(FITTED + 1), FEATURES)[0] == INFER
+    assert retrain_policy.decide(make_entry(acc={0: 0.55}), make_df(FITTED + 1), FEATURES, gate)[0] == INFER
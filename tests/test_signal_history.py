@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+import signal_history
+from signal_history import Skipped
+
+HOUR = pd.Timestamp('2026-10-14 10:00:00')
+RECORDED = HOUR.timestamp() + 1800
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / 'signals.db')
+
+
+def output():
+    return pd.DataFrame([
+        {'Symbol': 'EUR/USD', 'Signal': '📈 BUY', 'Prob BUY': '0.71', 'RSI': '55.2', 'Confidence': '✅ Strong',
+         'Price x100': '108.50'},
+        {'Symbol': 'USD/JPY', 'Signal': '❌ Insufficient data', 'Prob BUY': '-', 'RSI': '-', 'Confidence': '-',
+         'Price x100': '-'},
+    ])
+
+
+def test_rows_parse_signals_and_key_by_candle():
+    rows = signal_history.rows('standard', output(), [Skipped('GBP/USD', 'Low accuracy (0.61)')],
+                               {'EUR/USD': HOUR, 'GBP/USD': HOUR}, RECORDED)
+    by_symbol = {row[0]: row for row in rows}
+    assert by_symbol['EUR/USD'] == ('EUR/USD', int(HOUR.timestamp()), 'standard', RECORDED, 'BUY', 0.71,
+                                    'Strong', 55.2, 108.5, None)
+    assert by_symbol['GBP/USD'][4:] == ('SKIP', None, None, None, None, 'Low accuracy (0.61)')
+
+
+def test_rows_keep_symbols_without_a_candle_under_the_refresh_hour():
+    # USD/JPY's fetch failed, so the refresh saw no candle for it
+    rows = signal_history.rows('standard', output(), [Skipped('AUD/USD', 'Error: timeout')],
+                               {'EUR/USD': HOUR}, RECORDED)
+    by_symbol = {row[0]: row for row in rows}
+    assert by_symbol['USD/JPY'][1] == int(HOUR.timestamp())
+    assert by_symbol['USD/JPY'][4:] == ('SKIP', None, None, None, None, 'Insufficient data')
+    assert by_symbol['AUD/USD'][1] == int(HOUR.timestamp()) and by_symbol['AUD/USD'][4] == 'ERROR'
+
+
+def test_last_signals_and_at_hour(db):
+    for hours in range(3):
+        candle = HOUR + pd.Timedelta(hours=hours)
+        for tier in ('standard', 'pro'):
+            rows = signal_history.rows(tier, output(), (), {'EUR/USD': candle}, candle.timestamp() + 60)
+            signal_history.record(rows, db)
+    # A second recording of the newest hour supersedes the first in at_hour
+    newest = HOUR + pd.Timedelta(hours=2)
+    later = output().assign(Signal='📉 SELL')
+    signal_history.record(signal_history.rows('pro', later, (), {'EUR/USD': newest}, newest.timestamp() + 120), db)
+
+    last = signal_history.last_signals('EUR/USD', 2, 'pro', db)
+    assert list(last['candle']) == [newest, newest]
+    assert list(last['signal']) == ['SELL', 'BUY']
+    assert len(signal_history.last_signals('EUR/USD', 10, None, db)) == 7
+    assert list(signal_history.last_signals('USD/JPY', 10, 'standard', db)['signal']) == ['SKIP'] * 3
+
+    hour = signal_history.at_hour(newest, None, db)
+    assert len(hour) == 4
+    assert hour.set_index(['tier', 'symbol']).loc[('pro', 'EUR/USD'), 'signal'] == 'SELL'
+    assert list(signal_history.at_hour(newest, 'standard', db)['symbol']) == ['EUR/USD', 'USD/JPY']
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+import features
+import streaming_indicators
+from bench_features import make_frames
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(streaming_indicators, 'STATE_DIR', str(tmp_path / 'indicator_state'))
+    monkeypatch.setattr(streaming_indicators, '_streams', {})
+    return tmp_path
+
+
+@pytest.fixture
+def warm_ups(monkeypatch):
+    calls = []
+    warm_states = streaming_indicators.warm_states
+
+    def counted(ohlc, adjust=False):
+        calls.append(len(ohlc))
+        return warm_states(ohlc, adjust)
+
+    monkeypatch.setattr(streaming_indicators, 'warm_states', counted)
+    return calls
+
+
+def series(n=400):
+    return make_frames(1, n)['SYM0/USD']
+
+
+def batch(df, adjust):
+    return features.add_indicators(df.copy(), adjust)[features.FEATURES].to_numpy()
+
+
+def streamed(frame, adjust, columns=features.FEATURES):
+    out = streaming_indicators.stream_indicators_many({'SYM0/USD': frame.copy()}, adjust, columns)['SYM0/USD']
+    return out[features.FEATURES].to_numpy()
+
+
+def forming(df):
+    # The newest candle as fetched mid-hour
+    df = df.copy()
+    df.loc[df.index[-1], 'close'] += 0.5
+    df.loc[df.index[-1], 'high'] += 1.0
+    return df
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_warm_state_streams_on_identical_to_batch(adjust):
+    df = series()
+    ohlc = df[features.OHLC].to_numpy()
+    state = streaming_indicators.warm_states(ohlc[np.newaxis, :250], adjust)[0]
+    rows = [state.update(*candle[1:]) for candle in ohlc[250:]]
+    np.testing.assert_array_equal(rows, batch(df, adjust)[250:])
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_state_from_first_candle_matches_batch(adjust):
+    df = series(100)
+    state = streaming_indicators.IndicatorState(adjust)
+    rows = [state.update(*candle[1:]) for candle in df[features.OHLC].to_numpy()]
+    np.testing.assert_array_equal(rows, batch(df, adjust))
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_state_survives_serialization(adjust, tmp_path):
+    df = series(300)
+    ohlc = df[features.OHLC].to_numpy()
+    state = streaming_indicators.warm_states(ohlc[np.newaxis, :200], adjust)[0]
+    stream = streaming_indicators.FeatureStream(state, np.arange(200), batch(df.head(200), adjust), ohlc[199])
+    stream.save(str(tmp_path / 'state.npz'))
+    restored = streaming_indicators.FeatureStream.load(str(tmp_path / 'state.npz'))
+    rows = [restored.state.update(*candle[1:]) for candle in ohlc[200:]]
+    np.testing.assert_array_equal(rows, batch(df, adjust)[200:])
+    np.testing.assert_array_equal(restored.values, stream.values)
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_refreshes_stream_only_new_candles(adjust, warm_ups):
+    df = series()
+    np.testing.assert_array_equal(streamed(forming(df.iloc[:300]), adjust), batch(forming(df.iloc[:300]), adjust))
+    assert warm_ups == [1]
+    # The forming candle closed and a new one started; the window slid by one
+    frame = forming(df.iloc[1:302])
+    np.testing.assert_array_equal(streamed(frame, adjust), batch(forming(df.iloc[:302]), adjust)[1:])
+    # Mid-hour refresh: only the forming candle changed
+    np.testing.assert_array_equal(streamed(df.iloc[1:302], adjust), batch(df.iloc[:302], adjust)[1:])
+    assert warm_ups == [1]
+
+
+def test_restart_resumes_from_disk(warm_ups, monkeypatch):
+    df = series()
+    streamed(df.iloc[:300], False)
+    monkeypatch.setattr(streaming_indicators, '_streams', {})
+    np.testing.assert_array_equal(streamed(df.iloc[5:310], False), batch(df.iloc[:310], False)[5:])
+    assert warm_ups == [1]
+
+
+def test_revised_or_longer_history_warms_up_again(warm_ups):
+    df = series()
+    streamed(df.iloc[100:300], False)
+    # The last candle the stream committed changed in the store
+    revised = df.iloc[100:305].copy()
+    revised.loc[298, 'close'] += 0.25
+    np.testing.assert_array_equal(streamed(revised, False), batch(revised, False))
+    # Reaches back past the rows the stream kept
+    np.testing.assert_array_equal(streamed(df.iloc[:305], False), batch(df.iloc[:305], False))
+    assert warm_ups == [1, 1, 1]
+
+
+def test_only_requested_columns_are_written():
+    df = series(300)
+    frame = features.add_indicators(df.copy(), False)
+    out = streaming_indicators.stream_indicators_many({'SYM0/USD': frame.copy()}, True, features.ADJUST_COLUMNS)
+    np.testing.assert_array_equal(out['SYM0/USD'][features.ADJUST_COLUMNS].to_numpy(),
+                                  features.add_indicators(df.copy(), True)[features.ADJUST_COLUMNS].to_numpy())
+    np.testing.assert_array_equal(out['SYM0/USD']['rsi14'].to_numpy(), frame['rsi14'].to_numpy())
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import candle_store
+import data_feed
+import fetch_client
+from fetch_client import FetchClient
+from stub_twelvedata import StubTwelveData
+
+SYMBOLS = ['EUR/USD', 'USD/JPY', 'XAU/USD']
+
+
+@pytest.fixture
+def stub():
+    with StubTwelveData(history=400) as server:
+        yield server
+
+
+def test_fetch_many_is_one_batched_request(stub):
+    client = FetchClient(stub.url)
+    try:
+        results = client.fetch_many([(s, {'interval': '1h', 'outputsize': 50}) for s in SYMBOLS])
+    finally:
+        client.close()
+    assert [r.symbol for r in results] == SYMBOLS
+    assert all(r.ok and len(r.values) == 50 for r in results)
+    assert stub.request_count == 1
+    # Newest first, like TwelveData
+    stamps = [v['datetime'] for v in results[0].values]
+    assert stamps == sorted(stamps, reverse=True)
+    assert stamps[0] == stub.series('EUR/USD')[-1]['datetime']
+
+
+def test_start_date_returns_only_newer_candles(stub):
+    start = stub.series('EUR/USD')[-5]['datetime']
+    client = FetchClient(stub.url)
+    try:
+        result = client.fetch_time_series('EUR/USD', {'interval': '1h', 'start_date': start, 'outputsize': 5000})
+    finally:
+        client.close()
+    assert [v['datetime'] for v in result.values][::-1] == [v['datetime'] for v in stub.series('EUR/USD')[-5:]]
+
+
+def test_errors_come_back_as_results():
+    with StubTwelveData(history=50, credits_per_minute=2) as limited:
+        client = FetchClient(limited.url)
+        try:
+            results = client.fetch_many([(s, {'interval': '1h'}) for s in SYMBOLS])
+        finally:
+            client.close()
+    assert all(not r.ok and r.status == 429 for r in results)
+
+    client = FetchClient('http://127.0.0.1:1', timeout=2)
+    try:
+        result = client.fetch_time_series('EUR/USD', {'interval': '1h'})
+    finally:
+        client.close()
+    assert not result.ok and 'ConnectionError' in result.error
+
+
+def test_data_feed_fetches_history_once_then_only_new_candles(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, 'DB_PATH', os.path.join(tmp_path, 'candles.db'))
+    client = FetchClient(stub.url)
+    monkeypatch.setattr(fetch_client, '_client', client)
+    try:
+        first = data_feed.fetch_many(SYMBOLS, None, history=100)
+        params = data_feed.build_params('EUR/USD', '1h', candle_store.last_timestamp('EUR/USD', '1h'), 100)
+        second = data_feed.fetch_many(SYMBOLS, None, history=100)
+    finally:
+        client.close()
+    assert params['start_date'] == stub.series('EUR/USD')[-1]['datetime']
+    assert stub.request_count == 2
+    for symbol in SYMBOLS:
+        assert len(first[symbol]) == 100
+        assert second[symbol].equals(first[symbol])
+        # The first fetch stores at least data_feed.HISTORY_SIZE candles
+        assert candle_store.count_candles(symbol, '1h') == max(100, data_feed.HISTORY_SIZE)
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from xgboost import XGBClassifier
+
+import profiling
+import training
+
+
+@pytest.mark.parametrize('parallel', [True, False])
+def test_cross_validate_spans_folds_and_final_fit_apart(parallel):
+    X = np.random.default_rng(0).normal(size=(300, 4))
+    y = (X[:, 0] > 0).astype(int)
+    with profiling.context(tier='standard'), profiling.capture() as spans:
+        training.cross_validate(lambda: XGBClassifier(n_estimators=10, max_depth=2), X, y,
+                                final_fit='refit', parallel=parallel, early_stopping=0)
+    stages = sorted((s['stage'], s['rows']) for s in spans)
+    assert stages == [('cv_fold', 75), ('cv_fold', 150), ('cv_fold', 225), ('final_fit', 300)]
+    # Spans from the fold threads keep the caller's context
+    assert all(s['tier'] == 'standard' for s in spans)
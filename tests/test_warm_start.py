@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+import model_registry
+
+FEATURES = ['f0', 'f1']
+
+
+class Fitted:
+    def __init__(self, X=None):
+        self.X = X
+
+    def predict(self, X):
+        return (X[:, 0] > 0).astype(int)
+
+
+def make_df(n):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES)
+    df['datetime'] = pd.date_range('2026-01-05', periods=n, freq='h')
+    df['target'] = (df['f0'] > 0).astype(int)
+    return df
+
+
+def previous_entry(df, fitted):
+    return {'model': Fitted(), 'acc': 0.6, 'scaler': None, 'reference': {'end': df['datetime'].iloc[fitted - 1]}}
+
+
+def test_warm_start_learns_new_candles_and_scores_the_newest(monkeypatch):
+    df = make_df(130)
+    boosted = {}
+
+    def continue_boosting(model, X, y):
+        boosted['X'] = X
+        return Fitted(X)
+
+    monkeypatch.setattr(model_registry, 'continue_boosting', continue_boosting)
+    model, acc = model_registry.warm_start(previous_entry(df, 100), df, FEATURES)
+    trained = {tuple(row) for row in boosted['X']}
+    rows = [tuple(row) for row in df[FEATURES].to_numpy()]
+    holdout = rows[-1 - model_registry.MIN_HOLDOUT_CANDLES:-1]
+    assert any(row in trained for row in rows[100:-1 - model_registry.MIN_HOLDOUT_CANDLES])
+    assert not any(row in trained for row in holdout + rows[-1:])
+    assert acc == 1.0
+
+
+def test_warm_start_needs_new_candles_beyond_the_holdout():
+    df = make_df(100 + model_registry.MIN_HOLDOUT_CANDLES + 1)
+    assert model_registry.warm_start(previous_entry(df, 100), df, FEATURES) is None
@@ -0,0 +1,285 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch
+
+import profiling
+from cpu_budget import limit_threads, model_threads
+
+# === CONFIG ===
+# 'refit': extra fit on all rows (previous behaviour), 'last_fold': reuse the fold
+# model that saw the most data, 'average': soft-average all fold models
+FINAL_FIT = os.environ.get('FINAL_FIT', 'refit')
+PARALLEL_FOLDS = os.environ.get('PARALLEL_FOLDS', '1') != '0'
+# Bin the balanced matrix once and train every fold and the final model on the uint8 codes.
+# Opt-in: the edges come from training rows only, so unseen live candles can land in other
+# bins than XGBoost's own sketch would give them and some predictions change
+QUANTIZE = os.environ.get('QUANTIZE_FEATURES', '0') == '1'
+MAX_BIN = 256
+# Stop each fold's boosters once the loss on the last rows of its training fold has not
+# improved for this many rounds; the refit then uses the folds' mean best round count. The
+# test fold is only scored, so the gated accuracy stays unbiased. Off by default: folds fitted
+# on 80% of their rows score lower and flip tier gates. 0 trains the full count.
+EARLY_STOPPING_ROUNDS = int(os.environ.get('EARLY_STOPPING_ROUNDS', '0'))
+STOPPING_FRACTION = 0.2
+MIN_STOPPING_ROWS = 10
+
+
+def feature_matrix(df, features, dtype=None):
+    # One contiguous copy of the feature columns. XGBoost casts to float32 itself, so float32
+    # is exact for it; bin edges and LightGBM histograms need the float64 values.
+    if dtype is None:
+        dtype = np.float64 if QUANTIZE else np.float32
+    return np.ascontiguousarray(df[features].to_numpy(dtype=dtype))
+
+
+def balanced_indices(y, min_len=0, random_state=42, shuffle_state=42):
+    # Same rows, in the same order, as resample()-ing each class to the minority size with
+    # random_state and then DataFrame.sample(frac=1, random_state=shuffle_state)
+    y = np.asarray(y)
+    pos, neg = np.flatnonzero(y == 1), np.flatnonzero(y == 0)
+    n = min(len(pos), len(neg))
+    if n < max(min_len, 1):
+        return None
+    idx = np.concatenate([
+        pos[np.random.RandomState(random_state).randint(0, len(pos), size=n)],
+        neg[np.random.RandomState(random_state).randint(0, len(neg), size=n)],
+    ])
+    rng = np.random.RandomState(shuffle_state) if shuffle_state is not None else np.random
+    return idx[rng.choice(len(idx), size=len(idx), replace=False)]
+
+
+class BinEdges:
+    def __init__(self, X, max_bin=MAX_BIN, categorical=()):
+        values = np.asarray(X, dtype=np.float64)
+        quantiles = np.linspace(0, 1, max_bin + 1)[1:-1]
+        self.edges = []
+        for j in range(values.shape[1]):
+            levels = np.unique(values[:, j]) if j in categorical else None
+            if levels is not None and len(levels) <= max_bin:
+                # One code per category id instead of quantile bins
+                self.edges.append(levels[:-1] + 0.5)
+            else:
+                self.edges.append(np.unique(np.quantile(values[:, j], quantiles)))
+
+    def transform(self, X):
+        values = np.asarray(X, dtype=np.float64)
+        codes = np.empty(values.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.edges):
+            codes[:, j] = np.searchsorted(edges, values[:, j], side='right')
+        return codes
+
+
+class QuantizedModel:
+    # Fitted on BinEdges codes; quantizes raw feature rows before delegating
+    def __init__(self, model, edges):
+        self.model = model
+        self.edges = edges
+
+    def __getattr__(self, name):
+        if name in ('model', 'edges'):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.edges.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.edges.transform(X))
+
+
+class FoldAverage:
+    def __init__(self, models):
+        self.models = models
+        self.classes_ = models[-1].classes_
+
+    @property
+    def named_estimators_(self):
+        # Ensemble members of the fold that saw the most data, for feature importances
+        return self.models[-1].named_estimators_
+
+    @property
+    def feature_importances_(self):
+        return np.mean([m.feature_importances_ for m in self.models], axis=0)
+
+    def predict_proba(self, X):
+        return np.mean([m.predict_proba(X) for m in self.models], axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def fit_model(model, X, y, eval_set=None, early_stopping=0):
+    # Plain fit, or each booster fitted with early stopping on eval_set (X_val, y_val)
+    if eval_set is None or not early_stopping:
+        model.fit(X, y)
+        return model
+    name = type(model).__name__
+    X_val, y_val = eval_set
+    if name == 'VotingClassifier':
+        # Same fitted attributes VotingClassifier.fit sets, with each member stopped on its own
+        le = LabelEncoder().fit(y)
+        target, val_target = le.transform(y), le.transform(y_val)
+        fitted = [(key, fit_model(clone(est), X, target, (X_val, val_target), early_stopping))
+                  for key, est in model.estimators]
+        model.le_, model.classes_ = le, le.classes_
+        model.estimators_ = [est for _, est in fitted]
+        model.named_estimators_ = Bunch(**dict(fitted))
+    elif name == 'XGBClassifier':
+        model.set_params(early_stopping_rounds=early_stopping)
+        model.fit(X, y, eval_set=[(X_val, y_val)], verbose=False)
+        # Later fits (warm starts) have no eval set; predictions still use best_iteration
+        model.set_params(early_stopping_rounds=None)
+    elif name == 'LGBMClassifier':
+        from lightgbm import early_stopping as stop_callback
+        model.fit(X, y, eval_X=X_val, eval_y=y_val, callbacks=[stop_callback(early_stopping, verbose=False)])
+    elif name == 'CatBoostClassifier':
+        model.fit(X, y, eval_set=(X_val, y_val), early_stopping_rounds=early_stopping)
+    else:
+        model.fit(X, y)
+    return model
+
+
+def boosting_rounds(model):
+    # Trees each booster actually predicts with; a dict per member for ensembles
+    name = type(model).__name__
+    if name == 'QuantizedModel':
+        return boosting_rounds(model.model)
+    if name == 'FoldAverage':
+        return boosting_rounds(model.models[-1])
+    if name == 'VotingClassifier':
+        return {key: boosting_rounds(est) for key, est in model.named_estimators_.items()}
+    if name == 'XGBClassifier':
+        try:
+            return model.best_iteration + 1
+        except AttributeError:
+            return model.get_booster().num_boosted_rounds()
+    if name == 'LGBMClassifier':
+        return model.best_iteration_ or model.booster_.current_iteration()
+    if name == 'CatBoostClassifier':
+        return model.tree_count_
+    return None
+
+
+def mean_rounds(rounds):
+    if rounds[0] is None:
+        return None
+    if isinstance(rounds[0], dict):
+        return {key: mean_rounds([r[key] for r in rounds]) for key in rounds[0]}
+    return max(1, int(round(np.mean(rounds))))
+
+
+def with_rounds(model, rounds):
+    if isinstance(rounds, dict):
+        for key, est in model.estimators:
+            with_rounds(est, rounds[key])
+    elif type(model).__name__ == 'CatBoostClassifier':
+        model.set_params(iterations=rounds)
+    else:
+        model.set_params(n_estimators=rounds)
+    return model
+
+
+def stopping_split(train_idx):
+    # (fit rows, stopping rows) from the tail of a training fold; no stopping rows when too short
+    stop = int(len(train_idx) * STOPPING_FRACTION)
+    if stop < MIN_STOPPING_ROWS:
+        return train_idx, None
+    return train_idx[:-stop], train_idx[-stop:]
+
+
+def group_accuracy(y_true, y_pred, groups):
+    hits = np.asarray(y_true) == np.asarray(y_pred)
+    return {g: hits[groups == g].mean() for g in np.unique(groups)}
+
+
+def cross_validate(make_model, X, y, n_splits=3, final_fit=None, parallel=None, quantize=None,
+                   groups=None, categorical=(), early_stopping=None):
+    # Fits the TimeSeriesSplit folds (and the optional refit) concurrently; returns (model, mean fold
+    # accuracy), or (model, {group: mean fold accuracy}) when a per-row groups array is given
+    final_fit = final_fit or FINAL_FIT
+    parallel = PARALLEL_FOLDS if parallel is None else parallel
+    quantize = QUANTIZE if quantize is None else quantize
+    early_stopping = EARLY_STOPPING_ROUNDS if early_stopping is None else early_stopping
+    splits = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        if len(train_idx) == 0:
+            print("[INFO] Empty training split, skipping this fold.")
+            continue
+        splits.append((train_idx, test_idx))
+    if not splits:
+        print("[INFO] No valid folds to train.")
+        return None, 0
+
+    jobs = [(train_idx, test_idx, None) for train_idx, test_idx in splits]
+    # With early stopping the refit needs the folds' round counts, so it runs after them
+    refit_alongside = final_fit == 'refit' and not early_stopping
+    if refit_alongside:
+        jobs.append((np.arange(len(X)), None, None))
+    edges = BinEdges(X, categorical=categorical) if quantize else None
+    if quantize:
+        # Folds take rows of one shared uint8 matrix instead of X.iloc float copies
+        codes, target = edges.transform(X), np.asarray(y)
+        rows = lambda idx: (codes[idx], target[idx])
+    elif isinstance(X, np.ndarray):
+        target = np.asarray(y)
+        rows = lambda idx: (X[idx], target[idx])
+    else:
+        rows = lambda idx: (X.iloc[idx], y.iloc[idx])
+
+    origin = profiling.carry()
+
+    def fit(job, threads):
+        # One span per job, so fold fits and the final fit stay apart even when run together
+        train_idx, test_idx, rounds = job
+        stage = 'final_fit' if test_idx is None else 'cv_fold'
+        with profiling.carry(origin), profiling.span(stage, rows=len(train_idx)):
+            return fit_job(train_idx, test_idx, rounds, threads)
+
+    def fit_job(train_idx, test_idx, rounds, threads):
+        with limit_threads(threads, native=False):
+            model = make_model()
+            if rounds is not None:
+                with_rounds(model, rounds)
+            fit_idx, stop_idx = train_idx, None
+            if test_idx is not None and early_stopping:
+                fit_idx, stop_idx = stopping_split(train_idx)
+            X_train, y_train = rows(fit_idx)
+            fit_model(model, X_train, y_train, rows(stop_idx) if stop_idx is not None else None, early_stopping)
+        if test_idx is None:
+            return model, None
+        X_test, y_test = rows(test_idx)
+        if groups is not None:
+            return model, group_accuracy(y_test, model.predict(X_test), np.asarray(groups)[test_idx])
+        return model, accuracy_score(y_test, model.predict(X_test))
+
+    def fit_all(jobs):
+        if parallel and len(jobs) > 1:
+            threads = max(1, model_threads() // len(jobs))
+            with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='fold') as executor:
+                return list(executor.map(lambda job: fit(job, threads), jobs))
+        return [fit(job, model_threads()) for job in jobs]
+
+    fitted = fit_all(jobs)
+
+    scores = [acc for _, acc in fitted[:len(splits)]]
+    if groups is not None:
+        acc = {g: np.mean([s[g] for s in scores if g in s]) for g in sorted(set().union(*scores))}
+    else:
+        acc = np.mean(scores)
+    fold_models = [model for model, _ in fitted[:len(splits)]]
+    if refit_alongside:
+        model = fitted[-1][0]
+    elif final_fit == 'refit':
+        rounds = mean_rounds([boosting_rounds(m) for m in fold_models])
+        model = fit_all([(np.arange(len(X)), None, rounds)])[0][0]
+    elif final_fit == 'average':
+        model = FoldAverage(fold_models)
+    else:
+        model = fold_models[-1]
+    return (QuantizedModel(model, edges) if quantize else model), acc
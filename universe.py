@@ -0,0 +1,31 @@
+import json
+import os
+
+# === CONFIG ===
+# {"groups": {"fx_majors": ["EUR/USD", ...]}, "tiers": {"pro_max": ["fx_majors", "XAU/USD"]}}:
+# a tier entry is a group name or a symbol; tiers missing from the file keep their own list
+UNIVERSE_FILE = os.environ.get('SYMBOL_UNIVERSE_FILE', os.path.join('data', 'universe.json'))
+
+
+def load(path=None):
+    path = path or UNIVERSE_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read symbol universe {path} - {e}")
+        return {}
+
+
+def tier_symbols(tier, default, path=None):
+    config = load(path)
+    entries = config.get('tiers', {}).get(tier)
+    if entries is None:
+        return list(default)
+    groups = config.get('groups', {})
+    symbols = []
+    for entry in entries:
+        symbols += groups.get(entry, [entry])
+    return list(dict.fromkeys(symbols))